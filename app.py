@@ -6,16 +6,27 @@ import shutil
 import logging
 from datetime import datetime
 from fastapi import FastAPI, UploadFile, File, Form, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from engine.forensic import (
     TIME_HIERARCHY, EVENT_ID_HIERARCHY, get_primary_time_column,
     normalize_time_columns_in_df, parse_time_boundary, sanitize_context_data,
     apply_standard_processing as _apply_standard_processing,
+    drop_internal_columns, TS_COL, INTERNAL_COLUMNS,
     sub_analyze_timeline, sub_analyze_context, sub_analyze_hunting,
     sub_analyze_identity_and_procs, ingest_json_file
 )
+from engine.view_cache import resolve_view, view_cache, view_empty_columns, is_unfiltered
+from engine.query_executor import run_query, query_executor, collect, QuerySuperseded
+from engine.ingest_pool import ingest_pool
+from engine.ingest_jobs import ingest_jobs, IngestQueueFull, DEFAULT_PRIORITY
+from engine.upload_stream import save_upload, parse_hash_list, UploadCancelled
+from engine.page_codec import PAGE_FORMATS, ARROW_MEDIA_TYPE, arrow_ipc_bytes, columnar_json_bytes, meta_headers
+from engine.session_store import (
+    scan_dataset, dataset_exists, read_text_sample,
+    get_dataset, clear_registry, EMPTY_VALUE_REGEX
+)
 # generate_unified_timeline runs in subprocess — see forensic processing in upload handler
 import polars as pl
 import csv
@@ -27,6 +38,7 @@ import re
 from typing import List, Optional, Any
 from pydantic import BaseModel
 import asyncio
+import anyio.to_thread
 
 # Load .env for API keys (if present)
 try:
@@ -73,11 +85,13 @@ async def hard_reset():
     Hard reset endpoint to clear all session caches, uploads, and outputs.
     """
     try:
-        # 1. Clear processed_files cache
+        # 1. Clear processed_files cache, dataset handle registry and cached grid views
         processed_files.clear()
+        clear_registry()
+        view_cache.clear()
 
         # 2. Cleanup directories
-        for folder in ["chronos_uploads", "chronos_output"]:
+        for folder in [UPLOAD_DIR, OUTPUT_DIR]:
             if os.path.exists(folder):
                 for filename in os.listdir(folder):
                     file_path = os.path.join(folder, filename)
@@ -107,6 +121,10 @@ app.include_router(settings_router)
 from engine.enrichment_router import enrichment_router
 app.include_router(enrichment_router)
 
+# Mount Ingest Router (upload job status, progress events, cancellation)
+from engine.ingest_router import ingest_router
+app.include_router(ingest_router)
+
 @app.on_event("startup")
 async def startup_event():
     # Initialize Case Database
@@ -115,8 +133,15 @@ async def startup_event():
         init_db()
     except Exception as e:
         logger.warning(f"Case DB init skipped: {e}")
+    # Ingest workers import Polars/engine once, ahead of the first upload
+    ingest_pool.start()
     logger.info("Startup cleanup complete: /chronos_uploads and /chronos_output cleared.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Joining the dispatch threads and worker processes blocks: keep it off the event loop
+    await anyio.to_thread.run_sync(ingest_pool.shutdown)
+
 # Directories
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(BASE_DIR, "chronos_output")
@@ -157,31 +182,10 @@ processed_files = _TTLDict(default_ttl=14400)
 for d in [OUTPUT_DIR, UPLOAD_DIR, STATIC_DIR, TEMPLATES_DIR]:
     os.makedirs(d, exist_ok=True)
 
-
-async def _process_file_subprocess(file_path: str, ext: str, dest_path: str) -> tuple:
-    """Process uploaded file in a separate Python process to isolate Polars crashes from uvicorn."""
-    script = (
-        f'import sys, os; sys.path.insert(0, {BASE_DIR!r}); '
-        f'from engine.ingestor import ingest_file, normalize_and_save; '
-        f'lf, df, cat = ingest_file({file_path!r}, {ext!r}); '
-        f'rc = normalize_and_save(lf, df, {dest_path!r}); '
-        f'print(f"{{rc}}|{{cat}}")'
-    )
-    proc = await asyncio.create_subprocess_exec(
-        sys.executable, '-c', script,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        cwd=BASE_DIR
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
-        err_msg = stderr.decode()[-500:] if stderr else "Unknown error"
-        raise RuntimeError(f"Subprocess exit code {proc.returncode}: {err_msg}")
-    output = stdout.decode().strip()
-    parts = output.rsplit('|', 1)
-    rc = int(parts[0]) if parts[0].lstrip('-').isdigit() else -1
-    cat = parts[1] if len(parts) > 1 else "generic"
-    return rc, cat
+# Mount Upload Router (ingest of saved uploads + resumable /api/uploads protocol)
+from engine.upload_router import upload_router, configure_uploads, start_ingest
+configure_uploads(OUTPUT_DIR, UPLOAD_DIR, processed_files)
+app.include_router(upload_router)
 
 
 # Mount statics and templates
@@ -225,187 +229,122 @@ async def read_root(request: Request):
 
 @app.post("/upload")
 async def process_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     artifact_type: str = Form(...),
     case_id: Optional[str] = Form(None),
     phase_id: Optional[str] = Form(None),
+    background: bool = Form(False),
+    priority: int = Form(DEFAULT_PRIORITY),
+    hashes: Optional[str] = Form(None),
 ):
+    """
+    Upload + ingest. The file is streamed to disk, then parsed on the ingest worker
+    pool once the ingest queue admits it (priority, concurrency and RAM budget —
+    see engine/ingest_jobs.py). With background=true the response only carries the
+    job id; progress and the final result come from /api/ingest/jobs/{id}.
+    hashes=md5,sha1 adds those digests to the chain of custody (SHA256 is always computed).
+    """
+    try:
+        parse_hash_list(hashes)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    try:
+        job = ingest_jobs.create(file.filename, file.size or 0, priority)
+    except IngestQueueFull as e:
+        return JSONResponse(content={"error": str(e)}, status_code=429)
     try:
         file_path = os.path.join(UPLOAD_DIR, file.filename)
 
-        # STREAMING UPLOAD: Stream directly to disk to handle 6GB+ files
-        # Chain of Custody: compute SHA256 hash during upload (zero extra I/O)
-        sha256 = hashlib.sha256()
-        with open(file_path, "wb") as buffer:
-            while chunk := file.file.read(8192):
-                sha256.update(chunk)
-                buffer.write(chunk)
-            buffer.flush()
-            os.fsync(buffer.fileno())
-        file_hash = sha256.hexdigest()
-        file_size = os.path.getsize(file_path)
-        logger.info(f"Chain of Custody — {file.filename}: SHA256={file_hash}, Size={file_size}")
-
-        ext = os.path.splitext(file.filename)[1].lower()
-
-        # LOGIC BRANCH: Generic Report vs Forensic Artifact
-        generic_exts = ['.csv', '.xlsx', '.tsv', '.parquet', '.json', '.jsonl', '.ndjson',
-                        '.db', '.sqlite', '.sqlite3', '.pslist', '.txt', '.log', '.trc', '.plist', '.zip']
-        if ext in generic_exts:
-            csv_filename = f"import_{file.filename.split('.')[0]}_{int(time.time())}.csv"
-            dest_path = os.path.join(OUTPUT_DIR, csv_filename)
-
-            row_count = "Unknown (Lazy)"
-            file_cat = "generic"
+        # STREAMING UPLOAD: large chunks copied to disk on an upload thread (6GB+ files
+        # never block the event loop). Chain of Custody: SHA256 (+ optional MD5/SHA1)
+        # computed during the copy, in parallel (zero extra I/O)
+        try:
+            file_size, digests = await save_upload(
+                file.file, file_path, parse_hash_list(hashes),
+                on_progress=lambda n: job.update(bytes_read=n), cancel=job.cancel)
+        except UploadCancelled:
+            return JSONResponse(content={"error": "Ingest job cancelled", "job_id": job.id}, status_code=409)
+        job.update(bytes_total=file_size, stage="uploaded")
+        logger.info(f"Chain of Custody — {file.filename}: "
+                    + ", ".join(f"{a.upper()}={d}" for a, d in digests.items()) + f", Size={file_size}")
+
+        return await start_ingest(background_tasks, job, background, file_path=file_path,
+                                   original_filename=file.filename, artifact_type=artifact_type,
+                                   case_id=case_id, phase_id=phase_id, digests=digests, file_size=file_size)
 
-            try:
-                rc, file_cat = await _process_file_subprocess(file_path, ext, dest_path)
-                row_count = rc if rc >= 0 else "Unknown"
-                processed_files[file.filename] = csv_filename
+    except Exception as e:
+        ingest_jobs.finish(job, "failed", error=str(e))
+        return JSONResponse(content={"error": str(e)}, status_code=500)
 
-            except Exception as e:
-                logger.error(f"Subprocess processing failed: {e}. Copying raw file.")
-                try:
-                    shutil.copy(file_path, dest_path)
-                    processed_files[file.filename] = csv_filename
-                except Exception as copy_e:
-                    logger.error(f"Raw copy FAILED: {copy_e}")
-                row_count = "Unknown"
-
-            # Register file in case database if case context provided
-            _file_id = None
-            if case_id:
-                try:
-                    from engine.case_db import register_file as _reg_file
-                    _rc = int(row_count) if isinstance(row_count, (int, float)) else 0
-                    _file_id = _reg_file(
-                        case_id=case_id, phase_id=phase_id,
-                        original_filename=file.filename,
-                        processed_filename=csv_filename,
-                        sha256=file_hash, file_size=file_size,
-                        file_category=file_cat, row_count=_rc,
-                    )
-                except Exception as reg_e:
-                    logger.warning(f"Case file registration failed: {reg_e}")
 
-            return {
-                "status": "success",
-                "message": "File uploaded successfully",
-                "data_url": f"/api/data/{csv_filename}",
-                "csv_filename": csv_filename,
-                "xlsx_filename": None,
-                "processed_records": row_count,
-                "file_category": file_cat,
-                "original_filename": file.filename,
-                "file_id": _file_id,
-                "chain_of_custody": {
-                    "sha256": file_hash,
-                    "file_size_bytes": file_size,
-                    "original_filename": file.filename,
-                }
-            }
+def _parse_column_list(raw: Optional[str]) -> list:
+    """`columns` query param: JSON array or comma-separated names; [] = all columns."""
+    if not raw:
+        return []
+    try:
+        cols = json.loads(raw)
+    except (ValueError, TypeError):
+        cols = raw.split(",")
+    if not isinstance(cols, list):
+        cols = [cols]
+    return [str(c).strip() for c in cols if c is not None and str(c).strip()]
 
-        # Forensic Processing (MFT/EVTX) — run in subprocess to isolate Polars crashes
-        forensic_script = (
-            f'import sys, os, json; sys.path.insert(0, {BASE_DIR!r}); '
-            f'from timeline_skill import generate_unified_timeline; '
-            f'r = generate_unified_timeline({file_path!r}, {artifact_type!r}, {OUTPUT_DIR!r}); '
-            f'print(r)'
-        )
-        forensic_proc = await asyncio.create_subprocess_exec(
-            sys.executable, '-c', forensic_script,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=BASE_DIR
-        )
-        f_stdout, f_stderr = await forensic_proc.communicate()
-        if forensic_proc.returncode != 0:
-            err = f_stderr.decode()[-500:] if f_stderr else "Unknown"
-            return JSONResponse(content={"error": f"Forensic processing failed: {err}"}, status_code=500)
-        result_json = f_stdout.decode().strip()
-        result = json.loads(result_json)
-
-        if result.get("status") != "success":
-            return JSONResponse(content={"error": result.get("error", "Unknown error")}, status_code=500)
-
-        result['file_category'] = 'forensic'
-        csv_path = result['files']['csv']
-        filename = os.path.basename(csv_path)
-        processed_files[file.filename] = filename
-
-        # Register forensic file in case database
-        _file_id = None
-        if case_id:
-            try:
-                from engine.case_db import register_file as _reg_file
-                _file_id = _reg_file(
-                    case_id=case_id, phase_id=phase_id,
-                    original_filename=file.filename,
-                    processed_filename=filename,
-                    sha256=file_hash, file_size=file_size,
-                    file_category='forensic',
-                    row_count=result.get("processed_records", 0) or 0,
-                )
-            except Exception as reg_e:
-                logger.warning(f"Case file registration failed: {reg_e}")
 
-        return {
-            "status": "success",
-            "message": "File processed successfully",
-            "data_url": f"/api/data/{filename}",
-            "processed_records": result.get("processed_records"),
-            "csv_filename": filename,
-            "xlsx_filename": os.path.basename(result['files']['excel']),
-            "original_filename": file.filename,
-            "file_id": _file_id,
-            "chain_of_custody": {
-                "sha256": file_hash,
-                "file_size_bytes": file_size,
-                "original_filename": file.filename,
-            }
-        }
+def _encoded_page(df: pl.DataFrame, fmt: str, meta: dict) -> Response:
+    """columnar-json / arrow page response (encoded on the query worker)."""
+    if fmt == "arrow":
+        return Response(content=arrow_ipc_bytes(df), media_type=ARROW_MEDIA_TYPE, headers=meta_headers(meta))
+    return Response(content=columnar_json_bytes(df, meta), media_type="application/json")
 
-    except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+@app.exception_handler(QuerySuperseded)
+async def query_superseded_handler(request: Request, exc: QuerySuperseded):
+    """A newer request for the same view replaced this one; the client ignores it."""
+    return JSONResponse(content={"error": str(exc), "superseded": True}, status_code=409)
+
+
+@app.get("/api/query_stats")
+async def query_stats():
+    """Query executor load: workers, pool queue depth and per-endpoint counters."""
+    return query_executor.stats()
 
 
 @app.get("/api/data/{filename}")
-async def get_data(request: Request, filename: str, page: int = 1, size: int = 50, query: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, col_filters: Optional[str] = None, sort_col: Optional[str] = None, sort_dir: Optional[str] = None):
+async def get_data(request: Request, filename: str, page: int = 1, size: int = 50, query: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, col_filters: Optional[str] = None, sort_col: Optional[str] = None, sort_dir: Optional[str] = None, columns: Optional[str] = None, format: str = "json", view_id: Optional[str] = None):
+    # Tabulator sends sort as sort[0][field] / sort[0][dir] — map to our params
+    _sort_col = request.query_params.get("sort[0][field]") or sort_col
+    _sort_dir = request.query_params.get("sort[0][dir]") or sort_dir
+    if format not in PAGE_FORMATS:
+        return JSONResponse(content={"error": f"Unknown format '{format}' (expected one of {', '.join(PAGE_FORMATS)})"}, status_code=400)
+    return await run_query("grid", _get_data_page, filename, page, size, query, start_time, end_time,
+                           col_filters, _sort_col, _sort_dir, columns, format, view_id=view_id)
+
+
+def _get_data_page(filename: str, page: int, size: int, query: Optional[str], start_time: Optional[str], end_time: Optional[str], col_filters: Optional[str], _sort_col: Optional[str], _sort_dir: Optional[str], columns: Optional[str], format: str):
     import polars as pl
     import numpy as np
     import traceback
     import math
 
-    # Tabulator sends sort as sort[0][field] / sort[0][dir] — map to our params
-    _sort_col = request.query_params.get("sort[0][field]") or sort_col
-    _sort_dir = request.query_params.get("sort[0][dir]") or sort_dir
-
     try:
         csv_path = os.path.join(OUTPUT_DIR, filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return JSONResponse(content={"error": "File not found"}, status_code=404)
 
         try:
-            lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            try:
-                lf.collect().head(1)
-            except:
-                lf = pl.scan_csv(csv_path, encoding='utf8-lossy', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
+            # Registry handle: encoding, schema and row count are resolved once per file
+            # version. Its LazyFrame always carries the stable _id the frontend keys on.
+            ds = get_dataset(csv_path)
         except Exception as scan_err:
-             logger.error(f"Error scanning csv {csv_path}: {scan_err}")
+             logger.error(f"Error scanning dataset {csv_path}: {scan_err}")
              return JSONResponse(content={"error": str(scan_err)}, status_code=500)
 
         try:
-            # 1. Assign stable row IDs BEFORE any filtering if they don't exist
-            # This ensures that frontend row selection (which keys on _id) is stable across filters
-            schema_names = lf.collect_schema().names()
-            if "_id" not in schema_names:
-                lf = lf.with_row_index(name="_id", offset=1)
+            total_unfiltered = ds.row_count
 
-            # Count unfiltered total BEFORE applying filters
-            total_unfiltered = lf.select(pl.len()).collect(engine="streaming").item()
-
-            # Apply Unified Processing (query, filters, time range, sort)
+            # Unified Processing (query, filters, time range, sort) runs once per distinct
+            # view; later pages of the same view come from the cached row positions.
             params = {
                 "query": query,
                 "col_filters": col_filters,
@@ -414,14 +353,18 @@ async def get_data(request: Request, filename: str, page: int = 1, size: int = 5
                 "sort_col": _sort_col,
                 "sort_dir": _sort_dir
             }
-            lf = _apply_standard_processing(lf, params)
+            view = resolve_view(ds, params)
 
-            # Calculate total rows BEFORE slicing (filtered count)
-            total_rows = lf.select(pl.len()).collect(engine="streaming").item()
+            total_rows = view.total
             last_page = math.ceil(total_rows / size) if size > 0 else 1
             offset = (page - 1) * size
 
             if total_rows == 0:
+                 if format != "json":
+                     return _encoded_page(pl.DataFrame(), format, {
+                         "current_page": page, "last_page": last_page, "total": 0,
+                         "total_unfiltered": total_unfiltered, "start_time": None, "end_time": None,
+                     })
                  return {
                      "current_page": page,
                      "last_page": last_page,
@@ -432,30 +375,27 @@ async def get_data(request: Request, filename: str, page: int = 1, size: int = 5
                      "end_time": None
                  }
 
-            # Try to determine max/min time overall for the view
-            view_start = None
-            view_end = None
-            try:
-                schema = lf.collect_schema()
-                if "Time" in schema.names():
-                    time_stats = lf.select([
-                        pl.col("Time").min().alias("min_time"),
-                        pl.col("Time").max().alias("max_time")
-                    ]).collect()
-                    if len(time_stats) > 0:
-                        view_start = time_stats[0, "min_time"]
-                        view_end = time_stats[0, "max_time"]
-                        if view_start: view_start = str(view_start)
-                        if view_end: view_end = str(view_end)
-            except Exception as e:
-                logger.warning(f"Could not calculate global time bounds: {e}")
+            # Final Pagination: gather only this page's rows
+            q = sanitize_context_data(ds.gather(view.page_positions(offset, size)))
 
-            # Final Pagination
-            q = lf.slice(offset, size)
+            # Projection: only the requested columns (plus the _id the grid keys on) are
+            # read from the store and serialized; sort/filter columns were already
+            # consumed when the view was resolved
+            wanted = _parse_column_list(columns)
+            if wanted:
+                names = q.collect_schema().names()
+                q = q.select([c for c in dict.fromkeys(["_id", *wanted]) if c in names])
 
             # Final normalization for display
-            q = normalize_time_columns_in_df(q)
-            df_page = q.collect(engine="streaming")
+            q = drop_internal_columns(normalize_time_columns_in_df(q))
+            df_page = collect(q, engine="streaming")
+
+            if format != "json":
+                return _encoded_page(df_page, format, {
+                    "current_page": page, "last_page": last_page, "total": total_rows,
+                    "total_unfiltered": total_unfiltered,
+                    "start_time": view.view_start, "end_time": view.view_end,
+                })
 
             return {
                 "current_page": page,
@@ -463,8 +403,8 @@ async def get_data(request: Request, filename: str, page: int = 1, size: int = 5
                 "data": df_page.to_dicts(),
                 "total": total_rows,
                 "total_unfiltered": total_unfiltered,
-                "start_time": view_start,
-                "end_time": view_end
+                "start_time": view.view_start,
+                "end_time": view.view_end
             }
 
 
@@ -479,33 +419,77 @@ async def get_data(request: Request, filename: str, page: int = 1, size: int = 5
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 
-from engine.analyzer import analyze_dataframe
+from engine.analyzer import analyze_dataframe, analyze_time_cube, dataset_file_bounds
+from engine.view_snapshot import view_snapshot, SNAPSHOT_PARTS
+
+
+@app.get("/api/view/{filename}")
+async def get_view(request: Request, filename: str, page: int = 1, size: int = 50, query: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, col_filters: Optional[str] = None, sort_col: Optional[str] = None, sort_dir: Optional[str] = None, columns: Optional[str] = None, include: Optional[str] = None, view_id: Optional[str] = None):
+    """
+    View snapshot: grid page, counts, time bounds, histogram and empty columns
+    for one filter state, from a single view resolution (see engine/view_snapshot).
+    Same params as /api/data; ?include=page,histogram,empty_columns picks the parts
+    (default: all).
+    """
+    _sort_col = request.query_params.get("sort[0][field]") or sort_col
+    _sort_dir = request.query_params.get("sort[0][dir]") or sort_dir
+    parts = _parse_column_list(include) or list(SNAPSHOT_PARTS)
+    unknown = [p for p in parts if p not in SNAPSHOT_PARTS]
+    if unknown:
+        return JSONResponse(content={"error": f"Unknown part(s) {', '.join(unknown)} (expected {', '.join(SNAPSHOT_PARTS)})"}, status_code=400)
+    return await run_query("grid", _get_view, filename, page, size, query, start_time, end_time,
+                           col_filters, _sort_col, _sort_dir, columns, parts, view_id=view_id)
+
+
+def _get_view(filename: str, page: int, size: int, query: Optional[str], start_time: Optional[str], end_time: Optional[str], col_filters: Optional[str], _sort_col: Optional[str], _sort_dir: Optional[str], columns: Optional[str], parts: list):
+    try:
+        csv_path = os.path.join(OUTPUT_DIR, filename)
+        if not dataset_exists(csv_path):
+            return JSONResponse(content={"error": "File not found"}, status_code=404)
+        ds = get_dataset(csv_path)
+        params = {
+            "query": query,
+            "col_filters": col_filters,
+            "start_time": start_time,
+            "end_time": end_time,
+            "sort_col": _sort_col,
+            "sort_dir": _sort_dir
+        }
+        snap = view_snapshot(ds, params, page, size, columns=_parse_column_list(columns), parts=parts)
+        if "data" in snap:
+            snap["data"] = snap["data"].to_dicts()
+        return snap
+    except Exception as e:
+        logger.error(f"Error building view snapshot: {e}")
+        traceback.print_exc()
+        return JSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/empty_columns/{filename}")
-async def get_empty_columns(filename: str, query: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, col_filters: Optional[str] = None, selected_ids: Optional[str] = None):
+async def get_empty_columns(filename: str, query: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, col_filters: Optional[str] = None, selected_ids: Optional[str] = None, view_id: Optional[str] = None):
     """
     Identifies completely empty columns (all nulls or empty strings).
     Calculated via Polars lazy evaluation for out-of-core extremely large files.
     Applies current ui filters to ensure accuracy against the active view.
     """
+    return await run_query("empty_columns", _get_empty_columns, filename, query, start_time, end_time, col_filters, selected_ids, view_id=view_id)
+
+
+def _get_empty_columns(filename: str, query: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, col_filters: Optional[str] = None, selected_ids: Optional[str] = None):
     import polars as pl
     import json
     import functools, operator
     try:
         csv_path = os.path.join(OUTPUT_DIR, filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return JSONResponse(content={"error": "File not found"}, status_code=404)
 
         # Scan to get lazy frame
-        try:
-            lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            lf.collect().head(1)
-        except:
-            lf = pl.scan_csv(csv_path, encoding='utf8-lossy', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
+        ds = get_dataset(csv_path)
+        lf = ds.scan()
 
         schema = lf.collect_schema()
-        all_cols = schema.names()
+        all_cols = [c for c in schema.names() if c not in INTERNAL_COLUMNS]
 
         # Parse selected_ids from JSON string if provided
         parsed_selected_ids = []
@@ -517,32 +501,36 @@ async def get_empty_columns(filename: str, query: Optional[str] = None, start_ti
 
         # Apply Unified Processing
         params = {
+            "dataset": ds,
             "query": query,
             "col_filters": col_filters,
             "start_time": start_time,
             "end_time": end_time,
             "selected_ids": parsed_selected_ids
         }
+        # Exclude internal/index columns that always contain data
+        INTERNAL_COLS = {"_id", "No.", "Original_No."}
+
+        if ds.column_stats is not None:
+            # Ingest-time stats settle most columns without reading any rows
+            empty_cols = [c for c in view_empty_columns(ds, params, all_cols) if c not in INTERNAL_COLS]
+            return {"empty_columns": empty_cols}
+
         lf = _apply_standard_processing(lf, params)
 
         # Build lazy expressions to check if every row in a column is null, empty string, or common null indicators
         exprs = []
-        # Common string representations of null/empty in forensics
-        null_regex = r"^(?i)(-+|n/?a|null|none|nan|undefined|unknown|\s*)$"
-
         for c in all_cols:
             exprs.append(
                 (
                     pl.col(c).is_null() |
-                    (pl.col(c).cast(pl.Utf8, strict=False).str.contains(null_regex).fill_null(False))
+                    (pl.col(c).cast(pl.Utf8, strict=False).str.contains(EMPTY_VALUE_REGEX).fill_null(False))
                 ).all().alias(c)
             )
 
         # Collect this single row result
         res = lf.select(exprs).collect(engine="streaming")
 
-        # Exclude internal/index columns that always contain data
-        INTERNAL_COLS = {"_id", "No.", "Original_No."}
         empty_cols = [c for c in all_cols if res[c][0] and c not in INTERNAL_COLS]
 
         return {"empty_columns": empty_cols}
@@ -554,13 +542,18 @@ async def get_empty_columns(filename: str, query: Optional[str] = None, start_ti
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 @app.get("/api/histogram/{filename}")
-async def get_histogram(filename: str, exclude_id: str = None, start_time: str = None, end_time: str = None, query: str = None, col_filters: str = None, selected_ids: str = None):
+async def get_histogram(filename: str, exclude_id: str = None, start_time: str = None, end_time: str = None, query: str = None, col_filters: str = None, selected_ids: str = None, view_id: str = None):
     """
     Get Histogram for FULL file (standard view).
     Supports ?exclude_id=4624 to hide specific EventID.
     Supports time filtering ?start_time=..&end_time=..
     Supports column filters ?col_filters={"EventID":"2050"}
+    Supports ?view_id=<tab id>: a newer chart request of the same tab supersedes this one
     """
+    return await run_query("histogram", _get_histogram, filename, exclude_id, start_time, end_time, query, col_filters, selected_ids, view_id=view_id)
+
+
+def _get_histogram(filename: str, exclude_id: str = None, start_time: str = None, end_time: str = None, query: str = None, col_filters: str = None, selected_ids: str = None):
     try:
         import datetime
         def log_step(msg):
@@ -570,28 +563,25 @@ async def get_histogram(filename: str, exclude_id: str = None, start_time: str =
         log_step(f"get_histogram called with filename: '{filename}'")
 
         csv_path = os.path.join(OUTPUT_DIR, filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             log_step(f"File not found: {csv_path}")
             return JSONResponse(content={"error": "File not found"}, status_code=404)
 
         # Lazy Load Logic
         log_step("Starting Lazy Load Logic")
-        try:
-            df = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            df.collect().head(1)  # Test if it works
-            log_step("scan_csv (strict) succeeded")
-        except:
-            df = pl.scan_csv(csv_path, encoding='utf8-lossy', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            log_step("scan_csv (lossy) succeeded")
-
-        log_step("collecting schema")
-        schema_names = df.collect_schema().names()
-        if "_id" not in schema_names:
-            df = df.with_row_index(name="_id", offset=1)
+        ds = get_dataset(csv_path)
+        df = ds.scan()
+        log_step("get_dataset succeeded")
+
+        if ds.time_cube and is_unfiltered({"query": query, "col_filters": col_filters, "selected_ids": selected_ids}):
+            # Unfiltered / time-window-only chart: pre-aggregated counts, no row scan
+            log_step("Answering from time cube")
+            return analyze_time_cube(ds, start_time=start_time, end_time=end_time)
 
         # Apply Unified Processing
         log_step("Applying _apply_standard_processing")
         params = {
+            "dataset": ds,
             "query": query,
             "col_filters": col_filters,
             "start_time": start_time,
@@ -608,7 +598,8 @@ async def get_histogram(filename: str, exclude_id: str = None, start_time: str =
             log_step(f"Forensic discernment failed for histogram: {e}")
 
         log_step("Calling analyze_dataframe")
-        result = analyze_dataframe(df, start_time=start_time, end_time=end_time)
+        result = analyze_dataframe(df, start_time=start_time, end_time=end_time,
+                                   file_bounds=dataset_file_bounds(ds))
         log_step("analyze_dataframe finished")
         return result
 
@@ -628,6 +619,7 @@ class SubsetRequest(BaseModel):
     col_filters: Any = {}
     start_time: Optional[str] = ""
     end_time: Optional[str] = ""
+    view_id: Optional[str] = None
 
 @app.get("/api/timeseries/{filename}")
 async def get_timeseries(filename: str):
@@ -637,10 +629,10 @@ async def get_timeseries(filename: str):
     """
     try:
         csv_path = os.path.join(OUTPUT_DIR, filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return JSONResponse(content={"error": "File not found"}, status_code=404)
 
-        lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=10000, truncate_ragged_lines=True)
+        lf = scan_dataset(csv_path)
         time_col = get_primary_time_column(lf.collect_schema().names())
 
         # Import and run the timeseries builder skill
@@ -650,7 +642,7 @@ async def get_timeseries(filename: str):
             _sys.path.append(_skill_path)
         from builder import build_chronos_timeseries
 
-        result = await asyncio.to_thread(build_chronos_timeseries, lf, time_col)
+        result = await run_query("timeseries", build_chronos_timeseries, lf, time_col)
         return result
     except Exception as e:
         logger.error(f"Timeseries error: {e}")
@@ -663,21 +655,23 @@ async def get_histogram_subset(req: SubsetRequest):
     Generate histogram for ONLY the selected rows.
     Loads and sorts data the same way as get_data to ensure _id alignment.
     """
+    return await run_query("histogram", _get_histogram_subset, req, view_id=req.view_id)
+
+
+def _get_histogram_subset(req: SubsetRequest):
     try:
         csv_path = os.path.join(OUTPUT_DIR, req.filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return {"error": "File not found"}
 
-        # Load CSV
-        try:
-            lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-        except:
-            lf = pl.scan_csv(csv_path, encoding='utf8-lossy', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
+        ds = get_dataset(csv_path)
+        lf = ds.scan()
 
         schema = lf.collect_schema()
 
         # Apply Unified Processing (all active filters + selected rows)
         params = {
+            "dataset": ds,
             "query": req.query,
             "col_filters": req.col_filters,
             "start_time": req.start_time,
@@ -726,6 +720,15 @@ async def get_histogram_subset(req: SubsetRequest):
         return {"error": str(e)}
 
 
+def _export_dataset_csv(path: str, dest: str) -> None:
+    """Write a processed dataset (Parquet store behind its .csv handle) to dest as
+    the CSV the handle names: _id plus the ingested columns, all as text."""
+    lf = drop_internal_columns(get_dataset(path).scan())
+    lf = lf.with_columns([pl.col(c).cast(pl.Utf8) for c, dtype in lf.collect_schema().items()
+                          if dtype not in (pl.Utf8, pl.String)])
+    lf.sink_csv(dest, quote_style="necessary")
+
+
 @app.get("/download/{filename}")
 async def download_file(filename: str, background_tasks: BackgroundTasks):
     file_path = os.path.join(OUTPUT_DIR, filename)
@@ -735,6 +738,15 @@ async def download_file(filename: str, background_tasks: BackgroundTasks):
         if filename.startswith(EXPORT_PREFIXES):
             background_tasks.add_task(delete_file, file_path)
         return FileResponse(file_path, filename=filename, media_type='application/octet-stream')
+    if filename.lower().endswith(".csv") and dataset_exists(file_path):
+        # Processed datasets are stored as Parquet: export the CSV on demand
+        tmp_path = os.path.join(OUTPUT_DIR, f"Download_{int(time.time() * 1000)}_{filename}")
+        try:
+            await run_query("export", _export_dataset_csv, file_path, tmp_path)
+        except FileNotFoundError:
+            return JSONResponse(content={"error": "File not found"}, status_code=404)
+        background_tasks.add_task(delete_file, tmp_path)
+        return FileResponse(tmp_path, filename=filename, media_type='application/octet-stream')
     return JSONResponse(content={"error": "File not found"}, status_code=404)
 
 class FilterModel(BaseModel):
@@ -786,6 +798,33 @@ def delete_file(path: str):
     except Exception as e:
         logger.error(f"Error in background cleanup of {path}: {e}")
 
+def _report_frames(csv_path: str, request: ReportRequest) -> tuple:
+    """Filtered view of the report's dataset (blocking): (df, df_p), df_p with
+    its time columns parsed for the sub-analyzers."""
+    ds = get_dataset(csv_path)
+    params = {
+        "dataset": ds,
+        "query": request.query,
+        "col_filters": request.col_filters,
+        "start_time": request.start_time,
+        "end_time": request.end_time,
+        "sort_col": request.sort_col,
+        "sort_dir": request.sort_dir,
+        "selected_ids": request.selected_ids
+    }
+    lf = _apply_standard_processing(ds.scan(), params)
+    df = collect(drop_internal_columns(normalize_time_columns_in_df(lf)))
+
+    # Pre-process time columns
+    df_p = df.clone()
+    for col in TIME_HIERARCHY:
+        if col in df_p.columns:
+            try:
+                df_p = df_p.with_columns(pl.col(col).str.to_datetime(strict=False))
+            except: pass
+    return df, df_p
+
+
 @app.post("/api/forensic_report")
 async def forensic_report(request: ReportRequest):
     import polars as pl
@@ -795,30 +834,10 @@ async def forensic_report(request: ReportRequest):
 
     try:
         csv_path = os.path.join(OUTPUT_DIR, request.filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return JSONResponse(content={"error": "File not found"}, status_code=404)
 
-        lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-
-        # Assign stable row IDs — drop existing _id first to avoid collision
-        try:
-            lf = lf.drop("_id").with_row_index(name="_id", offset=1)
-        except Exception:
-            lf = lf.with_row_index(name="_id", offset=1)
-
-        # Apply Unified Processing
-        params = {
-            "query": request.query,
-            "col_filters": request.col_filters,
-            "start_time": request.start_time,
-            "end_time": request.end_time,
-            "sort_col": request.sort_col,
-            "sort_dir": request.sort_dir,
-            "selected_ids": request.selected_ids
-        }
-        lf = _apply_standard_processing(lf, params)
-
-        df = lf.collect()
+        df, df_p = await run_query("report", _report_frames, csv_path, request)
 
         # --- CHRONOS MASTER ANALYZER (Parallel Execution) ---
         from engine.forensic import (sub_analyze_timeline, sub_analyze_context,
@@ -828,14 +847,6 @@ async def forensic_report(request: ReportRequest):
         import asyncio
         start_p = time.perf_counter()
 
-        # Pre-process time columns
-        df_p = df.clone()
-        for col in TIME_HIERARCHY:
-            if col in df_p.columns:
-                try:
-                    df_p = df_p.with_columns(pl.col(col).str.to_datetime(strict=False))
-                except: pass
-
         from engine.sigma_engine import match_sigma_rules, load_sigma_rules
 
         # YARA scan helper — best-effort, first 5MB of CSV text
@@ -844,8 +855,7 @@ async def forensic_report(request: ReportRequest):
             if yara_rules is None:
                 return []
             try:
-                with open(file_path, "r", errors="replace") as f:
-                    text = f.read(5 * 1024 * 1024)
+                text = read_text_sample(file_path)
                 matches = yara_rules.match(data=text)
                 return [{
                     "rule": m.rule,
@@ -859,15 +869,15 @@ async def forensic_report(request: ReportRequest):
                 return []
 
         tasks = [
-            asyncio.to_thread(sub_analyze_timeline, df_p),       # 0
-            asyncio.to_thread(sub_analyze_context, df_p),         # 1
-            asyncio.to_thread(sub_analyze_hunting, df_p),         # 2
-            asyncio.to_thread(sub_analyze_identity_and_procs, df_p),  # 3
-            asyncio.to_thread(match_sigma_rules, df_p, load_sigma_rules()),  # 4
-            asyncio.to_thread(correlate_cross_source, df_p),      # 5
-            asyncio.to_thread(group_sessions, df_p),              # 6
-            asyncio.to_thread(detect_execution_artifacts, df_p),  # 7
-            asyncio.to_thread(_yara_scan_for_report, csv_path),   # 8
+            run_query("report", sub_analyze_timeline, df_p),       # 0
+            run_query("report", sub_analyze_context, df_p),         # 1
+            run_query("report", sub_analyze_hunting, df_p),         # 2
+            run_query("report", sub_analyze_identity_and_procs, df_p),  # 3
+            run_query("report", match_sigma_rules, df_p, load_sigma_rules()),  # 4
+            run_query("report", correlate_cross_source, df_p),      # 5
+            run_query("report", group_sessions, df_p),              # 6
+            run_query("report", detect_execution_artifacts, df_p),  # 7
+            run_query("report", _yara_scan_for_report, csv_path),   # 8
         ]
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -960,105 +970,15 @@ async def forensic_report(request: ReportRequest):
         logger.info(f"Forensic Report generated in {end_p - start_p:.2f}s for {df.height} records | Sigma hits: {len(sigma_hits_result)} | YARA hits: {len(yara_hits_result)} | Correlations: {correlation_result.get('total_correlated', 0)} | Sessions: {len(session_result)} | Artifacts: {len(exec_artifacts_result.get('artifact_types_detected', []))}")
 
         # --- Derive dashboard card values from data ---
-        cols = df.columns
-
-        # Top Tactic: use Tactic col, else CommandLine most common, else first text col
-        top_tactic = "N/A"
-        # WAF columns first, then Windows event columns
-        _bad_values = {
-            "-", "null", "none", "n/a", "", "nan", "undefined",
-            "macos_unified_log", "macos_persistence_info", "macos_bulk_plist",
-            "volatility_ram_process", "macos_plist_item", "unknown"
-        }
-        for tac_col in ["ViolationCategory", "ViolationType", "Protection", "Title", "Tactic", "EventID", "Provider", "Channel"]:
-            if tac_col in cols:
-                try:
-                    vc = (df.select(pl.col(tac_col).cast(pl.Utf8, strict=False))
-                          .to_series()
-                          .drop_nulls()
-                          .filter(~pl.Series(
-                              [str(v).strip().lower() in _bad_values
-                               for v in df.select(pl.col(tac_col).cast(pl.Utf8, strict=False)).to_series().drop_nulls().to_list()]
-                          ))
-                          .value_counts(sort=True))
-                    if len(vc) > 0:
-                        val = str(vc[0, tac_col]).strip()
-                        if val.lower() not in _bad_values:
-                            # If value is numeric, label it as Windows EventID
-                            if val.isdigit():
-                                try:
-                                    from engine.forensic import SYSMON_EVENT_LABELS
-                                    _elabel = SYSMON_EVENT_LABELS.get(val, "Windows Event")
-                                    top_tactic = f"Win EventID {val}: {_elabel}"
-                                except:
-                                    top_tactic = f"Win EventID {val}"
-                            else:
-                                top_tactic = val
-                except: pass
-                if top_tactic != "N/A":
-                    break
-
-        # Primary Identity: Check Context Data explicitly to unify mappings
-        primary_identity = "N/A"
-        try:
-            # results[1] is the sub_analyze_context dictionary
-            context_data = results[1] if isinstance(results[1], dict) else {}
-            if context_data.get("users"):
-                primary_identity = context_data["users"][0].get("id", "N/A")
-            elif context_data.get("ips"):
-                primary_identity = context_data["ips"][0].get("id", "N/A")
-        except:
-             pass
-
-        if primary_identity == "N/A":
-             for id_col in ["User", "ProcessUser", "SubjectUserName", "AccountName", "UserName", "primary_user"]:
-                 if id_col in cols:
-                     try:
-                         vc = df.select(pl.col(id_col).drop_nulls().filter(pl.col(id_col) != "-")).to_series().value_counts(sort=True)
-                         if len(vc) > 0:
-                             primary_identity = str(vc[0, id_col])
-                     except: pass
-                     break
-
-        # Risk Level: compute using Smart Risk Engine M4 (with Sigma hits from parallel run)
-        risk_score = 0
-        risk_justify = []
-        try:
-            from engine.forensic import calculate_smart_risk_m4
-            risk_assessment = calculate_smart_risk_m4(df_parsed=df, sigma_hits=sigma_hits_result)
-            risk_level = risk_assessment.get("Risk_Level", "Low")
-            risk_score = risk_assessment.get("Risk_Score", 0)
-            risk_justify = risk_assessment.get("Justification_Log", [])
-        except Exception as e:
-            logger.warning(f"Error calculating smart risk level: {e}")
-            risk_level = "Low"
-
-        # EPS: events per second
-        eps = 0
-        try:
-            from engine.forensic import get_primary_time_column
-            time_col = get_primary_time_column(cols)
-            if time_col:
-                _ts = (df[time_col]
-                       .cast(pl.Utf8, strict=False)
-                       .str.to_datetime(strict=False)
-                       .drop_nulls())
-                if len(_ts) > 1:
-                    span = (_ts.max() - _ts.min()).total_seconds()
-                    if span > 0:
-                        eps = round(df.height / span, 4)
-        except: pass
+        # results[1] is the sub_analyze_context dictionary
+        cards = await run_query("report", _report_cards, df,
+                                results[1] if isinstance(results[1], dict) else {}, sigma_hits_result)
 
         return {
             "total_records": df.height,
             "results": formatted_results,
             "filename": request.filename,
-            "top_tactic": top_tactic,
-            "primary_identity": primary_identity,
-            "risk_level": risk_level,
-            "risk_score": risk_score,
-            "risk_justify": risk_justify,
-            "eps": eps,
+            **cards,
             "sigma_hits": sigma_hits_result[:60],
             "sigma_total": len(sigma_hits_result),
             "sigma_truncated": len(sigma_hits_result) > 60,
@@ -1079,6 +999,100 @@ async def forensic_report(request: ReportRequest):
 
 # --- Threat Intelligence Enrichment Endpoints ---
 
+def _report_cards(df: pl.DataFrame, context_data: dict, sigma_hits: list) -> dict:
+    """Dashboard card values of the report (blocking): top tactic, primary
+    identity, Smart Risk and EPS of the filtered view."""
+    cols = df.columns
+
+    # Top Tactic: use Tactic col, else CommandLine most common, else first text col
+    top_tactic = "N/A"
+    # WAF columns first, then Windows event columns
+    _bad_values = {
+        "-", "null", "none", "n/a", "", "nan", "undefined",
+        "macos_unified_log", "macos_persistence_info", "macos_bulk_plist",
+        "volatility_ram_process", "macos_plist_item", "unknown"
+    }
+    for tac_col in ["ViolationCategory", "ViolationType", "Protection", "Title", "Tactic", "EventID", "Provider", "Channel"]:
+        if tac_col in cols:
+            try:
+                vc = (df.select(pl.col(tac_col).cast(pl.Utf8, strict=False))
+                      .to_series()
+                      .drop_nulls()
+                      .filter(~pl.Series(
+                          [str(v).strip().lower() in _bad_values
+                           for v in df.select(pl.col(tac_col).cast(pl.Utf8, strict=False)).to_series().drop_nulls().to_list()]
+                      ))
+                      .value_counts(sort=True))
+                if len(vc) > 0:
+                    val = str(vc[0, tac_col]).strip()
+                    if val.lower() not in _bad_values:
+                        # If value is numeric, label it as Windows EventID
+                        if val.isdigit():
+                            try:
+                                from engine.forensic import SYSMON_EVENT_LABELS
+                                _elabel = SYSMON_EVENT_LABELS.get(val, "Windows Event")
+                                top_tactic = f"Win EventID {val}: {_elabel}"
+                            except:
+                                top_tactic = f"Win EventID {val}"
+                        else:
+                            top_tactic = val
+            except: pass
+            if top_tactic != "N/A":
+                break
+
+    # Primary Identity: Check Context Data explicitly to unify mappings
+    primary_identity = "N/A"
+    try:
+        if context_data.get("users"):
+            primary_identity = context_data["users"][0].get("id", "N/A")
+        elif context_data.get("ips"):
+            primary_identity = context_data["ips"][0].get("id", "N/A")
+    except:
+         pass
+
+    if primary_identity == "N/A":
+         for id_col in ["User", "ProcessUser", "SubjectUserName", "AccountName", "UserName", "primary_user"]:
+             if id_col in cols:
+                 try:
+                     vc = df.select(pl.col(id_col).drop_nulls().filter(pl.col(id_col) != "-")).to_series().value_counts(sort=True)
+                     if len(vc) > 0:
+                         primary_identity = str(vc[0, id_col])
+                 except: pass
+                 break
+
+    # Risk Level: compute using Smart Risk Engine M4 (with Sigma hits from parallel run)
+    risk_score = 0
+    risk_justify = []
+    try:
+        from engine.forensic import calculate_smart_risk_m4
+        risk_assessment = calculate_smart_risk_m4(df_parsed=df, sigma_hits=sigma_hits)
+        risk_level = risk_assessment.get("Risk_Level", "Low")
+        risk_score = risk_assessment.get("Risk_Score", 0)
+        risk_justify = risk_assessment.get("Justification_Log", [])
+    except Exception as e:
+        logger.warning(f"Error calculating smart risk level: {e}")
+        risk_level = "Low"
+
+    # EPS: events per second
+    eps = 0
+    try:
+        from engine.forensic import get_primary_time_column
+        time_col = get_primary_time_column(cols)
+        if time_col:
+            _ts = (df[time_col]
+                   .cast(pl.Utf8, strict=False)
+                   .str.to_datetime(strict=False)
+                   .drop_nulls())
+            if len(_ts) > 1:
+                span = (_ts.max() - _ts.min()).total_seconds()
+                if span > 0:
+                    eps = round(df.height / span, 4)
+    except: pass
+
+    return {"top_tactic": top_tactic, "primary_identity": primary_identity, "risk_level": risk_level,
+            "risk_score": risk_score, "risk_justify": risk_justify, "eps": eps}
+
+
 @app.get("/api/enrichment/config")
 async def enrichment_config():
     """Return which enrichment providers are configured and cache stats."""
@@ -1119,6 +1133,10 @@ async def enrichment_lookup(request: IOCLookupRequest):
 
 @app.post("/api/export_filtered")
 async def export_filtered(request: ExportRequest, background_tasks: BackgroundTasks):
+    return await run_query("export", _export_filtered, request, background_tasks)
+
+
+def _export_filtered(request: ExportRequest, background_tasks: BackgroundTasks):
     import polars as pl
     import os
     import time
@@ -1129,22 +1147,15 @@ async def export_filtered(request: ExportRequest, background_tasks: BackgroundTa
 
     try:
         csv_path = os.path.join(OUTPUT_DIR, request.filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return JSONResponse(content={"error": "Source file not found"}, status_code=404)
 
-        try:
-            lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            lf.collect().head(1)
-        except:
-            lf = pl.scan_csv(csv_path, encoding='utf8-lossy', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-
-        # Assign stable row IDs BEFORE filtering if they don't exist
-        schema = lf.collect_schema()
-        if "_id" not in schema.names():
-            lf = lf.with_row_index(name="_id", offset=1)
+        ds = get_dataset(csv_path)
+        lf = ds.scan()
 
         # Apply Unified Processing
         params = {
+            "dataset": ds,
             "query": request.query,
             "col_filters": request.col_filters,
             "start_time": request.start_time,
@@ -1161,7 +1172,7 @@ async def export_filtered(request: ExportRequest, background_tasks: BackgroundTa
              lf = lf.drop("_id").with_row_index(name="_id", offset=1)
 
         # --- 5. FORMAT AND SELECT COLUMNS ---
-        lf = normalize_time_columns_in_df(lf)
+        lf = drop_internal_columns(normalize_time_columns_in_df(lf))
 
         # Prepare schemas
         schema_final = lf.collect_schema()
@@ -1237,8 +1248,7 @@ async def export_filtered(request: ExportRequest, background_tasks: BackgroundTa
                 try:
                     yara_rules = _load_yara_rules()
                     if yara_rules:
-                        with open(csv_path, "r", errors="replace") as yf:
-                            yara_text = yf.read(5 * 1024 * 1024)
+                        yara_text = read_text_sample(csv_path)
                         yara_matches = yara_rules.match(data=yara_text)
                         yara_context_hits = [{
                             "rule": m.rule, "namespace": m.namespace,
@@ -1402,32 +1412,42 @@ async def export_filtered(request: ExportRequest, background_tasks: BackgroundTa
 async def export_html(request: ExportRequest, background_tasks: BackgroundTasks):
     """
     Generate a standalone HTML forensic report.
+    The analysis and the rendering run on the query executor; only the IOC
+    enrichment (network lookups) is awaited on the event loop in between.
     """
+    try:
+        report = await run_query("export", _export_html_data, request)
+        if isinstance(report, JSONResponse):
+            return report
+        enrichment, coverage = await _export_html_enrichment(*report.pop("enrichment_input"))
+        report.update(enrichment_json=json.dumps(enrichment), enrichment_coverage_json=json.dumps(coverage))
+        return await run_query("export", _write_export_html, report)
+    except Exception as e:
+        logger.error(f"HTML Export error: {e}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+
+def _export_html_data(request: ExportRequest):
+    """Filtered-view analysis behind the HTML report (blocking): the template
+    fields plus the enrichment inputs, or a JSONResponse on error."""
     import polars as pl
     import os
-    import time
     from fastapi.responses import JSONResponse
     from datetime import datetime
 
     try:
         csv_path = os.path.join(OUTPUT_DIR, request.filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return JSONResponse(content={"error": "Source file not found"}, status_code=404)
 
-        try:
-            lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            lf.collect().head(1)
-        except:
-            lf = pl.scan_csv(csv_path, encoding='utf8-lossy', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
+        ds = get_dataset(csv_path)
+        lf = ds.scan()
 
         # Apply Filters (Same as export_filtered)
-        schema = lf.collect_schema()
-
-        # Assign stable row IDs BEFORE filtering if they don't exist
-        if "_id" not in schema.names():
-            lf = lf.with_row_index(name="_id", offset=1)
-
         params = {
+            "dataset": ds,
             "query": request.query,
             "col_filters": request.col_filters,
             "start_time": request.start_time,
@@ -1443,7 +1463,7 @@ async def export_html(request: ExportRequest, background_tasks: BackgroundTasks)
         chart_data = analyze_dataframe(lf, target_bars=50)
 
         # Get Full Count (Filtered)
-        df_full = lf.collect()
+        df_full = drop_internal_columns(lf).collect()
         total_filtered = df_full.height
         all_cols = df_full.columns
 
@@ -1599,34 +1619,7 @@ async def export_html(request: ExportRequest, background_tasks: BackgroundTasks)
             except:
                 top_tactic_report = f"Win EventID {top_tactic_report}"
 
-        import json
-
-        # --- Enrichment phase for export parity ---
-        export_enrichment = {}
-        export_coverage = {"total_iocs": 0, "analyzed": 0, "pending": 0, "by_type": {}, "providers_used": []}
-        try:
-            from engine.enrichment import deduplicate_iocs, enrich_all_iocs, load_api_keys, extract_hashes_from_sigma
-            _api_keys = load_api_keys()
-            _iocs = deduplicate_iocs(context_data, hunt_data=hunting_data)
-            _sigma_hashes = extract_hashes_from_sigma(_sigma_hits_html)
-            _iocs["hashes"] = _iocs.get("hashes", set()) | _sigma_hashes
-            if any(_iocs.values()):
-                export_enrichment = await asyncio.wait_for(
-                    enrich_all_iocs(_iocs, _api_keys), timeout=30.0
-                )
-                _total = sum(len(v) for v in _iocs.values())
-                _enriched = export_enrichment.get("total_enriched", 0)
-                export_coverage = {
-                    "total_iocs": _total, "analyzed": _enriched,
-                    "pending": max(0, _total - _enriched),
-                    "by_type": {t: {"found": len(_iocs.get(t, set())), "enriched": len(export_enrichment.get(f"{t[:-1]}_enrichment" if t.endswith("s") else f"{t}_enrichment", []))} for t in ["ips", "domains", "hashes"]},
-                    "providers_used": export_enrichment.get("providers_used", []),
-                }
-        except Exception as _enr_e:
-            logger.debug(f"Export enrichment skipped: {_enr_e}")
-
-        # Render Template
-        rendered_html = templates.get_template("static_report.html").render(
+        return dict(
             timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             filename=request.original_filename or request.filename,
             total_events=total_filtered,
@@ -1645,24 +1638,56 @@ async def export_html(request: ExportRequest, background_tasks: BackgroundTasks)
             threat_actors_json=json.dumps(threat_actors),
             sigma_hits_json=json.dumps(_sigma_hits_html[:60]),
             sigma_truncation_note=f"Showing top 60 of {len(_sigma_hits_html)} total detections. Export as JSON/CSV for complete dataset." if len(_sigma_hits_html) > 60 else "",
-            enrichment_json=json.dumps(export_enrichment),
-            enrichment_coverage_json=json.dumps(export_coverage),
+            enrichment_input=(context_data, hunting_data, _sigma_hits_html),
         )
 
-        # Save to temp file
-        report_filename = f"Report_{int(time.time())}.html"
-        report_path = os.path.join(OUTPUT_DIR, report_filename)
-        with open(report_path, "w", encoding="utf-8") as f:
-            f.write(rendered_html)
-
-        return JSONResponse(content={"download_url": f"/download/{report_filename}", "filename": report_filename})
-
     except Exception as e:
         logger.error(f"HTML Export error: {e}")
         import traceback
         traceback.print_exc()
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
+
+async def _export_html_enrichment(context_data: dict, hunting_data: dict, sigma_hits: list) -> tuple:
+    """Threat-intel enrichment of the report's IOCs, for export parity with the
+    UI: (enrichment, coverage). Best effort, at most 30 s."""
+    export_enrichment = {}
+    export_coverage = {"total_iocs": 0, "analyzed": 0, "pending": 0, "by_type": {}, "providers_used": []}
+    try:
+        from engine.enrichment import deduplicate_iocs, enrich_all_iocs, load_api_keys, extract_hashes_from_sigma
+        _api_keys = load_api_keys()
+        _iocs = deduplicate_iocs(context_data, hunt_data=hunting_data)
+        _sigma_hashes = extract_hashes_from_sigma(sigma_hits)
+        _iocs["hashes"] = _iocs.get("hashes", set()) | _sigma_hashes
+        if any(_iocs.values()):
+            export_enrichment = await asyncio.wait_for(
+                enrich_all_iocs(_iocs, _api_keys), timeout=30.0
+            )
+            _total = sum(len(v) for v in _iocs.values())
+            _enriched = export_enrichment.get("total_enriched", 0)
+            export_coverage = {
+                "total_iocs": _total, "analyzed": _enriched,
+                "pending": max(0, _total - _enriched),
+                "by_type": {t: {"found": len(_iocs.get(t, set())), "enriched": len(export_enrichment.get(f"{t[:-1]}_enrichment" if t.endswith("s") else f"{t}_enrichment", []))} for t in ["ips", "domains", "hashes"]},
+                "providers_used": export_enrichment.get("providers_used", []),
+            }
+    except Exception as _enr_e:
+        logger.debug(f"Export enrichment skipped: {_enr_e}")
+
+    return export_enrichment, export_coverage
+
+
+def _write_export_html(report: dict) -> JSONResponse:
+    """Render static_report.html with the report fields and save it for /download."""
+    import time
+    rendered_html = templates.get_template("static_report.html").render(**report)
+    report_filename = f"Report_{int(time.time())}.html"
+    report_path = os.path.join(OUTPUT_DIR, report_filename)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(rendered_html)
+    return JSONResponse(content={"download_url": f"/download/{report_filename}", "filename": report_filename})
+
+
 @app.post("/api/export/forensic-summary")
 async def export_forensic_summary(request: Request):
     """Generate a formatted XLSX forensic summary report from context modal data — ALL sections."""
@@ -2097,6 +2122,10 @@ async def export_pdf(request: ExportRequest, background_tasks: BackgroundTasks):
 
 @app.post("/api/export/split-zip")
 async def export_split_zip(request: ExportRequest, background_tasks: BackgroundTasks):
+    return await run_query("export", _export_split_zip, request, background_tasks)
+
+
+def _export_split_zip(request: ExportRequest, background_tasks: BackgroundTasks):
     import polars as pl
     import zipfile
     import time
@@ -2105,21 +2134,15 @@ async def export_split_zip(request: ExportRequest, background_tasks: BackgroundT
 
     try:
         csv_path = os.path.join(OUTPUT_DIR, request.filename)
-        if not os.path.exists(csv_path):
+        if not dataset_exists(csv_path):
             return JSONResponse(content={"error": "Source file not found"}, status_code=404)
 
-        try:
-            lf = pl.scan_csv(csv_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            lf.collect().head(1)
-        except:
-            lf = pl.scan_csv(csv_path, encoding='utf8-lossy', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-
-        # Assign stable row IDs BEFORE filtering if they don't exist
-        if "_id" not in lf.collect_schema().names():
-            lf = lf.with_row_index(name="_id", offset=1)
+        ds = get_dataset(csv_path)
+        lf = ds.scan()
 
         # Apply Unified Processing
         params = {
+            "dataset": ds,
             "query": request.query,
             "col_filters": request.col_filters,
             "start_time": request.start_time,
@@ -2135,7 +2158,7 @@ async def export_split_zip(request: ExportRequest, background_tasks: BackgroundT
              lf = lf.drop("_id").with_row_index(name="_id", offset=1)
 
         # Final Formatting
-        lf = normalize_time_columns_in_df(lf)
+        lf = drop_internal_columns(normalize_time_columns_in_df(lf))
 
         # Prepare schemas and column renaming
         all_cols_split = lf.collect_schema().names()
@@ -2273,12 +2296,11 @@ async def yara_scan(filename: str):
     if rules is None:
         return JSONResponse(content={"error": "YARA rules not available"}, status_code=501)
     csv_path = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(csv_path):
+    if not dataset_exists(csv_path):
         return JSONResponse(content={"error": "File not found"}, status_code=404)
     try:
         def _scan():
-            with open(csv_path, "r", errors="replace") as f:
-                text = f.read(5 * 1024 * 1024)  # Scan first 5MB
+            text = read_text_sample(csv_path)  # Scan first 5MB
             matches = rules.match(data=text)
             return [{
                 "rule": m.rule,
@@ -6,7 +6,12 @@ import logging
 import traceback
 import re
 import polars as pl
-from engine.forensic import TIME_HIERARCHY, get_primary_time_column
+from engine.forensic import (
+    TIME_HIERARCHY, TS_COL, get_primary_time_column, parse_time_boundary,
+    calculate_smart_risk_m4,
+)
+from engine.time_cube import BASE_BUCKET_US, cube_columns, cube_window
+from engine.query_executor import collect
 
 logger = logging.getLogger("Chronos-DFIR")
 
@@ -104,6 +109,14 @@ _EVENTID_CANDIDATES = [
     "EventID", "EventId", "Event_ID", "WinEventID", "eventid", "event_id",
 ]
 
+# Fallback columns for Top Events when EventID has low cardinality.
+# Task is LAST because it often contains numeric category IDs (100, 101) not meaningful labels
+_EVENT_FALLBACK_CANDIDATES = [
+    "Provider", "Channel", "Keywords", "Description", "Level", "Status",
+    "TargetUserName", "SubjectUserName", "LogonType", "User", "Computer",
+    "Opcode", "Task",
+]
+
 # Process column candidates (ordered by preference)
 _PROCESS_CANDIDATES = [
     "ProcessName", "Image", "Process", "NewProcessName", "ParentImage",
@@ -111,20 +124,41 @@ _PROCESS_CANDIDATES = [
 ]
 
 
-def _compute_top_distribution(lf, col_name, top_n=10, filter_numeric=False,
+def _lazy_value_counts(lf):
+    """Value-count provider over a LazyFrame: value_counts(col) returns a
+    DataFrame[_val (Utf8), count] for col, or None when col is absent.
+    Counts are memoized per column."""
+    names = set(lf.collect_schema().names())
+    memo = {}
+
+    def value_counts(col):
+        if col not in names:
+            return None
+        if col not in memo:
+            # Group on the stored values (Categorical codes when dictionary-encoded)
+            # and render only the distinct ones as text
+            memo[col] = collect(lf
+                                .group_by(pl.col(col).alias("_val"))
+                                .agg(pl.len().alias("count"))
+                                .with_columns(pl.col("_val").cast(pl.Utf8, strict=False)))
+        return memo[col]
+    return value_counts
+
+
+def _non_blank(vc):
+    return vc.filter(pl.col("_val").is_not_null() & (pl.col("_val").str.strip_chars() != ""))
+
+
+def _compute_top_distribution(value_counts, col_name, top_n=10, filter_numeric=False,
                               enrich_event_ids=False, total_rows=0):
     """Compute top-N distribution for a column. Returns {labels, values, stats} or None."""
     try:
-        schema_names = lf.collect_schema().names()
-        if col_name not in schema_names:
+        vc = value_counts(col_name)
+        if vc is None:
             return None
-        df = (lf
-              .select(pl.col(col_name).cast(pl.Utf8, strict=False).alias("_val"))
-              .filter(pl.col("_val").is_not_null() & (pl.col("_val").str.strip_chars() != ""))
-              .group_by("_val").agg(pl.len().alias("count"))
+        df = (_non_blank(vc)
               .sort("count", descending=True)
-              .head(top_n * 3)
-              .collect())
+              .head(top_n * 3))
         if df.is_empty():
             return None
         labels, values = [], []
@@ -161,7 +195,7 @@ def _compute_top_distribution(lf, col_name, top_n=10, filter_numeric=False,
         return None
 
 
-def _pick_best_column(lf, candidates, schema_names, min_unique=2, skip_mostly_numeric=False):
+def _pick_best_column(value_counts, candidates, schema_names, min_unique=2, skip_mostly_numeric=False):
     """Pick the candidate column with highest useful cardinality (>= min_unique).
     If skip_mostly_numeric=True, reject columns where >80% of values are pure numbers (1-5 digits)."""
     best_col, best_count = None, 0
@@ -169,17 +203,16 @@ def _pick_best_column(lf, candidates, schema_names, min_unique=2, skip_mostly_nu
         if c not in schema_names:
             continue
         try:
-            col_df = (lf.select(pl.col(c).cast(pl.Utf8, strict=False))
-                      .filter(pl.col(c).is_not_null() & (pl.col(c).str.strip_chars() != ""))
-                      .collect())
-            unique_count = col_df[c].n_unique()
+            vc = value_counts(c)
+            if vc is None:
+                continue
+            vals = _non_blank(vc)
+            unique_count = vals.height
             if unique_count < min_unique:
                 continue
-            if skip_mostly_numeric and len(col_df) > 0:
-                numeric_count = col_df.filter(
-                    pl.col(c).str.contains(r"^\d{1,5}$")
-                ).height
-                if numeric_count / len(col_df) > 0.8:
+            if skip_mostly_numeric and unique_count > 0:
+                numeric_count = vals.filter(pl.col("_val").str.contains(r"^\d{1,5}$"))["count"].sum()
+                if numeric_count / vals["count"].sum() > 0.8:
                     continue
             if unique_count > best_count:
                 best_col, best_count = c, unique_count
@@ -188,7 +221,7 @@ def _pick_best_column(lf, candidates, schema_names, min_unique=2, skip_mostly_nu
     return best_col
 
 
-def _detect_columns(cols, lf=None):
+def _detect_columns(cols, lf=None, value_counts=None):
     """Detect standard forensic columns. If lf provided, validates cardinality."""
     detected = {}
     detected["level"] = next((c for c in cols if c.lower() in [
@@ -196,11 +229,12 @@ def _detect_columns(cols, lf=None):
 
     if lf is not None:
         schema_names = set(lf.collect_schema().names())
+        value_counts = value_counts or _lazy_value_counts(lf)
         # Use cardinality-based selection for all multi-candidate columns
-        detected["eventid"] = _pick_best_column(lf, _EVENTID_CANDIDATES, schema_names, min_unique=1)
-        detected["process"] = _pick_best_column(lf, _PROCESS_CANDIDATES, schema_names, min_unique=1)
-        detected["category"] = _pick_best_column(lf, _CATEGORY_CANDIDATES, schema_names, min_unique=2)
-        detected["source"] = _pick_best_column(lf, _SOURCE_CANDIDATES, schema_names, min_unique=2)
+        detected["eventid"] = _pick_best_column(value_counts, _EVENTID_CANDIDATES, schema_names, min_unique=1)
+        detected["process"] = _pick_best_column(value_counts, _PROCESS_CANDIDATES, schema_names, min_unique=1)
+        detected["category"] = _pick_best_column(value_counts, _CATEGORY_CANDIDATES, schema_names, min_unique=2)
+        detected["source"] = _pick_best_column(value_counts, _SOURCE_CANDIDATES, schema_names, min_unique=2)
     else:
         detected["eventid"] = next((c for c in cols if c.lower() in [
             'eventid', 'event_id', 'wineventid']), None)
@@ -224,8 +258,9 @@ def _compute_non_temporal(df_source, cols, detected):
     except Exception:
         total = 0
 
-    distributions = _compute_distributions(lf, cols, detected, labels=None, bucketed_df=None,
-                                           bucket=None, total_rows=total)
+    distributions = _compute_distributions(_lazy_value_counts(lf), lf.collect_schema().names(), cols,
+                                           detected, total_rows=total,
+                                           smart_risk=lambda: calculate_smart_risk_m4(lf))
 
     return {
         "labels": [], "datasets": [],
@@ -236,9 +271,27 @@ def _compute_non_temporal(df_source, cols, detected):
     }
 
 
-def _compute_distributions(lf, cols, detected, labels=None, bucketed_df=None, bucket=None,
-                           total_rows=0):
-    """Compute all distribution charts from a LazyFrame."""
+def _generic_top(value_counts, cols, schema_names, total_rows=0):
+    """First column (in schema order) with a useful Top-N: (column, distribution) or (None, None)."""
+    for c in cols:
+        if c.startswith("_") or c.lower() in {"no.", "no", "row_number"}:
+            continue
+        if c in schema_names:
+            top = _compute_top_distribution(value_counts, c, top_n=10, filter_numeric=True,
+                                            total_rows=total_rows)
+            if top and len(top["labels"]) >= 3:
+                return c, top
+    return None, None
+
+
+def _compute_distributions(value_counts, schema_names, cols, detected, labels=None,
+                           level_buckets=None, total_rows=0, smart_risk=None):
+    """
+    Compute all distribution charts from value counts.
+    value_counts(col) -> DataFrame[_val, count] (see _lazy_value_counts);
+    level_buckets(col) -> DataFrame[_bucket, _val, cnt] per timeline bucket, for
+    Severity Over Time; smart_risk() -> Smart Risk widget dict.
+    """
     distributions = {}
     eventid_col = detected.get("eventid")
     proc_col = detected.get("process")
@@ -246,23 +299,16 @@ def _compute_distributions(lf, cols, detected, labels=None, bucketed_df=None, bu
     category_col = detected.get("category")
     source_col = detected.get("source")
 
-    schema_names = lf.collect_schema().names()
-
-    # Get total rows for coverage stats
-    if total_rows <= 0:
-        try:
-            total_rows = lf.select(pl.len()).collect().item()
-        except Exception:
-            total_rows = 0
-
     def _doughnut_distribution(col, key, column_key=None):
         """Compute doughnut distribution with stats metadata."""
         if not col or col not in schema_names:
             return
         try:
-            cat_counts = lf.group_by(col).agg(pl.len().alias("count")).collect()
+            cat_counts = value_counts(col)
+            if cat_counts is None:
+                return
             raw = dict(zip(
-                cat_counts[col].cast(pl.Utf8, strict=False).fill_null("N/A").to_list(),
+                cat_counts["_val"].fill_null("N/A").to_list(),
                 cat_counts["count"].to_list()
             ))
             filtered = {k: v for k, v in raw.items() if k.lower().strip() not in _MEANINGLESS}
@@ -288,22 +334,16 @@ def _compute_distributions(lf, cols, detected, labels=None, bucketed_df=None, bu
     _doughnut_distribution(level_col, "severity")
 
     # Top EventIDs with enriched labels — smart fallback for low cardinality
-    # Task is LAST because it often contains numeric category IDs (100, 101) not meaningful labels
-    _EVENT_FALLBACK_CANDIDATES = [
-        "Provider", "Channel", "Keywords", "Description", "Level", "Status",
-        "TargetUserName", "SubjectUserName", "LogonType", "User", "Computer",
-        "Opcode", "Task",
-    ]
     if eventid_col:
         ev_title = f"Top {eventid_col}"
-        top_ev = _compute_top_distribution(lf, eventid_col, top_n=10,
+        top_ev = _compute_top_distribution(value_counts, eventid_col, top_n=10,
                                            enrich_event_ids=True, total_rows=total_rows)
         if top_ev and len(top_ev["labels"]) <= 2:
             # Low cardinality EventID — find a more informative column
-            alt_col = _pick_best_column(lf, _EVENT_FALLBACK_CANDIDATES, schema_names, min_unique=3,
-                                       skip_mostly_numeric=True)
+            alt_col = _pick_best_column(value_counts, _EVENT_FALLBACK_CANDIDATES, schema_names, min_unique=3,
+                                        skip_mostly_numeric=True)
             if alt_col:
-                alt_dist = _compute_top_distribution(lf, alt_col, top_n=10,
+                alt_dist = _compute_top_distribution(value_counts, alt_col, top_n=10,
                                                      filter_numeric=True, total_rows=total_rows)
                 if alt_dist and len(alt_dist["labels"]) >= 3:
                     alt_dist["chart_title"] = f"Top {alt_col}"
@@ -320,30 +360,24 @@ def _compute_distributions(lf, cols, detected, labels=None, bucketed_df=None, bu
 
     # Top Processes
     if proc_col:
-        top_proc = _compute_top_distribution(lf, proc_col, top_n=8,
+        top_proc = _compute_top_distribution(value_counts, proc_col, top_n=8,
                                              filter_numeric=True, total_rows=total_rows)
         if top_proc:
             top_proc["chart_title"] = f"Top {proc_col}"
             distributions["top_processes"] = top_proc
 
     # Severity Over Time (stacked bar data) — only when timeline exists
-    if level_col and level_col in schema_names and labels and bucketed_df is not None and bucket:
+    if level_col and level_col in schema_names and labels and level_buckets is not None:
         try:
-            sot_df = (lf
-                      .with_columns(pl.col("ts").dt.truncate(bucket).alias("_bucket"))
-                      .group_by(["_bucket", level_col])
-                      .agg(pl.len().alias("cnt"))
-                      .sort("_bucket")
-                      .collect())
-            bucket_labels = bucketed_df["_bucket"].to_list()
-            sev_levels = sot_df[level_col].cast(pl.Utf8, strict=False).fill_null("N/A").unique().to_list()
+            sot_df = level_buckets(level_col).with_columns(pl.col("_val").fill_null("N/A"))
             series = {}
-            for lvl in sev_levels:
-                lvl_data = sot_df.filter(pl.col(level_col).cast(pl.Utf8, strict=False).fill_null("N/A") == lvl)
-                lvl_buckets = lvl_data["_bucket"].to_list()
-                lvl_counts = lvl_data["cnt"].to_list()
-                bucket_map = dict(zip(lvl_buckets, lvl_counts))
-                series[lvl] = [bucket_map.get(b, 0) for b in bucket_labels]
+            for lvl in sot_df["_val"].unique().to_list():
+                lvl_data = sot_df.filter(pl.col("_val") == lvl)
+                bucket_map = dict(zip(
+                    lvl_data["_bucket"].dt.to_string("%Y-%m-%d %H:%M").to_list(),
+                    lvl_data["cnt"].to_list()
+                ))
+                series[lvl] = [bucket_map.get(b, 0) for b in labels]
             distributions["severity_over_time"] = {"labels": labels, "series": series}
         except Exception as _sot_e:
             logger.warning(f"Severity over time failed: {_sot_e}")
@@ -351,33 +385,168 @@ def _compute_distributions(lf, cols, detected, labels=None, bucketed_df=None, bu
     # Auto-detect top column for files with few known columns
     if not distributions.get("top_events") and not distributions.get("top_processes"):
         # Find the most interesting column (highest cardinality but < total rows)
-        for c in cols:
-            if c.startswith("_") or c.lower() in {"no.", "no", "row_number"}:
-                continue
-            if c in schema_names:
-                top = _compute_top_distribution(lf, c, top_n=10, filter_numeric=True,
-                                                total_rows=total_rows)
-                if top and len(top["labels"]) >= 3:
-                    distributions["top_generic"] = top
-                    distributions["top_generic_column"] = c
-                    break
+        generic_col, top = _generic_top(value_counts, cols, schema_names, total_rows)
+        if generic_col:
+            distributions["top_generic"] = top
+            distributions["top_generic_column"] = generic_col
 
     # Smart Risk Engine
-    try:
-        from engine.forensic import calculate_smart_risk_m4
-        smart_risk = calculate_smart_risk_m4(lf)
-        distributions["smart_risk"] = smart_risk
-    except Exception as sre_e:
-        logger.warning(f"Smart Risk Engine failed: {sre_e}")
+    if smart_risk is not None:
+        try:
+            distributions["smart_risk"] = smart_risk()
+        except Exception as sre_e:
+            logger.warning(f"Smart Risk Engine failed: {sre_e}")
 
     return distributions
 
 
-def analyze_dataframe(df_source, target_bars=50, start_time: str = None, end_time: str = None):
+def chart_columns(lf: pl.LazyFrame) -> dict:
+    """
+    Role -> column for every breakdown the chart can draw over lf: the detected
+    level/eventid/process/category/source columns, plus the low-cardinality
+    EventID fallback ("fallback") and the generic Top-N column ("generic") when
+    the chart would need them. Used to size the ingest-time time cube.
+    """
+    cols = lf.collect_schema().names()
+    schema_names = set(cols)
+    value_counts = _lazy_value_counts(lf)
+    detected = _detect_columns(cols, lf=lf, value_counts=value_counts)
+    roles = {k: v for k, v in detected.items() if v}
+    if detected.get("eventid"):
+        alt_col = _pick_best_column(value_counts, _EVENT_FALLBACK_CANDIDATES, schema_names,
+                                    min_unique=3, skip_mostly_numeric=True)
+        if alt_col:
+            roles["fallback"] = alt_col
+    has_top = any(
+        detected.get(k) and _compute_top_distribution(value_counts, detected[k], filter_numeric=(k == "process"))
+        for k in ("eventid", "process")
+    )
+    if not has_top:
+        generic_col, _ = _generic_top(value_counts, cols, schema_names)
+        if generic_col:
+            roles["generic"] = generic_col
+    return roles
+
+
+def _chart_bucket(duration: float) -> str:
+    """Timeline bucket for a view spanning `duration` seconds."""
+    # Adaptive bucketing (DO NOT MODIFY — user confirmed this chart is good)
+    if duration <= 0:
+        return "1h"
+    elif duration < 3 * 3600:
+        return "5m"
+    elif duration < 6 * 3600:
+        return "15m"
+    elif duration < 12 * 3600:
+        return "30m"
+    elif duration < 48 * 3600:
+        return "1h"
+    elif duration < 7 * 86400:
+        return "6h"
+    return "1d"
+
+
+# Timeline bucket sizes in microseconds (see _chart_bucket)
+_BUCKET_US = {"5m": 300_000_000, "15m": 900_000_000, "30m": 1_800_000_000,
+              "1h": 3_600_000_000, "6h": 21_600_000_000, "1d": 86_400_000_000}
+
+
+def _timeline_result(bucketed_df, value_counts, schema_names, cols, detected, level_buckets,
+                     smart_risk, view_total, file_total, view_min, view_max, file_min, file_max,
+                     duration):
+    """Assemble the chart payload from per-bucket counts (DataFrame[_bucket, cnt])
+    and the distribution providers; shared by the raw and the time-cube paths."""
+    labels = []
+    datasets = []
+    interpretation = "Timeline chart generated."
+    if bucketed_df is not None:
+        labels = bucketed_df["_bucket"].dt.to_string("%Y-%m-%d %H:%M").to_list()
+        y_vals = bucketed_df["cnt"].to_list()
+        datasets = [{"label": "Events", "data": y_vals}]
+
+        if len(y_vals) > 1:
+            mid = max(1, len(y_vals) // 2)
+            avg_first = sum(y_vals[:mid]) / mid
+            avg_second = sum(y_vals[mid:]) / max(1, len(y_vals) - mid)
+            if avg_second > avg_first * 1.2:
+                interpretation = "Alza (Posible Ataque/Spike)"
+            elif avg_second < avg_first * 0.8:
+                interpretation = "Baja (Mitigación/Inactividad)"
+            else:
+                interpretation = "Estable"
+
+    # All distributions via shared function
+    distributions = _compute_distributions(
+        value_counts, schema_names, cols, detected,
+        labels=labels, level_buckets=level_buckets,
+        total_rows=view_total, smart_risk=smart_risk
+    )
+
+    return {
+        "labels": labels,
+        "datasets": datasets,
+        "interpretation": interpretation,
+        "stacked": True,
+        "global_stats": {},
+        "noise_info": {
+            "top_talker_id": None,
+            "percent": 0.0
+        },
+        "distributions": distributions,
+        "stats": {
+            "total_events": view_total,
+            "file_total": file_total,
+            "start_time": view_min.isoformat() if view_min else None,
+            "end_time": view_max.isoformat() if view_max else None,
+            "file_start": file_min.isoformat() if file_min else None,
+            "file_end": file_max.isoformat() if file_max else None,
+            "eps": round(view_total / duration, 2) if duration > 0 else 0
+        }
+    }
+
+
+def dataset_file_bounds(dataset):
+    """
+    (file_total, file_min, file_max) of a time-sorted dataset, read from its time
+    index and first/last rows; None when the store is not sorted by _ts.
+    """
+    if not dataset.time_index:
+        return None
+    # Rows are sorted by _ts (nulls first): the file bounds are the first and
+    # last rows after the nulls
+    nulls = dataset.time_index["null_count"]
+    file_total = (dataset.column_stats or {}).get("rows", dataset.row_count) - nulls
+    if file_total <= 0:
+        return 0, None, None
+    ends = (dataset.gather(pl.Series([nulls, dataset.row_count - 1], dtype=pl.UInt32))
+            .select(TS_COL).collect()[TS_COL])
+    file_min, file_max = ends.dt.replace_time_zone(None).to_list()
+    return file_total, file_min, file_max
+
+
+def _empty_view_result(file_total, file_min, file_max):
+    return {
+        "labels": [], "datasets": [],
+        "interpretation": "No data in selected time range (Try resetting zoom).",
+        "stats": {
+            "total_events": 0,
+            "file_total": file_total,
+            "start_time": str(file_min), "end_time": str(file_max),
+            "file_start": file_min.isoformat() if file_min else None,
+            "file_end": file_max.isoformat() if file_max else None,
+            "eps": 0
+        }
+    }
+
+
+def analyze_dataframe(df_source, target_bars=50, start_time: str = None, end_time: str = None,
+                      file_bounds: tuple = None):
     """
     Optimized core function to generate advanced histogram data from a Polars LazyFrame or DataFrame.
     Returns dict with labels, datasets, trend, anomalies, top_talker, and stats.
     Executes aggregations lazily to minimize memory footprint.
+    file_bounds: whole-dataset (file_total, file_min, file_max), see
+    dataset_file_bounds(); when omitted the file_* stats describe df_source.
     """
     try:
         is_lazy = isinstance(df_source, pl.LazyFrame)
@@ -408,51 +577,60 @@ def analyze_dataframe(df_source, target_bars=50, start_time: str = None, end_tim
             if col:
                 keep_cols.append(col)
 
-        q_base = df_source.lazy().select(list(set(keep_cols)))
-
-        # Prepare each potential time column for parsing and coalesce them
-        parse_exprs = []
-        for col_to_parse in keep_cols:
-            c = pl.col(col_to_parse)
-            c_str = c.cast(pl.Utf8)
-            c_float = c.cast(pl.Float64, strict=False)
-            c_int = c_float.cast(pl.Int64, strict=False)
-
-            parse_exprs.append(
-                pl.coalesce([
-                    c_str.str.to_datetime("%Y-%m-%dT%H:%M:%S%.f", strict=False),
-                    c_str.str.to_datetime("%Y-%m-%dT%H:%M:%S", strict=False),
-                    c_str.str.to_datetime("%Y-%m-%d %H:%M:%S%.f", strict=False),
-                    c_str.str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-                    c_str.str.to_datetime("%m/%d/%Y %H:%M:%S", strict=False),
-                    c_str.str.to_datetime("%d/%m/%Y %H:%M:%S", strict=False),
-                    c_str.str.to_datetime("%Y-%m-%d", strict=False),
-                    pl.when(c_int.is_not_null() & (c_int > 0) & (c_int < 30000000000))
-                      .then(pl.from_epoch(c_int * 1000, time_unit="ms"))
-                      .otherwise(None).cast(pl.Datetime, strict=False),
-                    pl.when(c_int.is_not_null() & (c_int >= 30000000000) & (c_int < 30000000000000))
-                      .then(pl.from_epoch(c_int, time_unit="ms"))
-                      .otherwise(None).cast(pl.Datetime, strict=False),
-                    pl.when(c_int.is_not_null() & (c_int >= 30000000000000))
-                      .then(pl.from_epoch(c_int, time_unit="us"))
-                      .otherwise(None).cast(pl.Datetime, strict=False),
-                ])
-            )
+        if TS_COL in existing_cols:
+            # Canonical timestamp computed at ingest — no string parsing needed
+            q_base = df_source.lazy().select(list(set(keep_cols + [TS_COL])))
+            ts_expr = pl.col(TS_COL).dt.replace_time_zone(None)
+        else:
+            q_base = df_source.lazy().select(list(set(keep_cols)))
+
+            # Prepare each potential time column for parsing and coalesce them
+            parse_exprs = []
+            for col_to_parse in keep_cols:
+                c = pl.col(col_to_parse)
+                c_str = c.cast(pl.Utf8)
+                c_float = c.cast(pl.Float64, strict=False)
+                c_int = c_float.cast(pl.Int64, strict=False)
+
+                parse_exprs.append(
+                    pl.coalesce([
+                        c_str.str.to_datetime("%Y-%m-%dT%H:%M:%S%.f", strict=False),
+                        c_str.str.to_datetime("%Y-%m-%dT%H:%M:%S", strict=False),
+                        c_str.str.to_datetime("%Y-%m-%d %H:%M:%S%.f", strict=False),
+                        c_str.str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
+                        c_str.str.to_datetime("%m/%d/%Y %H:%M:%S", strict=False),
+                        c_str.str.to_datetime("%d/%m/%Y %H:%M:%S", strict=False),
+                        c_str.str.to_datetime("%Y-%m-%d", strict=False),
+                        pl.when(c_int.is_not_null() & (c_int > 0) & (c_int < 30000000000))
+                          .then(pl.from_epoch(c_int * 1000, time_unit="ms"))
+                          .otherwise(None).cast(pl.Datetime, strict=False),
+                        pl.when(c_int.is_not_null() & (c_int >= 30000000000) & (c_int < 30000000000000))
+                          .then(pl.from_epoch(c_int, time_unit="ms"))
+                          .otherwise(None).cast(pl.Datetime, strict=False),
+                        pl.when(c_int.is_not_null() & (c_int >= 30000000000000))
+                          .then(pl.from_epoch(c_int, time_unit="us"))
+                          .otherwise(None).cast(pl.Datetime, strict=False),
+                    ])
+                )
+            ts_expr = pl.coalesce(parse_exprs)
 
         q_parsed = q_base.with_columns(
-            pl.coalesce(parse_exprs).alias("ts")
+            ts_expr.alias("ts")
         ).filter(pl.col("ts").is_not_null())
 
         try:
-            global_stats_df = q_parsed.select([
-                pl.col("ts").min().alias("min_ts"),
-                pl.col("ts").max().alias("max_ts"),
-                pl.len().alias("count")
-            ]).collect()
+            if file_bounds is not None:
+                file_total, file_min, file_max = file_bounds
+            else:
+                global_stats_df = collect(q_parsed.select([
+                    pl.col("ts").min().alias("min_ts"),
+                    pl.col("ts").max().alias("max_ts"),
+                    pl.len().alias("count")
+                ]))
 
-            file_min = global_stats_df[0, "min_ts"]
-            file_max = global_stats_df[0, "max_ts"]
-            file_total = global_stats_df[0, "count"]
+                file_min = global_stats_df[0, "min_ts"]
+                file_max = global_stats_df[0, "max_ts"]
+                file_total = global_stats_df[0, "count"]
 
         except Exception as e:
             logger.error(f"Date parsing aggregation failed: {e}")
@@ -478,110 +656,115 @@ def analyze_dataframe(df_source, target_bars=50, start_time: str = None, end_tim
             logger.warning(f"Chart filter failed: {e}. Returning unfiltered.")
             q_filtered = q_parsed
 
-        view_stats_df = q_filtered.select([
+        view_stats_df = collect(q_filtered.select([
             pl.col("ts").min().alias("min_ts"),
             pl.col("ts").max().alias("max_ts"),
             pl.len().alias("count")
-        ]).collect()
+        ]))
 
         view_min = view_stats_df[0, "min_ts"]
         view_max = view_stats_df[0, "max_ts"]
         view_total = view_stats_df[0, "count"]
 
         if view_total == 0:
-            return {
-                "labels": [], "datasets": [],
-                "interpretation": "No data in selected time range (Try resetting zoom).",
-                "stats": {
-                    "total_events": 0,
-                    "file_total": file_total,
-                    "start_time": str(file_min), "end_time": str(file_max),
-                    "file_start": file_min.isoformat() if file_min else None,
-                    "file_end": file_max.isoformat() if file_max else None,
-                    "eps": 0
-                }
-            }
+            return _empty_view_result(file_total, file_min, file_max)
 
-        labels = []
-        datasets = []
-        interpretation = "Timeline chart generated."
-        global_stats = {}
-        top_talker_id = None
-        top_talker_pct = 0.0
         duration = (view_max - view_min).total_seconds() if (view_min and view_max) else 0
-        bucketed_df = None
-        bucket = "1h"
+        bucket = _chart_bucket(duration)
 
-        # Timeline Chart — Adaptive bucketing (DO NOT MODIFY — user confirmed this chart is good)
+        bucketed_df = None
         try:
-            if duration <= 0:
-                bucket = "1h"
-            elif duration < 3 * 3600:
-                bucket = "5m"
-            elif duration < 6 * 3600:
-                bucket = "15m"
-            elif duration < 12 * 3600:
-                bucket = "30m"
-            elif duration < 48 * 3600:
-                bucket = "1h"
-            elif duration < 7 * 86400:
-                bucket = "6h"
-            else:
-                bucket = "1d"
-
-            bucketed_df = q_filtered.with_columns(
+            bucketed_df = collect(q_filtered.with_columns(
                 pl.col("ts").dt.truncate(bucket).alias("_bucket")
             ).group_by("_bucket").agg(
                 pl.len().cast(pl.Int32).alias("cnt")
-            ).sort("_bucket").collect()
-
-            labels = bucketed_df["_bucket"].dt.to_string("%Y-%m-%d %H:%M").to_list()
-            y_vals = bucketed_df["cnt"].to_list()
-            datasets = [{"label": "Events", "data": y_vals}]
-
-            if len(y_vals) > 1:
-                mid = max(1, len(y_vals) // 2)
-                avg_first = sum(y_vals[:mid]) / mid
-                avg_second = sum(y_vals[mid:]) / max(1, len(y_vals) - mid)
-                if avg_second > avg_first * 1.2:
-                    interpretation = "Alza (Posible Ataque/Spike)"
-                elif avg_second < avg_first * 0.8:
-                    interpretation = "Baja (Mitigación/Inactividad)"
-                else:
-                    interpretation = "Estable"
+            ).sort("_bucket"))
         except Exception as e:
             logger.error(f"Timeline bucketing failed: {e}")
             traceback.print_exc()
 
-        # All distributions via shared function
-        distributions = _compute_distributions(
-            q_filtered, cols, detected,
-            labels=labels, bucketed_df=bucketed_df, bucket=bucket,
-            total_rows=view_total
+        def level_buckets(col):
+            return collect(q_filtered
+                           .with_columns(pl.col("ts").dt.truncate(bucket).alias("_bucket"))
+                           .group_by(["_bucket", pl.col(col).alias("_val")])
+                           .agg(pl.len().alias("cnt"))
+                           .with_columns(pl.col("_val").cast(pl.Utf8, strict=False)))
+
+        return _timeline_result(
+            bucketed_df, _lazy_value_counts(q_filtered), q_filtered.collect_schema().names(), cols,
+            detected, level_buckets, lambda: calculate_smart_risk_m4(q_filtered),
+            view_total, file_total, view_min, view_max, file_min, file_max, duration
         )
+    except Exception as e:
+        logger.error(f"Analysis Error: {e}")
+        traceback.print_exc()
+        return {"error": str(e)}
 
-        return {
-            "labels": labels,
-            "datasets": datasets,
-            "interpretation": interpretation,
-            "stacked": True,
-            "global_stats": global_stats,
-            "noise_info": {
-                "top_talker_id": top_talker_id,
-                "percent": round(top_talker_pct * 100, 1)
-            },
-            "distributions": distributions,
-            "stats": {
-                "total_events": view_total,
-                "file_total": file_total,
-                "start_time": view_min.isoformat() if view_min else None,
-                "end_time": view_max.isoformat() if view_max else None,
-                "file_start": file_min.isoformat() if file_min else None,
-                "file_end": file_max.isoformat() if file_max else None,
-                "eps": round(view_total / duration, 2) if duration > 0 else 0
+
+def analyze_time_cube(dataset, start_time: str = None, end_time: str = None):
+    """
+    Chart data for an unfiltered or time-window-only view, answered from the
+    dataset's ingest-time time cube (engine/time_cube.py) plus the two partial
+    minutes at the window edges. Same payload as analyze_dataframe over the
+    same view given the same dataset_file_bounds().
+    """
+    try:
+        file_total, file_min, file_max = dataset_file_bounds(dataset)
+        if file_total == 0:
+            return {
+                "labels": [], "datasets": [], "error": "No parseable dates found in primary time column.",
+                "stats": {"total_events": 0, "eps": 0}
             }
-        }
+        lo, hi = dataset.time_row_range(parse_time_boundary(start_time), parse_time_boundary(end_time))
+        if hi <= lo:
+            return _empty_view_result(file_total, file_min, file_max)
+        # The window is the first and last rows of its contiguous range
+        ends = (dataset.gather(pl.Series([lo, hi - 1], dtype=pl.UInt32))
+                .select(TS_COL).collect()[TS_COL])
+        view_min, view_max = ends.dt.replace_time_zone(None).to_list()
+        start_us, end_us = ends.dt.epoch("us").to_list()
+        view_total = hi - lo
+        duration = (view_max - view_min).total_seconds()
+        bucket = _chart_bucket(duration)
+
+        cube_file = dataset.time_cube
+        columns = cube_columns(cube_file)
+        roles_of = {}
+        for role, col in columns.items():
+            roles_of.setdefault(col, role)
+        counts = cube_window(dataset, cube_file, start_us, end_us, _BUCKET_US[bucket])
+        counts = counts.with_columns(pl.from_epoch("bucket", time_unit="us").alias("_bucket"))
+
+        bucketed_df = (counts.filter(pl.col("role").is_null())
+                       .select("_bucket", pl.col("count").cast(pl.Int32).alias("cnt"))
+                       .sort("_bucket"))
+
+        def value_counts(col):
+            if col not in roles_of:
+                return None
+            return (counts.filter(pl.col("role") == roles_of[col])
+                    .group_by(pl.col("value").alias("_val"))
+                    .agg(pl.col("count").sum()))
+
+        def level_buckets(col):
+            return (counts.filter(pl.col("role") == roles_of[col])
+                    .select("_bucket", pl.col("value").alias("_val"), pl.col("count").alias("cnt")))
+
+        def smart_risk():
+            minutes = (cube_window(dataset, cube_file, start_us, end_us, BASE_BUCKET_US, roles=[])
+                       .select(pl.from_epoch("bucket", time_unit="us").alias("_bucket"),
+                               pl.col("count").alias("event_count"))
+                       .sort("_bucket"))
+            return calculate_smart_risk_m4(dataset.scan(), minute_counts=minutes)
+
+        cols = dataset.columns
+        detected = {k: columns.get(k) for k in ("level", "eventid", "process", "category", "source")}
+        return _timeline_result(
+            bucketed_df, value_counts, set(cols) | set(roles_of), cols, detected,
+            level_buckets, smart_risk,
+            view_total, file_total, view_min, view_max, file_min, file_max, duration
+        )
     except Exception as e:
-        logger.error(f"Analysis Error: {e}")
+        logger.error(f"Time cube analysis error: {e}")
         traceback.print_exc()
         return {"error": str(e)}
@@ -19,6 +19,8 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from engine.session_store import scan_dataset, dataset_exists, get_dataset
+
 logger = logging.getLogger("chronos.enrichment.router")
 
 enrichment_router = APIRouter(prefix="/api/enrichment", tags=["enrichment"])
@@ -140,19 +142,18 @@ class ExportEnrichmentRequest(BaseModel):
 
 def _load_filtered_dataframe(filename: str, params: dict) -> pl.DataFrame:
     """Load a processed file and apply standard filters."""
-    from engine.forensic import apply_standard_processing
+    from engine.forensic import apply_standard_processing, drop_internal_columns
 
     filepath = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(filepath):
+    if not dataset_exists(filepath):
         raise FileNotFoundError(f"File not found: {filename}")
 
-    if filename.endswith(".parquet"):
-        lf = pl.scan_parquet(filepath)
-    else:
-        lf = pl.scan_csv(filepath, infer_schema_length=0, try_parse_dates=False, truncate_ragged_lines=True)
+    ds = get_dataset(filepath)
+    lf = ds.scan()
 
     # Apply filters
     filter_params = {
+        "dataset": ds,
         "query": params.get("query", ""),
         "col_filters": params.get("col_filters", "{}"),
         "start_time": params.get("start_time", ""),
@@ -162,7 +163,7 @@ def _load_filtered_dataframe(filename: str, params: dict) -> pl.DataFrame:
         "selected_ids": params.get("selected_ids", []),
     }
     lf = apply_standard_processing(lf, filter_params)
-    return lf.collect()
+    return drop_internal_columns(lf).collect()
 
 
 def _split_multi_value(val: str) -> list:
@@ -426,13 +427,10 @@ async def get_enrichable_columns(filename: str):
     """
     try:
         filepath = os.path.join(OUTPUT_DIR, filename)
-        if not os.path.exists(filepath):
+        if not dataset_exists(filepath):
             return JSONResponse(status_code=404, content={"error": "File not found"})
 
-        if filename.endswith(".parquet"):
-            lf = pl.scan_parquet(filepath)
-        else:
-            lf = pl.scan_csv(filepath, infer_schema_length=0, try_parse_dates=False, truncate_ragged_lines=True)
+        lf = scan_dataset(filepath)
 
         # Sample first 500 rows (also gives us column names without extra call)
         df_sample = lf.head(500).collect()
@@ -1,11 +1,13 @@
 import polars as pl
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List, Any
 import json
 import functools
 import operator
 import logging
 
+from engine.search_index import token_candidates, trigram_ids, regex_literals
+
 # Set up logging for the engine
 logger = logging.getLogger("chronos.engine")
 
@@ -36,6 +38,12 @@ def parse_time_boundary(t_str: Optional[str]) -> Optional[datetime]:
     except:
         return None
 
+def _as_utc(dt: datetime) -> datetime:
+    """Naive boundaries are taken as UTC; aware ones are converted to UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
 def get_primary_time_column(columns: List[str]) -> Optional[str]:
     """
     Standardized logic to pick the best time column for filtering and analysis.
@@ -62,53 +70,63 @@ def get_primary_time_column(columns: List[str]) -> Optional[str]:
 
     return None
 
+def event_id_source(cols) -> Optional[str]:
+    """Best Event ID source column present in cols (EVENT_ID_HIERARCHY order)."""
+    return next((c for c in EVENT_ID_HIERARCHY if c in cols), None)
+
+
+def validated_event_id_expr(col: str, dtype: pl.DataType) -> pl.Expr:
+    """Native expression for Validated_EventID: col as an integer ("4624.0" ->
+    4624), null unless 0 < id < 65535. Int32."""
+    eid = pl.col(col)
+    if not dtype.is_integer():
+        eid = eid.cast(pl.Utf8).str.replace(r"\.0$", "", literal=False).cast(pl.Int64, strict=False)
+    return pl.when((eid > 0) & (eid < 65535)).then(eid).otherwise(None).cast(pl.Int32)
+
+
+def add_validated_event_id(data):
+    """Append the EID_COL column (Validated_EventID computed once at ingest) to a
+    DataFrame/LazyFrame; returns data unchanged when there is no Event ID source
+    or EID_COL already exists."""
+    schema = data.collect_schema() if isinstance(data, pl.LazyFrame) else data.schema
+    eid_col = event_id_source(schema.names())
+    if eid_col is None or EID_COL in schema:
+        return data
+    return data.with_columns(validated_event_id_expr(eid_col, schema[eid_col]).alias(EID_COL))
+
+
 def sanitize_context_data(lf: pl.LazyFrame) -> pl.LazyFrame:
     """
     Applies strict forensic sanitization to forensic telemetry.
     Ensures EventIDs are valid integers and cleans common artifacts.
+    Stores written since ingest-time validation carry the result in EID_COL;
+    older ones compute it here with the same native expression.
     """
     try:
         schema = lf.collect_schema()
         cols = schema.names()
 
-        # 1. Find the best Event ID source using global hierarchy
-        eid_col = None
-        for h_col in EVENT_ID_HIERARCHY:
-            if h_col in cols:
-                eid_col = h_col
-                break
-
-        # 2. Apply Sanitization Expressions
-        exprs = []
-
         # --- Event ID Validation ---
+        if EID_COL in cols:
+            return lf.with_columns(pl.col(EID_COL).alias("Validated_EventID"))
+        eid_col = event_id_source(cols)
         if eid_col:
-            # Cast to string, strip .0, cast to int, and filter range
-            exprs.append(
-                pl.col(eid_col).cast(pl.Utf8)
-                .str.replace(r"\.0$", "", literal=False)
-                .cast(pl.Int64, strict=False)
-                # Using map_elements for compatibility with newer Polars if necessary,
-                # but staying with the functional equivalent of the original .apply()
-                .map_elements(lambda x: x if x is not None and 0 < x < 65535 else None, return_dtype=pl.Int64)
-                .alias("Validated_EventID")
-            )
-
-        if exprs:
-            return lf.with_columns(exprs)
+            return lf.with_columns(validated_event_id_expr(eid_col, schema[eid_col]).alias("Validated_EventID"))
         return lf
     except Exception as e:
         logger.error(f"Sanitization error: {e}")
         return lf
 
+# Column-name fragments of timestamp-like columns (normalized to text for display)
+TIME_KEYWORDS = ('time', 'date', 'timestamp', 'lastseen', 'created', 'seen', 'firstseen')
+
 def normalize_time_columns_in_df(lf: pl.LazyFrame) -> pl.LazyFrame:
     """Normalizes all columns that look like timestamps to a standard string format."""
     try:
         schema = lf.collect_schema()
-        time_keywords = ['time', 'date', 'timestamp', 'lastseen', 'created', 'seen', 'firstseen']
 
         for col_name, dtype in schema.items():
-            if any(k in col_name.lower() for k in time_keywords):
+            if any(k in col_name.lower() for k in TIME_KEYWORDS):
                 c = pl.col(col_name)
 
                 try:
@@ -161,6 +179,147 @@ def normalize_time_columns_in_df(lf: pl.LazyFrame) -> pl.LazyFrame:
         return lf
 
 
+# --- Canonical timestamp (_ts) -------------------------------------------------
+# Computed once at ingest: a native Datetime[us, UTC] column derived from the
+# primary time column (falling back to the other hierarchy columns). Filters,
+# baseline sort and histograms use it instead of re-parsing display strings.
+TS_COL = "_ts"
+# Physical row position within the store (only requested by the paging cache)
+POS_COL = "_pos"
+# Computed once at ingest: Validated_EventID as Int32 (see sanitize_context_data)
+EID_COL = "_eid"
+
+# Helper columns that never reach the grid, global search or exports
+INTERNAL_COLUMNS = frozenset({TS_COL, POS_COL, EID_COL, "_epoch_tmp_", "_ts_sort_", "_bucket"})
+
+# Candidate formats, tried on a sample; ties resolve in list order
+TS_STRING_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S%.f%#z",
+    "%Y-%m-%d %H:%M:%S%.f%#z",
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y/%m/%d %H:%M:%S%.f",
+    "%d/%m/%Y %H:%M:%S%.f",
+    "%m/%d/%Y %H:%M:%S%.f",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%Y-%m-%d",
+]
+_TS_SAMPLE_SIZE = 1000
+_EPOCH_PATTERN = r"^\d{9,19}(\.\d+)?$"
+
+
+def _epoch_to_ts(v: pl.Expr) -> pl.Expr:
+    """Numeric epoch -> Datetime[us, UTC]; unit inferred from magnitude (s/ms/us/ns)."""
+    f = v.cast(pl.Float64, strict=False)
+    i = f.cast(pl.Int64, strict=False)
+    us = pl.Datetime("us")
+    return (
+        pl.when(f > 10**18).then(pl.from_epoch(i, time_unit="ns").cast(us))
+        .when(f > 10**15).then(pl.from_epoch(i, time_unit="us").cast(us))
+        .when(f > 10**12).then(pl.from_epoch(i, time_unit="ms").cast(us))
+        .when(f > 10**8).then(pl.from_epoch((f * 1_000_000).cast(pl.Int64), time_unit="us").cast(us))
+        .otherwise(None)
+        .dt.replace_time_zone("UTC")
+    )
+
+
+def detect_time_formats(sample: pl.Series) -> List[str]:
+    """
+    Rank TS_STRING_FORMATS (plus "epoch") by how many sample values they parse.
+    Returns only formats that matched at least one value, best first.
+    """
+    s = sample.cast(pl.Utf8, strict=False).str.strip_chars()
+    s = s.filter(s.is_not_null() & (s != ""))
+    if s.is_empty():
+        return []
+    hits = []
+    epoch_hits = s.str.contains(_EPOCH_PATTERN).sum()
+    if epoch_hits:
+        hits.append((epoch_hits, -1, "epoch"))
+    for rank, fmt in enumerate(TS_STRING_FORMATS):
+        try:
+            n = s.str.to_datetime(fmt, strict=False, time_unit="us", time_zone="UTC").is_not_null().sum()
+        except Exception:
+            continue
+        if n:
+            hits.append((n, rank, fmt))
+    hits.sort(key=lambda h: (-h[0], h[1]))
+    return [fmt for _, _, fmt in hits]
+
+
+def canonical_ts_expr(col_name: str, dtype, formats: List[str]) -> Optional[pl.Expr]:
+    """Expression converting one column to Datetime[us, UTC] using pre-detected formats."""
+    c = pl.col(col_name)
+    if isinstance(dtype, pl.Datetime):
+        c = c.dt.cast_time_unit("us")
+        return c.dt.convert_time_zone("UTC") if dtype.time_zone else c.dt.replace_time_zone("UTC")
+    if dtype == pl.Date:
+        return c.cast(pl.Datetime("us")).dt.replace_time_zone("UTC")
+    if dtype.is_numeric():
+        return _epoch_to_ts(c)
+    if not formats:
+        return None
+    c_str = c.cast(pl.Utf8, strict=False).str.strip_chars()
+    exprs = []
+    for fmt in formats:
+        if fmt == "epoch":
+            exprs.append(pl.when(c_str.str.contains(_EPOCH_PATTERN)).then(_epoch_to_ts(c_str)))
+        else:
+            exprs.append(c_str.str.to_datetime(fmt, strict=False, time_unit="us", time_zone="UTC"))
+    return pl.coalesce(exprs) if len(exprs) > 1 else exprs[0]
+
+
+def drop_internal_columns(data):
+    """Drop INTERNAL_COLUMNS from a DataFrame/LazyFrame before it is shown or exported."""
+    names = data.collect_schema().names() if isinstance(data, pl.LazyFrame) else data.columns
+    internal = [c for c in names if c in INTERNAL_COLUMNS]
+    return data.drop(internal) if internal else data
+
+
+def add_canonical_ts(data):
+    """
+    Detect the format of each time column once (on a sample) and append the native
+    TS_COL column. Works on DataFrame or LazyFrame; returns data unchanged when no
+    time column parses or TS_COL already exists.
+    """
+    try:
+        is_lazy = isinstance(data, pl.LazyFrame)
+        schema = data.collect_schema() if is_lazy else data.schema
+        cols = schema.names()
+        if TS_COL in cols:
+            return data
+
+        primary = get_primary_time_column(cols)
+        lowered = {c.lower(): c for c in cols}
+        sources = [primary] if primary else []
+        for h_col in TIME_HIERARCHY:
+            c = lowered.get(h_col.lower())
+            if c and c not in sources:
+                sources.append(c)
+        if not sources:
+            return data
+
+        exprs = []
+        for col_name in sources:
+            dtype = schema[col_name]
+            formats = []
+            if dtype in (pl.Utf8, pl.String):
+                sample_src = data.select(pl.col(col_name)).drop_nulls().head(_TS_SAMPLE_SIZE)
+                sample = sample_src.collect() if is_lazy else sample_src
+                formats = detect_time_formats(sample.to_series())
+            expr = canonical_ts_expr(col_name, dtype, formats)
+            if expr is not None:
+                exprs.append(expr)
+        if not exprs:
+            return data
+
+        ts = pl.coalesce(exprs) if len(exprs) > 1 else exprs[0]
+        return data.with_columns(ts.alias(TS_COL))
+    except Exception as e:
+        logger.warning(f"Canonical timestamp detection failed: {e}")
+        return data
+
+
 def sub_analyze_timeline(df: pl.DataFrame) -> dict:
     """Timeline Analysis Sub-task — uses adaptive bucketing consistent with main chart"""
     stats = {"type": "timeline", "peaks": [], "time_range": "N/A"}
@@ -982,11 +1141,70 @@ def ingest_json_file(file_path: str) -> pl.LazyFrame:
         logger.error(f"Ingestion error for {file_path}: {e}")
         raise e
 
+def _contains_any(cols: List[str], needle: str) -> pl.Expr:
+    """Case-insensitive literal contains across cols (Global Search predicate)."""
+    return pl.any_horizontal(
+        pl.col(c).cast(pl.Utf8, strict=False).str.to_lowercase().str.contains(needle, literal=True).fill_null(False)
+        for c in cols
+    )
+
+def _filter_by_candidates(lf: pl.LazyFrame, ids: pl.Series, verify: Optional[pl.Expr] = None,
+                          extra: Optional[pl.Expr] = None) -> pl.LazyFrame:
+    """
+    Keep rows whose _id is in the index candidates (or that match extra). When
+    verify is given it is evaluated only on the surviving rows: cache() stops the
+    optimizer from fusing both predicates into one full-column pass.
+    """
+    keep = pl.col("_id").cast(pl.Int64).is_in(ids.implode())
+    if extra is not None:
+        keep = keep | extra
+    lf = lf.filter(keep)
+    return lf.cache().filter(verify) if verify is not None else lf
+
+def _search_candidates(dataset, token: str, indexed: List[str]) -> Optional[tuple]:
+    """(ids, exact) for one Global Search token from the dataset's indexes, or None."""
+    tri_cols = [c for c in dataset.trigram_columns if c in indexed]
+    try:
+        return token_candidates(dataset.search_index, token, dataset.trigram_index, tri_cols)
+    except Exception as e:
+        logger.warning(f"Search index lookup failed for '{token}': {e}")
+        return None
+
+def _narrowed_filter(lf: pl.LazyFrame, dataset, col: str, literals: List[str], expr: pl.Expr) -> pl.LazyFrame:
+    """Apply a like/regex column filter, first narrowing to the rows whose trigrams
+    cover every required literal when the column has a trigram index."""
+    ids = None
+    if dataset is not None and dataset.trigram_index and col in dataset.trigram_columns:
+        for literal in literals:
+            try:
+                found = trigram_ids(dataset.trigram_index, col, literal)
+            except Exception as e:
+                logger.warning(f"Trigram lookup failed on {col}: {e}")
+                found = None
+            if found is not None:
+                ids = found if ids is None else ids.filter(ids.is_in(found.implode()))
+    if ids is None:
+        return lf.filter(expr)
+    return _filter_by_candidates(lf, ids, expr)
+
 def apply_standard_processing(lf: pl.LazyFrame, params: dict) -> pl.LazyFrame:
     """
     Unifies filtering, sorting, and indexing logic across all data endpoints.
     Params dict expected keys: query, col_filters, start_time, end_time, sort_col, sort_dir, selected_ids
+    Optional key "dataset": the DatasetHandle lf was scanned from (unmodified). For
+    time-sorted stores the time window becomes a row-range slice and the baseline
+    sort is skipped.
     """
+    # 0. Time window on a time-sorted store: binary search -> contiguous row slice
+    dataset = params.get('dataset')
+    time_sorted = dataset is not None and dataset.time_sorted
+    if time_sorted:
+        start_b = parse_time_boundary(params.get('start_time'))
+        end_b = parse_time_boundary(params.get('end_time'))
+        if start_b or end_b:
+            lo, hi = dataset.time_row_range(start_b, end_b)
+            lf = lf.slice(lo, hi - lo)
+
     # 1. Forensic Sanitization
     lf = sanitize_context_data(lf)
 
@@ -1008,19 +1226,33 @@ def apply_standard_processing(lf: pl.LazyFrame, params: dict) -> pl.LazyFrame:
             stripped = t.lstrip('.\\/`\'"')
             tokens.append(stripped if len(stripped) >= 2 else t)
         tokens = [t for t in tokens if t]  # remove empties
+        search_cols = [c for c in all_cols if c not in INTERNAL_COLUMNS]
+
+        # Token index (when the store has one) answers the indexed string columns
+        indexed = []
+        if dataset is not None and dataset.search_index:
+            indexed = [c for c in dataset.search_columns if c in search_cols]
+        unindexed = [c for c in search_cols if c not in indexed]
 
         for token in tokens:
+            resolved = _search_candidates(dataset, token, indexed) if indexed else None
+            if resolved is not None:
+                ids, exact = resolved
+                extra = _contains_any(unindexed, token) if unindexed else None
+                verify = None if exact else _contains_any(search_cols, token)
+                lf = _filter_by_candidates(lf, ids, verify, extra)
+                continue
             try:
                 lf = lf.filter(
                     pl.any_horizontal(
                         pl.col(c).cast(pl.Utf8).str.to_lowercase().str.contains(token, literal=True).fill_null(False)
-                        for c in all_cols
+                        for c in search_cols
                     )
                 )
             except Exception:
                 # Fallback: iterative per-column OR
                 col_exprs = []
-                for c in all_cols:
+                for c in search_cols:
                     try:
                         col_exprs.append(
                             pl.col(c).cast(pl.Utf8, strict=False).str.to_lowercase().str.contains(token, literal=True).fill_null(False)
@@ -1049,33 +1281,40 @@ def apply_standard_processing(lf: pl.LazyFrame, params: dict) -> pl.LazyFrame:
                 if not col or val is None: continue
 
                 c_expr = pl.col(col)
+                # Categorical columns compare on dictionary codes, everything else as text
+                is_cat = schema.get(col) == pl.Categorical
+                text_expr = c_expr if is_cat else c_expr.cast(pl.Utf8)
+                num_expr = (text_expr.cast(pl.Utf8) if is_cat else c_expr).cast(pl.Float64, strict=False)
                 if typ == "like":
-                    lf = lf.filter(c_expr.cast(pl.Utf8).str.to_lowercase().str.contains(str(val).lower(), literal=True))
+                    like_expr = c_expr.cast(pl.Utf8).str.to_lowercase().str.contains(str(val).lower(), literal=True)
+                    lf = _narrowed_filter(lf, dataset, col, [str(val)], like_expr)
                 elif typ in ["=", "=="]:
-                    lf = lf.filter(c_expr.cast(pl.Utf8) == str(val))
+                    lf = lf.filter(text_expr == str(val))
                 elif typ == "!=":
-                     lf = lf.filter(c_expr.cast(pl.Utf8) != str(val))
+                     lf = lf.filter(text_expr != str(val))
                 elif typ == ">":
-                    lf = lf.filter(c_expr.cast(pl.Float64, strict=False) > float(val))
+                    lf = lf.filter(num_expr > float(val))
                 elif typ == ">=":
-                    lf = lf.filter(c_expr.cast(pl.Float64, strict=False) >= float(val))
+                    lf = lf.filter(num_expr >= float(val))
                 elif typ == "<":
-                    lf = lf.filter(c_expr.cast(pl.Float64, strict=False) < float(val))
+                    lf = lf.filter(num_expr < float(val))
                 elif typ == "<=":
-                    lf = lf.filter(c_expr.cast(pl.Float64, strict=False) <= float(val))
+                    lf = lf.filter(num_expr <= float(val))
                 elif typ == "in":
                     if isinstance(val, str):
                         vals = [v.strip() for v in val.split(",")]
                     else:
                         vals = val if isinstance(val, list) else [val]
-                    lf = lf.filter(c_expr.cast(pl.Utf8).is_in([str(v) for v in vals]))
+                    lf = lf.filter(text_expr.is_in([str(v) for v in vals]))
                 elif typ == "regex":
-                    lf = lf.filter(c_expr.cast(pl.Utf8).str.contains(str(val), literal=False))
+                    regex_expr = c_expr.cast(pl.Utf8).str.contains(str(val), literal=False)
+                    lf = _narrowed_filter(lf, dataset, col, regex_literals(str(val)), regex_expr)
         elif isinstance(col_filters, dict):
             # Form: {'col': 'val'}
             for col, val in col_filters.items():
                 if not col or val is None: continue
-                lf = lf.filter(pl.col(col).cast(pl.Utf8).str.to_lowercase().str.contains(str(val).lower(), literal=True))
+                like_expr = pl.col(col).cast(pl.Utf8).str.to_lowercase().str.contains(str(val).lower(), literal=True)
+                lf = _narrowed_filter(lf, dataset, col, [str(val)], like_expr)
 
     # Selected IDs (for exports)
     selected_ids = params.get('selected_ids')
@@ -1099,9 +1338,16 @@ def apply_standard_processing(lf: pl.LazyFrame, params: dict) -> pl.LazyFrame:
                 selected_ids_str = [str(x) for x in selected_ids]
                 lf = lf.filter(pl.col("_id").cast(pl.Utf8).is_in(selected_ids_str))
 
-    # Time Filter
+    # Time Filter — native comparison on the canonical _ts column when the store has one
     time_col = get_primary_time_column(all_cols)
-    if time_col:
+    has_ts = TS_COL in all_cols
+    if has_ts:
+        # Time-sorted stores were already sliced to the window in step 0
+        for key, op in (('start_time', operator.ge), ('end_time', operator.le)):
+            bound = parse_time_boundary(params.get(key))
+            if bound and not time_sorted:
+                lf = lf.filter(op(pl.col(TS_COL), pl.lit(_as_utc(bound))))
+    elif time_col:
         lf = normalize_time_columns_in_df(lf)
         start_time = params.get('start_time')
         end_time = params.get('end_time')
@@ -1116,8 +1362,11 @@ def apply_standard_processing(lf: pl.LazyFrame, params: dict) -> pl.LazyFrame:
                 if p_end:
                      lf = lf.filter(pl.col(time_col).str.to_datetime(time_fmt, strict=False) <= pl.lit(p_end).dt.datetime())
 
-    # 3. Baseline Sort (for stable IDs)
-    if time_col:
+    # 3. Baseline Sort (for stable IDs) — time-sorted stores are already in this order
+    if has_ts:
+        if not time_sorted:
+            lf = lf.sort(TS_COL, descending=False, maintain_order=True)
+    elif time_col:
         time_fmt = "%Y-%m-%d %H:%M:%S"
         lf = lf.with_columns(
             pl.col(time_col).cast(pl.Int64, strict=False).alias("_epoch_tmp_")
@@ -1145,8 +1394,11 @@ def apply_standard_processing(lf: pl.LazyFrame, params: dict) -> pl.LazyFrame:
         else:
             try:
                 # Optimized sort: Try numeric first, then fallback to alpha
+                sort_expr = pl.col(sort_col)
+                if lf.collect_schema().get(sort_col) == pl.Categorical:
+                    sort_expr = sort_expr.cast(pl.Utf8)
                 lf = lf.sort(
-                    by=[pl.col(sort_col).cast(pl.Float64, strict=False), pl.col(sort_col)],
+                    by=[sort_expr.cast(pl.Float64, strict=False), sort_expr],
                     descending=[desc_user, desc_user]
                 )
             except:
@@ -1595,10 +1847,10 @@ def detect_execution_artifacts(df: pl.DataFrame) -> dict:
             # Check for execution-related columns in generic logs
             exec_patterns = []
             for col in df.columns:
-                if df.schema[col] == pl.Utf8:
+                if df.schema[col] in (pl.Utf8, pl.Categorical):
                     try:
                         matches = df.filter(
-                            pl.col(col).str.contains(
+                            pl.col(col).cast(pl.Utf8).str.contains(
                                 r"(?i)(shimcache|amcache|prefetch|appcompatcache|inventoryapplication)"
                             )
                         )
@@ -1621,11 +1873,14 @@ def detect_execution_artifacts(df: pl.DataFrame) -> dict:
         return {"error": str(e), "artifact_types_detected": []}
 
 
-def calculate_smart_risk_m4(df_parsed: pl.DataFrame, df_iocs: pl.DataFrame = None, sigma_hits: list = None) -> dict:
+def calculate_smart_risk_m4(df_parsed: pl.DataFrame, df_iocs: pl.DataFrame = None, sigma_hits: list = None,
+                            minute_counts: pl.DataFrame = None) -> dict:
     """
     Skill de Antigravity: Calcula el nivel de riesgo contextual de la evidencia.
     Ignora el tamaño del archivo y se centra en la Inteligencia de Amenazas y
     anomalías temporales usando Polars.
+    minute_counts: conteos por minuto ya agregados (columnas _bucket, event_count),
+    p. ej. desde el time cube; evita re-parsear y re-agrupar df_parsed.
     """
     risk_score = 0
     risk_factors = []
@@ -1671,7 +1926,10 @@ def calculate_smart_risk_m4(df_parsed: pl.DataFrame, df_iocs: pl.DataFrame = Non
         cols = df_parsed.collect_schema().names() if is_lazy else df_parsed.columns
         time_col = next((c for c in cols if c.lower() in ["timestamp", "time", "date", "eventtime", "trueeventtime", "@timestamp"]), None)
 
-        if time_col:
+        spikes = None
+        if time_col and minute_counts is not None:
+            spikes = minute_counts.rename({"_bucket": time_col})
+        elif time_col:
             # Polars exige que la tabla esté ordenada cronológicamente para group_by_dynamic
             try:
                 lf_time = df_parsed.lazy() if not is_lazy else df_parsed
@@ -1686,16 +1944,16 @@ def calculate_smart_risk_m4(df_parsed: pl.DataFrame, df_iocs: pl.DataFrame = Non
                     .agg(pl.len().alias("event_count"))
                 )
 
-                if spikes.height > 0:
-                    mean_events = spikes.select(pl.col("event_count").mean()).item()
-                    max_events = spikes.select(pl.col("event_count").max()).item()
+        if spikes is not None and spikes.height > 0:
+            mean_events = spikes.select(pl.col("event_count").mean()).item()
+            max_events = spikes.select(pl.col("event_count").max()).item()
 
-                    # Heurística de Pico: Si el minuto más activo tiene 5x más eventos que el promedio
-                    # y supera un umbral base (ej. 100 eventos/min), es una anomalía real.
-                    if mean_events > 0 and max_events > (mean_events * 5) and max_events > 100:
-                        risk_score += 20
-                        peak_time = spikes.filter(pl.col("event_count") == max_events).select(pl.col(time_col).first()).item()
-                        risk_factors.append(f"Anomalía Temporal: Ráfaga de {max_events} eventos/minuto detectada el {peak_time}. [+20 pts]")
+            # Heurística de Pico: Si el minuto más activo tiene 5x más eventos que el promedio
+            # y supera un umbral base (ej. 100 eventos/min), es una anomalía real.
+            if mean_events > 0 and max_events > (mean_events * 5) and max_events > 100:
+                risk_score += 20
+                peak_time = spikes.filter(pl.col("event_count") == max_events).select(pl.col(time_col).first()).item()
+                risk_factors.append(f"Anomalía Temporal: Ráfaga de {max_events} eventos/minuto detectada el {peak_time}. [+20 pts]")
     except Exception as e:
         risk_factors.append(f"Error al perfilar línea de tiempo: {str(e)}")
 
@@ -1752,7 +2010,7 @@ def extract_fallback_metrics(df: pl.DataFrame) -> dict:
     # 3. Top Rutas (Paths) - Usando regex rápido si están en un mensaje de texto
     if "message" in available_cols:
         path_regex = r"(/[a-zA-Z0-9_.-]+(?:/[a-zA-Z0-9_.-]+)+)"
-        paths_df = df.with_columns(pl.col("message").str.extract(path_regex, 1).alias("Extracted_Path")).drop_nulls(subset=["Extracted_Path"])
+        paths_df = df.with_columns(pl.col("message").cast(pl.Utf8).str.extract(path_regex, 1).alias("Extracted_Path")).drop_nulls(subset=["Extracted_Path"])
         if not paths_df.is_empty():
             top_paths = paths_df.group_by("Extracted_Path").len(name="count").sort("count", descending=True).head(5)
             metrics["Top_Paths"] = top_paths.to_dicts()
@@ -1787,9 +2045,9 @@ def generate_export_payloads(df: pl.DataFrame, yara_hits: list | None = None) ->
 
         try:
             df_iocs = (
-                df.filter(pl.col(msg_col).str.contains(ioc_regex))
+                df.filter(pl.col(msg_col).cast(pl.Utf8).str.contains(ioc_regex))
                 .with_columns(
-                    pl.col(msg_col).str.extract(ioc_regex, 1).alias("Extracted_IOC")
+                    pl.col(msg_col).cast(pl.Utf8).str.extract(ioc_regex, 1).alias("Extracted_IOC")
                 )
             )
             urls_unique = df_iocs.select(pl.col("Extracted_IOC").n_unique()).item()
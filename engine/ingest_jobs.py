@@ -0,0 +1,278 @@
+"""
+Chronos-DFIR Ingest Jobs — admission queue and progress for uploads.
+
+Every upload becomes an IngestJob. The upload handler creates it when it starts
+streaming the body (stage "uploading"), then hands the saved file to
+IngestJobManager.run(), which admits jobs in priority order (lower value
+first, FIFO within a priority) against two limits:
+
+- concurrency: at most INGEST_WORKERS jobs run at once (one per ingest worker
+  process, see engine/ingest_pool.py);
+- memory: each job reserves an estimate of its parse footprint (file size x
+  INGEST_RAM_FACTORS by extension, capped at STREAMED_RAM_CAP_MB for formats
+  streamed into the store) out of INGEST_RAM_BUDGET_MB (env
+  CHRONOS_INGEST_RAM_MB, default half of physical RAM). A job that does not fit
+  waits; one larger than the whole budget runs only when nothing else does.
+
+At most INGEST_MAX_PENDING jobs may wait (IngestQueueFull beyond that, HTTP 429).
+Jobs report stage / bytes / rows as they go; clients poll
+GET /api/ingest/jobs/{id} or follow GET /api/ingest/jobs/{id}/events (SSE), and
+DELETE cancels a job in any stage. Finished jobs are kept for
+INGEST_JOB_RETENTION seconds.
+"""
+import os
+import json
+import time
+import uuid
+import heapq
+import logging
+import itertools
+import threading
+from typing import Awaitable, Callable, Optional
+
+import anyio
+
+from engine.ingest_pool import INGEST_WORKERS, IngestCancelled
+
+logger = logging.getLogger("Chronos-DFIR")
+
+
+def _default_ram_budget_mb() -> int:
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2 ** 20 / 2)
+    except (ValueError, OSError, AttributeError):
+        return 4096
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        n = int(os.environ.get(name, "0"))
+    except ValueError:
+        n = 0
+    return n if n > 0 else default
+
+
+INGEST_RAM_BUDGET_MB = _env_int("CHRONOS_INGEST_RAM_MB", _default_ram_budget_mb())
+INGEST_MAX_PENDING = _env_int("CHRONOS_INGEST_MAX_PENDING", 64)
+# Peak parse memory per input byte; compressed / binary containers expand most
+INGEST_RAM_FACTORS = {".zip": 10, ".xlsx": 8, ".parquet": 6, ".evtx": 6, ".mft": 4}
+DEFAULT_RAM_FACTOR = 3
+# Formats streamed into the store (lazy scan + out-of-core sort, engine/session_store.py):
+# their footprint is bounded by the sort runs, not the file size
+STREAMED_EXTS = (".csv", ".parquet", ".jsonl", ".ndjson")
+STREAMED_RAM_CAP_MB = 2048
+DEFAULT_PRIORITY = 5
+INGEST_JOB_RETENTION = 3600
+# SSE: seconds between progress checks, and between keep-alive comments
+EVENT_POLL_INTERVAL = 0.5
+EVENT_KEEPALIVE = 15.0
+
+TERMINAL_STATUSES = ("done", "failed", "cancelled")
+
+
+class IngestQueueFull(Exception):
+    """Too many ingest jobs are already waiting."""
+
+
+def estimate_ram_mb(filename: str, size_bytes: int) -> int:
+    """Parse footprint estimate used for admission."""
+    ext = os.path.splitext(filename)[1].lower()
+    mb = max(1, int(size_bytes * INGEST_RAM_FACTORS.get(ext, DEFAULT_RAM_FACTOR) / 2 ** 20))
+    return min(mb, STREAMED_RAM_CAP_MB) if ext in STREAMED_EXTS else mb
+
+
+class IngestJob:
+    """One upload's ingest: status, progress fields and result."""
+
+    def __init__(self, filename: str, size_bytes: int = 0, priority: int = DEFAULT_PRIORITY):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.priority = priority
+        self.status = "uploading"  # uploading -> queued -> running -> done | failed | cancelled
+        self.stage = "uploading"
+        self.bytes_total = size_bytes
+        self.bytes_read = 0
+        self.rows = None
+        self.ram_mb = 0
+        self.error = None
+        self.result = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.version = 0  # bumped on every change (SSE)
+        self.cancel = threading.Event()  # seen by the upload loop and the ingest pool
+        self._admitted: Optional[anyio.Event] = None
+
+    def update(self, **fields) -> None:
+        """Set progress fields (may be called from the ingest pool threads)."""
+        for k, v in fields.items():
+            if v is not None:
+                setattr(self, k, v)
+        self.version += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id, "filename": self.filename, "priority": self.priority,
+            "status": self.status, "stage": self.stage,
+            "bytes_read": self.bytes_read, "bytes_total": self.bytes_total,
+            "rows": self.rows, "ram_mb": self.ram_mb, "error": self.error,
+            "result": self.result, "created": self.created, "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class IngestJobManager:
+    """Priority admission queue over running ingest jobs; see the module docstring."""
+
+    def __init__(self, max_running: int = INGEST_WORKERS, ram_budget_mb: int = INGEST_RAM_BUDGET_MB,
+                 max_pending: int = INGEST_MAX_PENDING):
+        self.max_running = max_running
+        self.ram_budget_mb = ram_budget_mb
+        self.max_pending = max_pending
+        self._jobs = {}
+        self._pending = []  # heap of (priority, seq, job)
+        self._seq = itertools.count()
+        self._running = 0
+        self._reserved_mb = 0
+        self._lock = threading.Lock()
+
+    def create(self, filename: str, size_bytes: int = 0, priority: int = DEFAULT_PRIORITY) -> IngestJob:
+        """Register a job for an upload that is about to be streamed."""
+        self._prune()
+        with self._lock:
+            if sum(1 for _, _, j in self._pending if j.status == "queued") >= self.max_pending:
+                raise IngestQueueFull(f"{self.max_pending} ingest jobs already waiting")
+            job = IngestJob(filename, size_bytes, priority)
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        return [j.to_dict() for j in sorted(self._jobs.values(), key=lambda j: j.created)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"running": self._running, "queued": sum(j.status == "queued" for _, _, j in self._pending),
+                    "max_running": self.max_running, "reserved_mb": self._reserved_mb,
+                    "ram_budget_mb": self.ram_budget_mb}
+
+    def _prune(self) -> None:
+        cutoff = time.time() - INGEST_JOB_RETENTION
+        with self._lock:
+            for job_id in [i for i, j in self._jobs.items() if j.finished and j.finished < cutoff]:
+                del self._jobs[job_id]
+
+    def _fits(self, job: IngestJob) -> bool:
+        if self._running >= self.max_running:
+            return False
+        return self._running == 0 or self._reserved_mb + job.ram_mb <= self.ram_budget_mb
+
+    def _admit(self) -> None:
+        """Start waiting jobs from the head of the queue while they fit (strict
+        priority order, so large jobs are not starved by smaller ones)."""
+        with self._lock:
+            while self._pending:
+                _, _, job = self._pending[0]
+                if job.status != "queued":
+                    heapq.heappop(self._pending)  # cancelled while waiting
+                    continue
+                if not self._fits(job):
+                    break
+                heapq.heappop(self._pending)
+                self._running += 1
+                self._reserved_mb += job.ram_mb
+                job.update(status="running", stage="starting", started=time.time())
+                job._admitted.set()
+
+    def _release(self, job: IngestJob) -> None:
+        """Give back a running job's slot and RAM reservation; admit the next ones."""
+        with self._lock:
+            self._running -= 1
+            self._reserved_mb -= job.ram_mb
+        self._admit()
+
+    def finish(self, job: IngestJob, status: str, **fields) -> None:
+        """Move job to a terminal status (done / failed / cancelled)."""
+        job.update(status=status, stage=status, finished=time.time(), **fields)
+
+    async def run(self, job: IngestJob, work: Callable[[IngestJob], Awaitable[dict]]) -> IngestJob:
+        """Queue job (its file is on disk), wait for admission, then await
+        work(job), whose return value becomes job.result. Never raises for job
+        failures: the outcome is in job.status / job.error."""
+        if job.cancel.is_set():
+            if job.status not in TERMINAL_STATUSES:
+                self.finish(job, "cancelled")
+            return job
+        job._admitted = anyio.Event()
+        job.ram_mb = estimate_ram_mb(job.filename, job.bytes_total)
+        job.update(status="queued", stage="queued")
+        with self._lock:
+            heapq.heappush(self._pending, (job.priority, next(self._seq), job))
+        self._admit()
+        try:
+            await job._admitted.wait()
+        except BaseException:
+            # The awaiting request went away while queued (or just as it was admitted)
+            if job.status == "queued":
+                self.finish(job, "cancelled")
+            elif job.status == "running":
+                self.finish(job, "cancelled")
+                self._release(job)
+            raise
+        if job.status != "running":
+            return job  # cancelled while queued
+        if job.cancel.is_set():
+            # Cancelled between admission and now: the work never starts
+            self.finish(job, "cancelled")
+            self._release(job)
+            return job
+        try:
+            result = await work(job)
+            self.finish(job, "done", result=result)
+        except IngestCancelled:
+            self.finish(job, "cancelled")
+        except Exception as e:
+            logger.error(f"Ingest job {job.id} ({job.filename}) failed: {e}")
+            self.finish(job, "failed", error=str(e))
+        except BaseException:
+            self.finish(job, "cancelled")
+            raise
+        finally:
+            self._release(job)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """Cancel a job in any stage: an upload stops streaming, a queued job
+        leaves the queue, a running parse has its worker killed."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job
+        job.cancel.set()
+        if job.status == "uploading":
+            self.finish(job, "cancelled")
+        elif job.status == "queued":
+            self.finish(job, "cancelled")
+            job._admitted.set()
+            self._admit()  # drops it from the queue head, admits the next one
+        return job
+
+    async def events(self, job: IngestJob):
+        """Server-sent events: one `data: <job json>` per change until the job ends."""
+        seen, idle = -1, 0.0
+        while True:
+            if job.version != seen:
+                seen = job.version
+                idle = 0.0
+                yield f"data: {json.dumps(job.to_dict(), default=str)}\n\n"
+                if job.status in TERMINAL_STATUSES:
+                    return
+            elif idle >= EVENT_KEEPALIVE:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await anyio.sleep(EVENT_POLL_INTERVAL)
+            idle += EVENT_POLL_INTERVAL
+
+
+ingest_jobs = IngestJobManager()
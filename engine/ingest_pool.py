@@ -0,0 +1,349 @@
+"""
+Chronos-DFIR Ingest Pool — supervised long-lived worker processes for ingest.
+
+Uploads used to start a fresh interpreter per file (python -c ...), paying for
+the Polars / engine / evtx imports every time and parsing results back from
+stdout. The pool keeps INGEST_WORKERS processes alive instead (env
+CHRONOS_INGEST_WORKERS): each one imports the ingest stack once and then runs
+jobs sent over its own pipe, returning structured (pickled) results.
+
+Crash isolation is kept: parsing still happens outside the uvicorn process. A
+worker that dies mid-job (segfault in a native parser, OOM kill) fails only
+that job with IngestWorkerCrashed and is respawned; a Python exception inside
+a job comes back as IngestJobError and leaves the worker running. Cancelling
+a running job kills its worker (IngestCancelled), which is respawned. Jobs can
+report_progress() back to the supervisor while they run. Workers are
+recycled after INGEST_MAX_JOBS jobs (env CHRONOS_INGEST_MAX_JOBS) so memory
+held by native allocators does not build up over a long session.
+
+Jobs are picklable module-level callables: ingest_file_job for generic files,
+forensic_timeline_job for MFT/EVTX artifacts, and the zip_*_job steps that
+ingest_bundle() fans out across every worker for ZIP triage bundles.
+"""
+import os
+import sys
+import time
+import queue
+import shutil
+import tempfile
+import logging
+import threading
+import traceback
+import multiprocessing
+import multiprocessing.connection
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.query_executor import wait_future
+
+logger = logging.getLogger("Chronos-DFIR")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        n = int(os.environ.get(name, "0"))
+    except ValueError:
+        n = 0
+    return n if n > 0 else default
+
+
+INGEST_WORKERS = _env_int("CHRONOS_INGEST_WORKERS", max(2, min(4, (os.cpu_count() or 2) // 2)))
+INGEST_MAX_JOBS = _env_int("CHRONOS_INGEST_MAX_JOBS", 50)
+# Grace period for a worker to exit on shutdown / recycle before it is killed
+WORKER_STOP_TIMEOUT = 5.0
+# How often a dispatcher thread re-checks its job's cancel flag (seconds)
+POLL_INTERVAL = 0.25
+
+
+class IngestJobError(RuntimeError):
+    """A job raised inside the worker; the message carries the worker traceback tail."""
+
+
+class IngestWorkerCrashed(RuntimeError):
+    """The worker process died while running the job (it has been respawned)."""
+
+
+class IngestCancelled(RuntimeError):
+    """The job was cancelled while running; its worker was killed and respawned."""
+
+
+# ── Jobs (run inside the worker processes) ────────────────────────────────────
+
+# Pipe to the supervisor while a worker runs jobs (None in the uvicorn process)
+_conn = None
+
+
+def report_progress(**fields) -> None:
+    """Send progress fields (stage, rows, ...) of the running job to the
+    supervisor; no-op outside a worker."""
+    if _conn is not None:
+        _conn.send(("progress", fields))
+
+
+def ingest_file_job(file_path: str, ext: str, dest_path: str) -> tuple:
+    """Parse an uploaded generic file and write its session store: (row_count, category)."""
+    from engine.ingestor import ingest_file, normalize_and_save
+    report_progress(stage="parsing")
+    lf, df, cat = ingest_file(file_path, ext)
+    report_progress(stage="writing", rows=df.height if df is not None else None)
+    rc = normalize_and_save(lf, df, dest_path)
+    report_progress(rows=rc)
+    return rc, cat
+
+
+def forensic_timeline_job(file_path: str, artifact_type: str, output_dir: str) -> dict:
+    """MFT/EVTX artifact -> unified timeline files; the skill's result dict."""
+    import json
+    from timeline_skill import generate_unified_timeline
+    report_progress(stage="parsing")
+    return json.loads(generate_unified_timeline(file_path, artifact_type, output_dir))
+
+
+def zip_plan_job(file_path: str, parts: int) -> list:
+    """Member batches of a ZIP bundle (engine.zip_bundle.plan_batches)."""
+    from engine.zip_bundle import plan_batches
+    return plan_batches(file_path, parts)
+
+
+def zip_batch_job(file_path: str, names: list, out_dir: str) -> tuple:
+    """Parse one batch of ZIP members to Arrow IPC parts in out_dir: (paths, rows, categories)."""
+    from engine.zip_bundle import write_batch
+    report_progress(stage="parsing")
+    return write_batch(file_path, names, out_dir)
+
+
+def zip_merge_job(paths: list, categories: list, dest_path: str) -> tuple:
+    """Stream the batches' Arrow parts into one session store: (row_count, category)."""
+    from engine.zip_bundle import merge_parts, bundle_category
+    from engine.ingestor import normalize_and_save
+    report_progress(stage="writing")
+    rc = normalize_and_save(merge_parts(paths), None, dest_path)
+    report_progress(rows=rc)
+    return rc, bundle_category(categories)
+
+
+def _warm_up() -> None:
+    """Import the ingest stack once per worker, before the first job arrives."""
+    import polars  # noqa: F401
+    import engine.ingestor  # noqa: F401
+    try:
+        import timeline_skill  # noqa: F401
+    except Exception as e:
+        logger.warning(f"Ingest worker: timeline_skill import failed: {e}")
+
+
+def _worker_main(conn, base_dir: str) -> None:
+    global _conn
+    _conn = conn
+    if base_dir not in sys.path:
+        sys.path.insert(0, base_dir)
+    _warm_up()
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+        fn, args = msg
+        try:
+            result = ("ok", fn(*args))
+        except Exception as e:
+            result = ("error", f"{type(e).__name__}: {e}", traceback.format_exc()[-2000:])
+        conn.send(result)
+
+
+# ── Supervisor (uvicorn process) ──────────────────────────────────────────────
+
+class _Worker:
+    def __init__(self, ctx, base_dir: str, index: int):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, base_dir), daemon=True,
+                                   name=f"chronos-ingest-{index}")
+        self.process.start()
+        child.close()
+        self.index = index
+        self.jobs = 0
+
+    def stop(self, timeout: float = WORKER_STOP_TIMEOUT) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class IngestPool:
+    """Fixed set of supervised worker processes; see the module docstring."""
+
+    def __init__(self, workers: int = INGEST_WORKERS, max_jobs: int = INGEST_MAX_JOBS,
+                 base_dir: str = BASE_DIR):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.base_dir = base_dir
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.Queue = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._dispatch = None
+        self._stats = {"completed": 0, "failed": 0, "crashed": 0, "cancelled": 0,
+                       "respawned": 0, "recycled": 0}
+
+    def start(self) -> None:
+        """Spawn the workers (idempotent); they warm up in the background."""
+        with self._lock:
+            if self._dispatch is not None:
+                return
+            # One dispatcher thread per worker: each waits on the worker it checked out
+            self._dispatch = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chronos-ingest")
+            for i in range(self.workers):
+                w = _Worker(self._ctx, self.base_dir, i)
+                self._all.append(w)
+                self._idle.put(w)
+        logger.info(f"Ingest pool started: {self.workers} worker processes")
+
+    def _replace(self, old: _Worker, reason: str) -> _Worker:
+        old.stop(timeout=0 if not old.process.is_alive() else WORKER_STOP_TIMEOUT)
+        new = _Worker(self._ctx, self.base_dir, old.index)
+        with self._lock:
+            self._all[self._all.index(old)] = new
+            self._stats[reason] += 1
+        return new
+
+    def _call(self, fn: Callable, args: tuple, cancel: Optional[threading.Event],
+              on_progress: Optional[Callable]):
+        """Run one job on a checked-out worker (dispatcher thread)."""
+        w = self._idle.get()
+        try:
+            if cancel is not None and cancel.is_set():
+                # Cancelled while queued for a worker: never hand it the job
+                with self._lock:
+                    self._stats["cancelled"] += 1
+                raise IngestCancelled(f"{getattr(fn, '__name__', fn)} cancelled")
+            if not w.process.is_alive():
+                w = self._replace(w, "respawned")
+            w.jobs += 1
+            w.conn.send((fn, args))
+            reply = None
+            while reply is None:
+                ready = multiprocessing.connection.wait([w.conn, w.process.sentinel], timeout=POLL_INTERVAL)
+                if cancel is not None and cancel.is_set():
+                    # Parsers are not interruptible: drop the worker with the job
+                    w.process.kill()
+                    w = self._replace(w, "respawned")
+                    with self._lock:
+                        self._stats["cancelled"] += 1
+                    raise IngestCancelled(f"{getattr(fn, '__name__', fn)} cancelled")
+                if not ready:
+                    continue
+                try:
+                    # A worker may exit right after answering: the answer wins
+                    msg = w.conn.recv() if w.conn.poll() else None
+                except (EOFError, OSError):
+                    msg = None
+                if msg is None:
+                    w.process.join(1.0)
+                    code = w.process.exitcode
+                    with self._lock:
+                        self._stats["crashed"] += 1
+                    w = self._replace(w, "respawned")
+                    raise IngestWorkerCrashed(
+                        f"Ingest worker crashed (exit code {code}) running {getattr(fn, '__name__', fn)}")
+                if msg[0] == "progress":
+                    if on_progress is not None:
+                        on_progress(msg[1])
+                    continue
+                reply = msg
+            if reply[0] == "error":
+                with self._lock:
+                    self._stats["failed"] += 1
+                raise IngestJobError(f"{reply[1]}\n{reply[2]}")
+            with self._lock:
+                self._stats["completed"] += 1
+            if w.jobs >= self.max_jobs:
+                w = self._replace(w, "recycled")
+            return reply[1]
+        finally:
+            self._idle.put(w)
+
+    async def run(self, fn: Callable, *args, cancel: Optional[threading.Event] = None,
+                  on_progress: Optional[Callable] = None):
+        """Run fn(*args) on a worker process and return its result. fn and args
+        must be picklable (module-level callables). Setting cancel kills the
+        worker running the job (IngestCancelled); on_progress(dict) receives the
+        job's report_progress() calls on a pool thread."""
+        self.start()
+        future = self._dispatch.submit(self._call, fn, args, cancel, on_progress)
+        await wait_future(future)
+        return future.result()
+
+    async def map(self, fn: Callable, arg_list: list, cancel: Optional[threading.Event] = None,
+                  on_progress: Optional[Callable] = None) -> list:
+        """fn(*args) for every tuple of arg_list, spread over the workers; the
+        results in order. A failing job raises once every job has finished."""
+        self.start()
+        futures = [self._dispatch.submit(self._call, fn, args, cancel, on_progress) for args in arg_list]
+        for future in futures:
+            await wait_future(future)
+        return [future.result() for future in futures]
+
+    async def ingest_bundle(self, file_path: str, dest_path: str, cancel: Optional[threading.Event] = None,
+                            on_progress: Optional[Callable] = None) -> tuple:
+        """ZIP bundle -> session store at dest_path: member batches parsed in parallel
+        on the workers, their Arrow parts merged by one more job: (row_count, category)."""
+        batches = await self.run(zip_plan_job, file_path, self.workers, cancel=cancel)
+        if not batches:
+            raise ValueError("ZIP contains no parseable files (.plist, .trc, .csv, .evtx, ...).")
+        out_dir = tempfile.mkdtemp(prefix=".bundle-", dir=os.path.dirname(os.path.abspath(dest_path)))
+        try:
+            results = await self.map(zip_batch_job, [(file_path, b, out_dir) for b in batches],
+                                     cancel=cancel, on_progress=on_progress)
+            paths = [p for r in results for p in r[0]]
+            if not paths:
+                raise ValueError("ZIP contains no parseable files (.plist, .trc, .csv, .evtx, ...).")
+            categories = sorted({c for r in results for c in r[2]})
+            logger.info(f"ZIP bundle {os.path.basename(file_path)}: {len(batches)} batches, "
+                        f"{sum(r[1] for r in results)} rows, {', '.join(categories)}")
+            return await self.run(zip_merge_job, paths, categories, dest_path,
+                                  cancel=cancel, on_progress=on_progress)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self.workers, "idle": self._idle.qsize(),
+                    "alive": sum(w.process.is_alive() for w in self._all), **self._stats}
+
+    def shutdown(self) -> None:
+        """Stop every worker; the pool can be started again afterwards."""
+        with self._lock:
+            dispatch, self._dispatch = self._dispatch, None
+            workers, self._all = self._all, []
+        if dispatch is None:
+            return
+        dispatch.shutdown(wait=True)
+        self._idle = queue.Queue()
+        t0 = time.perf_counter()
+        for w in workers:
+            w.stop(timeout=max(0.0, WORKER_STOP_TIMEOUT - (time.perf_counter() - t0)))
+
+
+ingest_pool = IngestPool()
+
+
+async def run_ingest(fn: Callable, *args, cancel: Optional[threading.Event] = None,
+                     on_progress: Optional[Callable] = None):
+    """Run an ingest job on the shared worker pool (see IngestPool.run)."""
+    return await ingest_pool.run(fn, *args, cancel=cancel, on_progress=on_progress)
+
+
+async def ingest_bundle(file_path: str, dest_path: str, cancel: Optional[threading.Event] = None,
+                        on_progress: Optional[Callable] = None) -> tuple:
+    """Ingest a ZIP bundle on the shared worker pool (see IngestPool.ingest_bundle)."""
+    return await ingest_pool.ingest_bundle(file_path, dest_path, cancel=cancel, on_progress=on_progress)
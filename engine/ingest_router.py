@@ -0,0 +1,54 @@
+"""
+Chronos-DFIR Ingest Router.
+
+Status, progress stream and cancellation of upload ingest jobs
+(engine/ingest_jobs.py). Jobs are created by POST /upload; with
+background=true the upload returns the job id as soon as the file is on disk.
+"""
+
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from engine.ingest_jobs import ingest_jobs
+from engine.ingest_pool import ingest_pool
+
+logger = logging.getLogger("Chronos-DFIR")
+
+ingest_router = APIRouter(prefix="/api/ingest", tags=["ingest"])
+
+
+def _not_found(job_id: str) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"error": f"Unknown ingest job {job_id}"})
+
+
+@ingest_router.get("/jobs")
+async def list_jobs():
+    """Recent jobs plus queue and worker pool load."""
+    return {"jobs": ingest_jobs.list(), "queue": ingest_jobs.stats(), "pool": ingest_pool.stats()}
+
+
+@ingest_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = ingest_jobs.get(job_id)
+    return job.to_dict() if job else _not_found(job_id)
+
+
+@ingest_router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent progress events; the stream ends with the job's final state."""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        return _not_found(job_id)
+    return StreamingResponse(
+        ingest_jobs.events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@ingest_router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = ingest_jobs.cancel(job_id)
+    return job.to_dict() if job else _not_found(job_id)
@@ -3,51 +3,79 @@ Chronos-DFIR Ingestor — Multi-format file parsing engine.
 Extracts data from CSV, XLSX, JSON, SQLite, Plist, PSList, TXT/LOG, TRC, ZIP, TSV, Parquet.
 All output is Polars DataFrame or LazyFrame. Zero pandas dependency.
 """
+import io
 import os
 import re
 import logging
+from typing import Optional
 import polars as pl
 from engine.forensic import ingest_json_file
+from engine.session_store import write_store
 
 logger = logging.getLogger("Chronos-DFIR")
 
 
+# Separator that does not occur in text: each line becomes one raw_line value
+_LINE_SEPARATOR = "\x1f"
+# Leading lines used for TXT format detection (command output / log shape)
+TXT_SNIFF_LINES = 200
+
+
+def _scan_lines(source) -> pl.LazyFrame:
+    """Every line of a text file (path, or the file's bytes) as a raw_line column
+    (null for blank lines), read by the Polars CSV reader: parallel, streamable,
+    invalid UTF-8 replaced."""
+    if (len(source) if isinstance(source, bytes) else os.path.getsize(source)) == 0:
+        return pl.LazyFrame(schema={"raw_line": pl.Utf8})
+    return pl.scan_csv(source, separator=_LINE_SEPARATOR, has_header=False, new_columns=["raw_line"],
+                       quote_char=None, infer_schema_length=0, ignore_errors=True,
+                       truncate_ragged_lines=True, encoding="utf8-lossy")
+
+
+def _unique_names(names: list) -> list:
+    seen = {}
+    out = []
+    for n in names:
+        k = seen.get(n, 0)
+        out.append(n if k == 0 else f"{n}_duplicated_{k - 1}")
+        seen[n] = k + 1
+    return out
+
+
+def _whitespace_fields_pattern(n_cols: int) -> str:
+    """Regex splitting a stripped line on whitespace into at most n_cols fields,
+    the last one keeping the rest of the line (re.split maxsplit semantics);
+    missing trailing fields do not participate (null)."""
+    if n_cols == 1:
+        return r"^(.+)$"
+    return r"^(\S+)" + r"(?:\s+(\S+))?" * (n_cols - 2) + r"(?:\s+(.+))?$"
+
+
+def _scan_whitespace_csv(file_path: str, lines: Optional[pl.LazyFrame] = None) -> pl.LazyFrame:
+    """Whitespace-separated file (pslist, log, command output) as a LazyFrame.
+    The first non-blank line is the header; each row is split on whitespace by
+    one regex kernel, short rows padded with '' and long rows folded into the
+    last column. lines: an existing _scan_lines() of the file."""
+    lines = _scan_lines(file_path) if lines is None else lines
+    text = (lines.select(pl.col("raw_line").str.strip_chars())
+            .filter(pl.col("raw_line").str.len_chars() > 0))
+    head = text.head(1).collect()
+    if head.is_empty():
+        return pl.LazyFrame()
+    headers = _unique_names(re.split(r'\s+', head["raw_line"][0]))
+    return (
+        text.slice(1)
+        .select(pl.col("raw_line").str.extract_groups(_whitespace_fields_pattern(len(headers)))
+                .struct.rename_fields(headers).alias("fields"))
+        .unnest("fields")
+        .with_columns(pl.all().fill_null(""))
+    )
+
+
 def _read_whitespace_csv(file_path: str) -> pl.DataFrame:
     """Read whitespace-separated files (pslist, log) without pandas.
     Splits on consecutive whitespace, handles bad lines gracefully."""
-    with open(file_path, 'r', errors='replace') as f:
-        lines = f.readlines()
-    if not lines:
-        return pl.DataFrame()
-    header_line = None
-    data_start = 0
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if stripped:
-            header_line = stripped
-            data_start = i + 1
-            break
-    if not header_line:
-        return pl.DataFrame()
-    headers = re.split(r'\s+', header_line)
-    n_cols = len(headers)
-    rows = []
-    for line in lines[data_start:]:
-        stripped = line.strip()
-        if not stripped:
-            continue
-        parts = re.split(r'\s+', stripped, maxsplit=n_cols - 1)
-        if len(parts) == n_cols:
-            rows.append(parts)
-        elif len(parts) > n_cols:
-            rows.append(parts[:n_cols])
-        else:
-            rows.append(parts + [''] * (n_cols - len(parts)))
-    if not rows:
-        return pl.DataFrame({h: [] for h in headers})
-    return pl.DataFrame(
-        {headers[i]: [row[i] for row in rows] for i in range(n_cols)}
-    )
+    return _scan_whitespace_csv(file_path).collect()
 
 
 def _sanitize_plist_val(v):
@@ -105,7 +133,11 @@ def ingest_file(file_path: str, ext: str) -> tuple:
         df_eager = pl.read_excel(file_path)
 
     elif ext in ['.pslist', '.txt', '.log', '.trc']:
-        df_eager, file_cat = _parse_text_file(file_path, ext)
+        parsed, file_cat = _parse_text_file(file_path, ext)
+        if isinstance(parsed, pl.LazyFrame):
+            lf = parsed
+        else:
+            df_eager = parsed
 
     elif ext == '.zip':
         df_eager, file_cat = _parse_zip_bundle(file_path)
@@ -117,28 +149,32 @@ def ingest_file(file_path: str, ext: str) -> tuple:
         df_eager = pl.read_csv(file_path, separator='\t', ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
 
     else:
-        df_eager, file_cat = _parse_csv_robust(file_path, file_cat)
-
-    # Volatility PSList fingerprint
-    if df_eager is not None:
-        cols_eager = df_eager.columns
-        if all(c in cols_eager for c in ["Offset(V)", "PPID", "Threads"]):
-            file_cat = "Memory/Volatility_PSList"
-            rename_map_vola = {}
-            if "CreateTime" in cols_eager:
-                rename_map_vola["CreateTime"] = "Time"
-            if rename_map_vola:
-                df_eager = df_eager.rename(rename_map_vola)
-            exprs = [pl.lit("Volatility_RAM_Process").alias("EventID")]
-            if "Name" in cols_eager and "PID" in cols_eager:
-                exprs.append(
-                    pl.concat_str([pl.col("Name"), pl.lit(" ["), pl.col("PID").cast(pl.Utf8), pl.lit("]")], separator="").alias("Destination_Entity")
-                )
-            if "PPID" in cols_eager:
-                exprs.append(
-                    pl.concat_str([pl.lit("PPID: "), pl.col("PPID").cast(pl.Utf8)], separator="").alias("Source_Entity")
-                )
-            df_eager = df_eager.with_columns(exprs)
+        lf, file_cat = _parse_csv_robust(file_path, file_cat)
+
+    # Volatility PSList fingerprint (eager parsers and lazy CSV scans alike)
+    data = lf if lf is not None else df_eager
+    cols_data = data.collect_schema().names() if lf is not None else data.columns
+    if all(c in cols_data for c in ["Offset(V)", "PPID", "Threads"]):
+        file_cat = "Memory/Volatility_PSList"
+        rename_map_vola = {}
+        if "CreateTime" in cols_data:
+            rename_map_vola["CreateTime"] = "Time"
+        if rename_map_vola:
+            data = data.rename(rename_map_vola)
+        exprs = [pl.lit("Volatility_RAM_Process").alias("EventID")]
+        if "Name" in cols_data and "PID" in cols_data:
+            exprs.append(
+                pl.concat_str([pl.col("Name"), pl.lit(" ["), pl.col("PID").cast(pl.Utf8), pl.lit("]")], separator="").alias("Destination_Entity")
+            )
+        if "PPID" in cols_data:
+            exprs.append(
+                pl.concat_str([pl.lit("PPID: "), pl.col("PPID").cast(pl.Utf8)], separator="").alias("Source_Entity")
+            )
+        data = data.with_columns(exprs)
+        if lf is not None:
+            lf = data
+        else:
+            df_eager = data
 
     # Post-processing: clean array formats and normalize IPv6
     if lf is not None:
@@ -220,8 +256,8 @@ def _normalize_ipv6_columns(data):
 
 
 def normalize_and_save(lf, df_eager, dest_path: str) -> int:
-    """Normalize column headers, add _id index, and write to CSV.
-    Returns row count (or -1 for lazy/unknown)."""
+    """Normalize column headers, add _id index, and write the Parquet session store
+    backing dest_path (see engine.session_store). Returns row count."""
     cols = lf.collect_schema().names() if lf is not None else df_eager.columns
     rename_mapping = {}
 
@@ -247,14 +283,11 @@ def normalize_and_save(lf, df_eager, dest_path: str) -> int:
         if rename_mapping:
             lf = lf.rename(rename_mapping)
         lf = lf.with_row_index(name="_id", offset=1)
-        df = lf.collect()
-        df.write_csv(dest_path)
-        return len(df)
+        return write_store(lf, dest_path)
     else:
         df_eager = df_eager.rename(rename_mapping)
         df_eager = df_eager.with_row_index(name="_id", offset=1)
-        df_eager.write_csv(dest_path)
-        return len(df_eager)
+        return write_store(df_eager, dest_path)
 
 
 # ─── Private parsers ────────────────────────────────────────────────
@@ -384,329 +417,255 @@ def _parse_schtasks(lines: list, header_idx: int) -> pl.DataFrame:
     return pl.DataFrame(records) if records else pl.DataFrame()
 
 
+# macOS Unified Log line: timestamp, host, process[pid]: message
+_UNIFIED_LOG_PATTERN = r"^(?P<timestamp>\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}\.\d+-\d{4})\s+(?P<host>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s*(?P<message>.*)$"
+# ls -la entry (macOS persistence triage)
+_LS_PATTERN = r"^(?P<perms>[-dlrwxst@+]{7,11}[+@]?)\s+(?P<links>\d+)\s+(?P<owner>\S+)\s+(?P<group>\S+)\s+(?P<size>\d+)\s+(?P<month>[A-Za-z]{3})\s+(?P<day>\d{1,2})\s+(?P<timestr>[\d:]+)\s+(?P<name>.+)$"
+
+
 def _parse_text_file(file_path: str, ext: str) -> tuple:
-    """Parse .txt, .log, .pslist, .trc files. Returns (df_eager, file_cat)."""
+    """Parse .txt, .log, .pslist, .trc files. Returns (DataFrame or LazyFrame, file_cat).
+
+    The file is read once into a raw_line column (_scan_lines); the format is
+    detected on its first TXT_SNIFF_LINES lines and log-sized formats (Unified
+    Log, ls triage, whitespace-separated) are parsed lazily with Polars string
+    kernels, so they stream into the store. Small command outputs (netstat, sc
+    query, systeminfo, schtasks) keep their line parsers over the same lines."""
     file_cat = "generic"
     try:
         if ext == '.trc':
-            records = _parse_trc_content(file_path)
-            if records:
-                return pl.DataFrame(records), "Trace/TRC"
-            return _read_whitespace_csv(file_path), file_cat
-
-        if ext == '.txt':
-            df_txt = pl.read_csv(file_path, separator="\x1f", has_header=False, new_columns=["raw_line"], ignore_errors=True)
-            # Attempt 1: macOS Unified Log format
-            regex_pattern = r"^(?P<timestamp>\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}\.\d+-\d{4})\s+(?P<host>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s*(?P<message>.*)$"
-            df_parsed = df_txt.select(
-                pl.col("raw_line").str.extract_groups(regex_pattern).alias("parsed")
-            ).unnest("parsed")
-            df_clean = df_parsed.drop_nulls(subset=["timestamp"])
-
-            if df_clean.height > 0:
-                df_eager = df_clean.rename({"timestamp": "Time", "process": "Source_Entity", "message": "Destination_Entity", "host": "Computer"})
-                df_eager = df_eager.with_columns(pl.lit("macOS_Unified_Log").alias("EventID"))
-                return df_eager, "macOS/Unified_Logs"
-
-            # Attempt 2: macOS persistence triage (ls -la output)
-            ls_pattern = r"^(?P<perms>[-dlrwxst@+]{7,11}[+@]?)\s+(?P<links>\d+)\s+(?P<owner>\S+)\s+(?P<group>\S+)\s+(?P<size>\d+)\s+(?P<month>[A-Za-z]{3})\s+(?P<day>\d{1,2})\s+(?P<timestr>[\d:]+)\s+(?P<name>.+)$"
-            lines = df_txt["raw_line"].to_list()
-            is_ls_triage = any(re.match(ls_pattern, l) for l in lines[:50] if l)
-
-            if is_ls_triage:
-                df_eager = _parse_ls_triage(lines, ls_pattern)
-                if df_eager is not None:
-                    return df_eager, "macOS/Persistence_Triage"
-
-            # Attempt 3: Detect common forensic TXT formats
-            raw_lines = []
-            with open(file_path, 'r', errors='replace') as f:
-                raw_lines = f.readlines()
-            fmt, hdr_idx = _detect_txt_format(raw_lines)
-
-            if fmt == "netstat":
-                df = _parse_netstat(raw_lines, hdr_idx)
-                if not df.is_empty():
-                    return df, "Network/Netstat"
-
-            elif fmt == "tasklist":
-                df = _read_whitespace_csv(file_path)
-                if not df.is_empty():
-                    df = df.with_columns(pl.lit("Tasklist_Process").alias("EventID"))
-                    return df, "Windows/Tasklist"
-
-            elif fmt == "ps_aux":
-                df = _read_whitespace_csv(file_path)
-                if not df.is_empty():
-                    df = df.with_columns(pl.lit("Linux_Process").alias("EventID"))
-                    return df, "Linux/ProcessList"
-
-            elif fmt == "sc_query":
-                df = _parse_sc_query(raw_lines)
-                if not df.is_empty():
-                    return df, "Windows/Services"
-
-            elif fmt == "systeminfo":
-                df = _parse_systeminfo(raw_lines)
-                if not df.is_empty():
-                    return df, "Windows/SystemInfo"
-
-            elif fmt == "schtasks":
-                df = _parse_schtasks(raw_lines, hdr_idx)
-                if not df.is_empty():
-                    return df, "Windows/ScheduledTasks"
-
-            elif fmt == "arp":
-                df = _read_whitespace_csv(file_path)
-                if not df.is_empty():
-                    df = df.with_columns(pl.lit("ARP_Entry").alias("EventID"))
-                    return df, "Network/ARP"
-
-            elif fmt == "route_print":
-                df = _read_whitespace_csv(file_path)
-                if not df.is_empty():
-                    df = df.with_columns(pl.lit("Route_Entry").alias("EventID"))
-                    return df, "Network/RouteTable"
-
-            elif fmt == "ipconfig":
-                df = _parse_systeminfo(raw_lines)  # Key-value works for ipconfig too
-                if not df.is_empty():
-                    return df, "Network/IPConfig"
-
-            elif fmt == "autoruns":
-                df = _read_whitespace_csv(file_path)
-                if not df.is_empty():
-                    df = df.with_columns(pl.lit("Autorun_Entry").alias("EventID"))
-                    return df, "Windows/Autoruns"
-
-            # Fallback: whitespace-separated
-            return _read_whitespace_csv(file_path), file_cat
-        else:
-            # .pslist / .log — try whitespace-separated
-            return _read_whitespace_csv(file_path), file_cat
+            return _parse_trc_content(file_path), "Trace/TRC"
+
+        if ext != '.txt':
+            # .pslist / .log — whitespace-separated
+            return _scan_whitespace_csv(file_path), file_cat
+
+        lines = _scan_lines(file_path)
+        sample = lines.head(TXT_SNIFF_LINES).collect()["raw_line"]
+
+        # Attempt 1: macOS Unified Log format
+        if sample.str.contains(_UNIFIED_LOG_PATTERN).any():
+            lf = (
+                lines.select(pl.col("raw_line").str.extract_groups(_UNIFIED_LOG_PATTERN).alias("parsed"))
+                .unnest("parsed")
+                .drop_nulls(subset=["timestamp"])
+                .rename({"timestamp": "Time", "process": "Source_Entity", "message": "Destination_Entity", "host": "Computer"})
+                .with_columns(pl.lit("macOS_Unified_Log").alias("EventID"))
+            )
+            return lf, "macOS/Unified_Logs"
+
+        # Attempt 2: macOS persistence triage (ls -la output)
+        if sample.head(50).str.contains(_LS_PATTERN).any():
+            return _parse_ls_triage(lines), "macOS/Persistence_Triage"
+
+        # Attempt 3: Detect common forensic TXT formats
+        raw_lines = sample.fill_null("").to_list()
+        fmt, hdr_idx = _detect_txt_format(raw_lines)
+        if fmt in ("netstat", "sc_query", "systeminfo", "schtasks", "ipconfig"):
+            raw_lines = lines.collect()["raw_line"].fill_null("").to_list()
+
+        if fmt == "netstat":
+            df = _parse_netstat(raw_lines, hdr_idx)
+            if not df.is_empty():
+                return df, "Network/Netstat"
+
+        elif fmt == "sc_query":
+            df = _parse_sc_query(raw_lines)
+            if not df.is_empty():
+                return df, "Windows/Services"
+
+        elif fmt == "systeminfo":
+            df = _parse_systeminfo(raw_lines)
+            if not df.is_empty():
+                return df, "Windows/SystemInfo"
+
+        elif fmt == "schtasks":
+            df = _parse_schtasks(raw_lines, hdr_idx)
+            if not df.is_empty():
+                return df, "Windows/ScheduledTasks"
+
+        elif fmt == "ipconfig":
+            df = _parse_systeminfo(raw_lines)  # Key-value works for ipconfig too
+            if not df.is_empty():
+                return df, "Network/IPConfig"
+
+        elif fmt in _WHITESPACE_TXT_FORMATS:
+            event_id, cat = _WHITESPACE_TXT_FORMATS[fmt]
+            lf = _scan_whitespace_csv(file_path, lines)
+            if lf.collect_schema().names():
+                return lf.with_columns(pl.lit(event_id).alias("EventID")), cat
+
+        # Fallback: whitespace-separated
+        return _scan_whitespace_csv(file_path, lines), file_cat
     except Exception as e:
         logger.error(f"Error reading pslist/txt: {e}")
-        lf = pl.scan_csv(file_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-        # Return as eager for consistency
-        return lf.collect(), file_cat
+        return pl.scan_csv(file_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True), file_cat
 
 
-def _parse_ls_triage(lines: list, ls_pattern: str):
-    """Parse ls -la output into a DataFrame."""
-    from datetime import datetime as _dt
-    records = []
-    current_section = "Unknown"
-    ls_re = re.compile(ls_pattern)
-    current_year = _dt.now().year
-    month_map = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
-                 "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
-
-    for raw in lines:
-        if not raw or not raw.strip():
-            continue
-        stripped = raw.strip()
-        if stripped.endswith(":") and "/" in stripped:
-            current_section = stripped.rstrip(":")
-            continue
-        if re.match(r"^total\s+\d+$", stripped):
-            continue
-        m = ls_re.match(stripped)
-        if m:
-            g = m.groupdict()
-            mo = month_map.get(g["month"].capitalize(), 1)
-            dy = int(g["day"])
-            if ":" in g["timestr"]:
-                hh, mm = g["timestr"].split(":")
-                ts = f"{current_year}-{mo:02d}-{dy:02d} {int(hh):02d}:{int(mm):02d}:00"
-            else:
-                ts = f"{g['timestr']}-{mo:02d}-{dy:02d} 00:00:00"
-            name = g["name"].strip()
-            if name in (".", ".."):
-                continue
-            parent = current_section if current_section != "Unknown" else ""
-            full_path = f"{parent}/{name}" if parent and not name.startswith("/") else name
-            records.append({
-                "Time": ts, "Permissions": g["perms"], "Links": g["links"],
-                "Owner": g["owner"], "Group": g["group"], "Size": g["size"],
-                "Month": g["month"], "Day": g["day"],
-                "Source_Entity": g["owner"], "Destination_Entity": full_path,
-                "EventID": "macOS_Persistence_Triage", "Section": current_section,
-                "Computer": "triage-host",
-            })
-        else:
-            records.append({
-                "Time": "", "Permissions": "", "Links": "", "Owner": "", "Group": "",
-                "Size": "", "Month": "", "Day": "", "Source_Entity": "",
-                "Destination_Entity": stripped, "EventID": "macOS_Persistence_Info",
-                "Section": current_section, "Computer": "triage-host",
-            })
+# Detected TXT formats that are whitespace tables: format -> (EventID, file category)
+_WHITESPACE_TXT_FORMATS = {
+    "tasklist": ("Tasklist_Process", "Windows/Tasklist"),
+    "ps_aux": ("Linux_Process", "Linux/ProcessList"),
+    "arp": ("ARP_Entry", "Network/ARP"),
+    "route_print": ("Route_Entry", "Network/RouteTable"),
+    "autoruns": ("Autorun_Entry", "Windows/Autoruns"),
+}
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
 
-    if records:
-        df = pl.DataFrame(records)
-        return df.filter(pl.col("Time").str.len_chars() > 0)
-    return None
+
+def _parse_ls_triage(lines: pl.LazyFrame) -> pl.LazyFrame:
+    """Parse ls -la output (raw_line column) into triage rows. Directory headers
+    ("/path:") set the Section of the entries below them (forward fill)."""
+    from datetime import datetime as _dt
+    s = pl.col("raw_line").str.strip_chars()
+    is_section = s.str.ends_with(":") & s.str.contains("/", literal=True)
+    g = pl.col("m").struct.field
+    mo = g("month").str.to_lowercase().replace_strict(_MONTHS, default=1, return_dtype=pl.Int32)
+    pad = lambda e: e.cast(pl.Utf8).str.zfill(2)
+    hm = g("timestr").str.split(":")
+    ts = (
+        pl.when(g("timestr").str.contains(":", literal=True))
+        .then(pl.format("{}-{}-{} {}:{}:00", pl.lit(str(_dt.now().year)), pad(mo), pad(g("day").cast(pl.Int32)),
+                        pad(hm.list.get(0, null_on_oob=True).cast(pl.Int32)),
+                        pad(hm.list.get(1, null_on_oob=True).cast(pl.Int32))))
+        .otherwise(pl.format("{}-{}-{} 00:00:00", g("timestr"), pad(mo), pad(g("day").cast(pl.Int32))))
+    )
+    name = g("name").str.strip_chars()
+    parent = pl.when(pl.col("Section") != "Unknown").then(pl.col("Section")).otherwise(pl.lit(""))
+    return (
+        lines.filter(s.str.len_chars() > 0)
+        .with_columns(
+            pl.when(is_section).then(s.str.strip_chars_end(":")).forward_fill().fill_null("Unknown").alias("Section"),
+            pl.when(~is_section).then(s.str.extract_groups(_LS_PATTERN)).alias("m"),
+        )
+        .filter(pl.col("m").struct.field("perms").is_not_null() & ~name.is_in([".", ".."]))
+        .select(
+            ts.alias("Time"), g("perms").alias("Permissions"), g("links").alias("Links"),
+            g("owner").alias("Owner"), g("group").alias("Group"), g("size").alias("Size"),
+            g("month").alias("Month"), g("day").alias("Day"), g("owner").alias("Source_Entity"),
+            pl.when((parent != "") & ~name.str.starts_with("/"))
+            .then(pl.format("{}/{}", parent, name)).otherwise(name).alias("Destination_Entity"),
+            pl.lit("macOS_Persistence_Triage").alias("EventID"), "Section",
+            pl.lit("triage-host").alias("Computer"),
+        )
+    )
 
 
 def _parse_zip_bundle(file_path: str) -> tuple:
-    """Parse a ZIP containing .plist or .trc files."""
-    import zipfile
-    import tempfile
-    import shutil
-    from pathlib import Path
-
-    extract_dir = tempfile.mkdtemp()
-    with zipfile.ZipFile(file_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_dir)
-
-    root = Path(extract_dir)
-    plist_files = list(root.rglob("*.plist"))
-    trc_files = list(root.rglob("*.trc"))
-
-    # Determine bundle type by majority file type
-    if trc_files and len(trc_files) >= len(plist_files):
-        result = _parse_zip_trc(trc_files)
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        if result is not None and not result.is_empty():
-            return result, "Trace/Bulk_TRC"
-        raise Exception("No valid .trc files found in the ZIP archive.")
-    elif plist_files:
-        result = _parse_zip_plist_files(plist_files)
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        if result is not None and not result.is_empty():
-            return result, "macOS/Bulk_Plist"
-        raise Exception("No valid .plist files found in the ZIP archive.")
-    else:
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        raise Exception("ZIP contains no supported files (.plist, .trc).")
+    """Parse a ZIP bundle member by member, without extracting it (engine.zip_bundle)."""
+    from engine.zip_bundle import read_bundle
+    df, file_cat = read_bundle(file_path)
+    if df is None or df.is_empty():
+        raise Exception("ZIP contains no parseable files (.plist, .trc, .csv, .evtx, ...).")
+    return df, file_cat
 
 
-def _parse_zip_plist_files(plist_files: list) -> pl.DataFrame:
-    """Parse a list of .plist file paths into a DataFrame."""
-    import plistlib
-    records = []
-    for plist_file in plist_files:
-        try:
-            with open(plist_file, 'rb') as f:
-                data = plistlib.load(f)
-            label = data.get('Label', 'UNKNOWN')
-            if isinstance(data.get('ProgramArguments'), list):
-                program_args = " ".join(str(x) for x in data.get('ProgramArguments'))
-            else:
-                program_args = str(data.get('ProgramArguments', data.get('Program', '')))
-            records.append({
-                "Source_File": str(plist_file.name),
-                "full_path": str(plist_file),
-                "EventID": label,
-                "Destination_Entity": program_args,
-                "run_at_load": str(data.get('RunAtLoad', False)),
-                "keep_alive": str(data.get('KeepAlive', False)),
-                "Time": "1970-01-01 00:00:00"
-            })
-        except Exception as e:
-            logger.error(f"Error parsing plist in zip: {e}")
-    return pl.DataFrame(records) if records else None
-
-
-def _parse_zip_trc(trc_files: list) -> pl.DataFrame:
-    """Parse a list of .trc file paths into a consolidated DataFrame."""
-    all_records = []
-    for trc_file in trc_files:
-        try:
-            records = _parse_trc_content(str(trc_file), str(trc_file.name))
-            all_records.extend(records)
-        except Exception as e:
-            logger.error(f"Error parsing .trc in zip [{trc_file.name}]: {e}")
-    return pl.DataFrame(all_records) if all_records else None
+# Timestamp prefixes of trace lines, tried in order:
+# Oracle "*** 2026-01-23T11:28:44.123456+00:00", ISO "2026-01-23 11:28:44.123", syslog "Jan 23 11:28:44"
+_TRC_TS_PATTERN = (r"^(?P<prefix>\*{3}\s+(?P<oracle>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[\.\d]*)"
+                   r"|(?P<iso>\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}[\.\d]*)"
+                   r"|(?P<syslog>[A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}))")
+TRC_MESSAGE_MAX = 2000
 
 
-def _parse_trc_content(file_path: str, source_name: str = "") -> list:
-    """Parse a single .trc file into a list of dicts.
+def _parse_trc_content(source, source_name: str = "") -> pl.LazyFrame:
+    """Parse a single .trc file (path, or its bytes with source_name) into
+    Trace_Entry rows (LazyFrame).
 
     Supports common trace formats:
     - Oracle .trc (timestamps + ORA errors)
     - SQL Server .trc (text traces)
     - Generic timestamped traces
-    """
-    records = []
-    timestamp_patterns = [
-        # Oracle: "*** 2026-01-23T11:28:44.123456+00:00"
-        re.compile(r"^\*{3}\s+(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[\.\d]*)"),
-        # Generic ISO: "2026-01-23 11:28:44.123"
-        re.compile(r"^(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}[\.\d]*)"),
-        # Syslog-style: "Jan 23 11:28:44"
-        re.compile(r"^([A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})"),
-    ]
-    source = source_name or os.path.basename(file_path)
-
-    with open(file_path, 'r', errors='replace') as f:
-        lines = f.readlines()
-
-    current_ts = ""
-    current_block = []
-
-    def flush_block():
-        if current_block:
-            message = " ".join(current_block).strip()
-            if message:
-                records.append({
-                    "Time": current_ts,
-                    "Source_File": source,
-                    "EventID": "Trace_Entry",
-                    "Message": message[:2000],
-                    "Level": _classify_trc_level(message),
-                })
 
-    for line in lines:
-        stripped = line.rstrip()
-        if not stripped:
-            continue
+    A line starting with a timestamp opens a block; the following lines (stack
+    traces, multi-line errors) are joined into its Message. Lines before the
+    first timestamp form a block without Time. One regex pass per line marks the
+    timestamps; blocks are assembled with a cumulative block id + group_by, so
+    the file streams at native speed. A file with no timestamp at all yields one
+    Trace_Line row per line."""
+    name = pl.lit(source_name or os.path.basename(source))
+    parsed = _trc_parse_lines(_scan_lines(source).with_row_index("Line", offset=1))
+    # Leading lines first (the scan stops early); the full pass only for traces without any
+    sample = _scan_lines(source).head(TXT_SNIFF_LINES).collect()["raw_line"]
+    has_ts = (sample.str.contains(_TRC_TS_PATTERN).any()
+              or parsed.select(pl.col("ts").is_not_null().any()).collect().item())
+    return _trc_entry_rows(parsed, name) if has_ts else _trc_line_rows(parsed, name)
+
+
+def _parse_trc_batch(traces: list) -> pl.LazyFrame:
+    """Parse many small traces [(path_in_bundle, bytes)] in one vectorized pass:
+    the same rows as _parse_trc_content per trace, plus Bundle_Path."""
+    paths, numbers, raw = [], [], []
+    for path, data in traces:
+        lines = data.decode("utf-8", "replace").split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        paths.extend([path] * len(lines))
+        numbers.extend(range(1, len(lines) + 1))
+        raw.extend(lines)
+    parsed = _trc_parse_lines(pl.LazyFrame({"Bundle_Path": paths, "Line": numbers, "raw_line": raw},
+                                           schema={"Bundle_Path": pl.Utf8, "Line": pl.UInt32, "raw_line": pl.Utf8}))
+    name = pl.col("Bundle_Path").str.extract(r"([^/]*)$")
+    has_ts = pl.col("ts").is_not_null().any().over("Bundle_Path")
+    return pl.concat([_trc_entry_rows(parsed.filter(has_ts), name, ["Bundle_Path"]),
+                      _trc_line_rows(parsed.filter(~has_ts), name, ["Bundle_Path"])], how="diagonal")
+
+
+def _trc_parse_lines(lines: pl.LazyFrame) -> pl.LazyFrame:
+    """Non-blank trace lines (s) with their timestamp (ts) and its prefix length."""
+    text = pl.col("raw_line").str.strip_chars_end()
+    m = pl.col("m").struct.field
+    return (
+        lines.filter(text.str.len_chars() > 0)
+        .with_columns(text.alias("s"))
+        .with_columns(pl.col("s").str.extract_groups(_TRC_TS_PATTERN).alias("m"))
+        .with_columns(pl.coalesce(m("oracle"), m("iso"), m("syslog")).str.strip_chars().alias("ts"),
+                      m("prefix").str.len_chars().alias("prefix_len"))
+        .drop("raw_line", "m")
+    )
 
-        # Try to match a timestamp at the start of the line
-        matched_ts = None
-        for pat in timestamp_patterns:
-            m = pat.match(stripped)
-            if m:
-                matched_ts = m.group(1).strip()
-                break
-
-        if matched_ts:
-            flush_block()
-            current_ts = matched_ts
-            # Rest of line after timestamp is the message start
-            rest = stripped[len(matched_ts):].strip().lstrip("*:- ")
-            current_block = [rest] if rest else []
-        else:
-            current_block.append(stripped)
 
-    flush_block()
+def _trc_line_rows(parsed: pl.LazyFrame, name: pl.Expr, keys: Optional[list] = None) -> pl.LazyFrame:
+    """Traces without timestamps: one Trace_Line row per line."""
+    message = pl.col("s").str.strip_chars()
+    return parsed.select(
+        pl.lit("").alias("Time"), name.alias("Source_File"), pl.lit("Trace_Line").alias("EventID"),
+        message.str.slice(0, TRC_MESSAGE_MAX).alias("Message"), _trc_level(message).alias("Level"),
+        pl.col("Line").cast(pl.Utf8), *(keys or []),
+    )
 
-    # If no timestamps found, treat each line as a record
-    if not records:
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            if stripped:
-                records.append({
-                    "Time": "",
-                    "Source_File": source,
-                    "EventID": "Trace_Line",
-                    "Message": stripped[:2000],
-                    "Level": _classify_trc_level(stripped),
-                    "Line": str(i + 1),
-                })
 
-    return records
+def _trc_entry_rows(parsed: pl.LazyFrame, name: pl.Expr, keys: Optional[list] = None) -> pl.LazyFrame:
+    """Timestamped traces: one Trace_Entry row per block (keys: one trace per key)."""
+    ts = pl.col("ts")
+    # Rest of a timestamp line after the timestamp is the message start
+    part = (pl.when(ts.is_not_null())
+            .then(pl.col("s").str.slice(pl.col("prefix_len")).str.strip_chars().str.strip_chars_start("*:- "))
+            .otherwise(pl.col("s")))
+    message = pl.col("Message")
+    # With keys (several traces), leading lines share the previous trace's block number, not its key
+    return (
+        parsed.with_columns(ts.is_not_null().cum_sum().alias("block"), part.alias("part"))
+        .group_by([*(keys or []), "block"], maintain_order=True)
+        .agg(ts.first().fill_null("").alias("Time"),
+             pl.col("part").filter(pl.col("part") != "").str.join(" ").str.strip_chars().alias("Message"))
+        .filter(message != "")
+        .select(
+            "Time", name.alias("Source_File"), pl.lit("Trace_Entry").alias("EventID"),
+            message.str.slice(0, TRC_MESSAGE_MAX), _trc_level(message).alias("Level"), *(keys or []),
+        )
+    )
 
 
-def _classify_trc_level(message: str) -> str:
+def _trc_level(message: pl.Expr) -> pl.Expr:
     """Classify trace message severity."""
-    msg_lower = message.lower()
-    if any(w in msg_lower for w in ['error', 'fatal', 'fail', 'exception', 'ora-', 'crash']):
-        return "Error"
-    if any(w in msg_lower for w in ['warn', 'timeout', 'retry', 'slow']):
-        return "Warning"
-    if any(w in msg_lower for w in ['debug', 'trace', 'verbose']):
-        return "Debug"
-    return "Info"
+    return (
+        pl.when(message.str.contains(r"(?i)error|fatal|fail|exception|ora-|crash")).then(pl.lit("Error"))
+        .when(message.str.contains(r"(?i)warn|timeout|retry|slow")).then(pl.lit("Warning"))
+        .when(message.str.contains(r"(?i)debug|trace|verbose")).then(pl.lit("Debug"))
+        .otherwise(pl.lit("Info"))
+    )
 
 
 def _parse_single_plist(file_path: str) -> pl.DataFrame:
@@ -731,29 +690,39 @@ def _parse_single_plist(file_path: str) -> pl.DataFrame:
     return pl.DataFrame(sanitized, strict=False).cast({c: pl.Utf8 for c in cols}, strict=False)
 
 
-def _parse_csv_robust(file_path: str, file_cat: str) -> tuple:
-    """Robust CSV reading with encoding fallback and headerless detection.
-    Uses read_csv (eager, no mmap) to avoid SIGBUS on freshly written files on APFS."""
-    try:
-        df = pl.read_csv(file_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-    except Exception:
-        try:
-            df = pl.read_csv(file_path, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True, encoding='utf8-lossy')
-        except Exception as final_e:
-            raise final_e
+# Bytes read up front to sniff a CSV's header row (and headerless-ness)
+CSV_SNIFF_BYTES = 4 * 2 ** 20
+# First-field shapes of headerless `ls -l` / find dumps (no real header row)
+_HEADERLESS_FIRST_FIELD = re.compile(r'^[-dlcbpst][-rwxst@+]{6,}')
 
-    # Detect headerless CSV: first column name looks like Unix permissions
-    try:
-        _first_col = df.columns[0]
-        if re.match(r'^[-dlcbpst][-rwxst@+]{6,}', _first_col) or _first_col.startswith('/'):
-            _n_cols = len(df.columns)
-            _new_cols = [f'Field_{i}' for i in range(_n_cols)]
-            try:
-                df = pl.read_csv(file_path, has_header=False, new_columns=_new_cols, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True)
-            except Exception:
-                df = pl.read_csv(file_path, has_header=False, new_columns=_new_cols, ignore_errors=True, infer_schema_length=0, truncate_ragged_lines=True, encoding='utf8-lossy')
-            file_cat = "FileSystem/LS_Triage"
-    except Exception:
-        pass
 
-    return df, file_cat
+def _sniff_csv(file_path: str) -> tuple:
+    """Header names and headerless-ness from the first CSV_SNIFF_BYTES: (columns, has_header)."""
+    with open(file_path, "rb") as f:
+        sample = f.read(CSV_SNIFF_BYTES)
+    if len(sample) == CSV_SNIFF_BYTES and b"\n" in sample:
+        sample = sample[:sample.rindex(b"\n") + 1]
+    cols = pl.read_csv(io.BytesIO(sample), n_rows=1, ignore_errors=True, infer_schema_length=0,
+                       truncate_ragged_lines=True, encoding='utf8-lossy').columns
+    first = cols[0] if cols else ""
+    has_header = not (_HEADERLESS_FIRST_FIELD.match(first) or first.startswith('/'))
+    return cols, has_header
+
+
+def _parse_csv_robust(file_path: str, file_cat: str) -> tuple:
+    """Lazy CSV scan with headerless detection: (LazyFrame, file_cat).
+
+    Header / headerless-ness come from a sniff of the first few MB, then the file
+    is read exactly once: scan_csv parses it in parallel batches and the session
+    store streams it to Parquet (write_store). utf8-lossy decoding is identical
+    to utf8 on valid input and never needs a second pass on invalid bytes.
+    Uploads are fsynced before ingest, so the memory-mapped scan cannot hit a
+    partially written file (the APFS SIGBUS that eager read_csv used to avoid)."""
+    cols, has_header = _sniff_csv(file_path)
+    new_columns = None
+    if not has_header:
+        new_columns = [f'Field_{i}' for i in range(len(cols))]
+        file_cat = "FileSystem/LS_Triage"
+    lf = pl.scan_csv(file_path, has_header=has_header, new_columns=new_columns, ignore_errors=True,
+                     infer_schema_length=0, truncate_ragged_lines=True, encoding='utf8-lossy')
+    return lf, file_cat
@@ -0,0 +1,42 @@
+"""
+Chronos-DFIR Page Codec — wire formats for grid pages served by /api/data.
+
+json (default)   row objects via FastAPI's encoder: {"data": [{col: value}, ...], ...}
+columnar-json    one array per column, serialized by Polars (no per-row Python
+                 objects): {"columns": [...], "data": {col: [values]}, ...}
+arrow            Arrow IPC stream of the page; the paging fields travel in
+                 X-Chronos-* response headers
+
+The paging fields (current_page, last_page, total, total_unfiltered,
+start_time, end_time) are the same in every format.
+"""
+import io
+import json
+import polars as pl
+
+PAGE_FORMATS = ("json", "columnar-json", "arrow")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+META_HEADER_PREFIX = "X-Chronos-"
+
+
+def columnar_json_bytes(df: pl.DataFrame, meta: dict) -> bytes:
+    """Page as a columnar JSON object: meta fields + column order + arrays."""
+    arrays = df.select(pl.all().implode()).write_json() if df.width else "[{}]"
+    head = json.dumps({**meta, "columns": df.columns}, default=str)
+    # write_json yields a one-row list: [{"col": [...], ...}]
+    return f'{head[:-1]}, "data": {arrays[1:-1]}}}'.encode("utf-8")
+
+
+def arrow_ipc_bytes(df: pl.DataFrame) -> bytes:
+    """Page as an Arrow IPC stream."""
+    buf = io.BytesIO()
+    df.write_ipc_stream(buf)
+    return buf.getvalue()
+
+
+def meta_headers(meta: dict) -> dict:
+    """Paging fields as response headers (X-Chronos-Total, ...); None values are skipped."""
+    return {
+        META_HEADER_PREFIX + "-".join(p.capitalize() for p in k.split("_")): str(v)
+        for k, v in meta.items() if v is not None
+    }
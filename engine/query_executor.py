@@ -0,0 +1,295 @@
+"""
+Chronos-DFIR Query Executor — bounded worker pool for dataset queries.
+
+Every Polars-heavy API handler (grid pages, empty columns, histograms, exports,
+forensic report) runs its work here instead of on the asyncio event loop, so one
+analyst's long export never freezes another analyst's grid. The event loop only
+does I/O.
+
+- QUERY_WORKERS threads run queries (env CHRONOS_QUERY_WORKERS, default: CPU
+  count clamped to 4..8; Polars parallelises inside each query).
+- Each endpoint class has its own concurrency cap (ENDPOINT_LIMITS, override with
+  env CHRONOS_QUERY_LIMITS="export=1,histogram=2"). Requests over the cap wait
+  on the event loop without holding a worker thread, so slow exports can occupy
+  at most their cap and the grid always keeps free workers. Caps and wake-ups
+  go through anyio, so the executor works under asyncio and trio alike.
+- stats() reports running / waiting / completed counts and wait times per
+  endpoint plus the pool queue depth (GET /api/query_stats).
+
+Superseded queries: a request tagged with a view_id (one per browser tab)
+replaces any in-flight request of the same endpoint and view. The older
+request is answered at once with QuerySuperseded; if it is still queued its
+work never starts, and if it is running it stops at its next collect() /
+check_cancelled() stage boundary. Until then it keeps its endpoint slot and
+counts as running (and "abandoned" in stats()), so superseded work can never
+push an endpoint past its cap.
+"""
+import os
+import time
+import logging
+import threading
+import functools
+from typing import Callable, Optional
+
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import anyio
+import anyio.from_thread
+import polars as pl
+from anyio.lowlevel import RunVar, current_token
+
+logger = logging.getLogger("Chronos-DFIR")
+
+
+def _env_workers() -> int:
+    try:
+        n = int(os.environ.get("CHRONOS_QUERY_WORKERS", "0"))
+    except ValueError:
+        n = 0
+    return n if n > 0 else max(4, min(8, os.cpu_count() or 4))
+
+
+def _env_limits(raw: str) -> dict:
+    """'export=1,histogram=2' -> {'export': 1, 'histogram': 2}; bad entries are ignored."""
+    limits = {}
+    for part in (raw or "").split(","):
+        name, _, value = part.partition("=")
+        try:
+            if name.strip() and int(value) > 0:
+                limits[name.strip()] = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring CHRONOS_QUERY_LIMITS entry '{part}'")
+    return limits
+
+
+QUERY_WORKERS = _env_workers()
+# Concurrent queries per endpoint class; classes not listed may use every worker
+ENDPOINT_LIMITS = {
+    "grid": QUERY_WORKERS,
+    "empty_columns": max(1, QUERY_WORKERS // 2),
+    "histogram": max(1, QUERY_WORKERS // 2),
+    "timeseries": max(1, QUERY_WORKERS // 4),
+    "export": max(1, QUERY_WORKERS // 4),
+    "report": max(1, QUERY_WORKERS // 2),
+    **_env_limits(os.environ.get("CHRONOS_QUERY_LIMITS", "")),
+}
+
+
+# Limiters belong to one event loop run (asyncio or trio); tests start several
+_LIMITERS = RunVar("chronos_query_limiters")
+# Job of the query running on the current worker thread
+_local = threading.local()
+
+
+class QuerySuperseded(Exception):
+    """The request was replaced by a newer one for the same endpoint and view."""
+
+
+class QueryCancelled(BaseException):
+    """Raised on the worker of a superseded query at its next check point.
+    BaseException so the handlers' broad `except Exception` blocks let it through."""
+
+
+def check_cancelled() -> None:
+    """Stop the current query if it was superseded (no-op outside the executor)."""
+    job = getattr(_local, "job", None)
+    if job is not None and job["cancel"].is_set():
+        raise QueryCancelled()
+
+
+def collect(lf: pl.LazyFrame, **kwargs) -> pl.DataFrame:
+    """lf.collect(**kwargs) bracketed by check_cancelled(), so a superseded query
+    stops at the next collect stage. A running collect is not interrupted:
+    cancelling an in-process Polars query (collect(background=True).cancel())
+    can abort the interpreter later on."""
+    check_cancelled()
+    df = lf.collect(**kwargs)
+    check_cancelled()
+    return df
+
+
+async def wait_future(future: Future, wake: Optional[anyio.Event] = None) -> None:
+    """Wait for a concurrent.futures Future without blocking the event loop
+    (asyncio or trio). wake: event that also ends the wait early when set by
+    someone else. Cancelling the wait cancels the future if it has not started."""
+    wake = wake or anyio.Event()
+    token, loop_thread = current_token(), threading.get_ident()
+
+    def on_done(_):
+        # Runs inline on the loop thread when the future is already done
+        if threading.get_ident() != loop_thread:
+            try:
+                anyio.from_thread.run_sync(wake.set, token=token)
+            except Exception:
+                pass  # event loop already gone (result abandoned)
+
+    future.add_done_callback(on_done)
+    try:
+        if not future.done():
+            await wake.wait()
+    except BaseException:
+        future.cancel()  # drops it if no worker has picked it up yet
+        raise
+
+
+class QueryExecutor:
+    """Thread pool plus per-endpoint caps; see the module docstring."""
+
+    def __init__(self, workers: int = QUERY_WORKERS, limits: dict = None):
+        self.workers = workers
+        self.limits = dict(ENDPOINT_LIMITS if limits is None else limits)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chronos-query")
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._queued = 0  # submitted to the pool, not yet picked up by a worker
+        self._latest = {}  # (endpoint, view_id) -> job of the newest request
+
+    def _limiter(self, endpoint: str) -> anyio.CapacityLimiter:
+        try:
+            limiters = _LIMITERS.get()
+        except LookupError:
+            limiters = {}
+            _LIMITERS.set(limiters)
+        if endpoint not in limiters:
+            limiters[endpoint] = anyio.CapacityLimiter(self.limits.get(endpoint, self.workers))
+        return limiters[endpoint]
+
+    @staticmethod
+    async def _wait(future: Future, job: dict):
+        """Await a pool future; returns early, leaving the worker to stop on its
+        own, if the job is superseded meanwhile."""
+        await wait_future(future, job["wake"])
+        if job["cancel"].is_set():
+            future.cancel()
+            raise QuerySuperseded()
+        return future.result()
+
+    def _endpoint_stats(self, endpoint: str) -> dict:
+        if endpoint not in self._stats:
+            self._stats[endpoint] = {"running": 0, "waiting": 0, "abandoned": 0, "completed": 0,
+                                     "failed": 0, "superseded": 0, "wait_ms_total": 0.0,
+                                     "wait_ms_max": 0.0, "run_ms_total": 0.0}
+        return self._stats[endpoint]
+
+    def _call(self, st: dict, job: dict, fn: Callable, args: tuple, kwargs: dict):
+        with self._lock:
+            self._queued -= 1
+            job["started"] = True
+        t0 = time.perf_counter()
+        _local.job = job
+        try:
+            check_cancelled()
+            return fn(*args, **kwargs)
+        finally:
+            _local.job = None
+            with self._lock:
+                st["run_ms_total"] += (time.perf_counter() - t0) * 1000
+
+    def _release_when_done(self, future: Future, limiter: anyio.CapacityLimiter,
+                           borrower: object, st: dict) -> None:
+        """Keep the slot of a request answered while its worker still runs
+        (superseded or cancelled) until the worker returns."""
+        token, loop_thread = current_token(), threading.get_ident()
+        with self._lock:
+            st["abandoned"] += 1
+
+        def on_done(_):
+            with self._lock:
+                st["running"] -= 1
+                st["abandoned"] -= 1
+            if threading.get_ident() == loop_thread:
+                limiter.release_on_behalf_of(borrower)  # already done: inline call
+                return
+            try:
+                anyio.from_thread.run_sync(limiter.release_on_behalf_of, borrower, token=token)
+            except Exception:
+                pass  # event loop already gone, and its limiters with it
+
+        future.add_done_callback(on_done)
+
+    async def run(self, endpoint: str, fn: Callable, *args, view_id: Optional[str] = None, **kwargs):
+        """Run fn(*args, **kwargs) on a worker once endpoint is under its cap.
+        With a view_id, an in-flight request for the same (endpoint, view_id) is
+        superseded; this one raises QuerySuperseded if a newer one arrives."""
+        # cancel: seen by the worker (check_cancelled / collect); wake: ends the await
+        job = {"started": False, "cancel": threading.Event(), "wake": anyio.Event()}
+        key = (endpoint, view_id) if view_id else None
+        with self._lock:
+            st = self._endpoint_stats(endpoint)
+            st["waiting"] += 1
+            previous = self._latest.get(key) if key else None
+            if key:
+                self._latest[key] = job
+        if previous is not None:
+            previous["cancel"].set()
+            previous["wake"].set()
+        t0 = time.perf_counter()
+        limiter, borrower = self._limiter(endpoint), object()
+        admitted, future = False, None
+        try:
+            await limiter.acquire_on_behalf_of(borrower)
+            wait_ms = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                st["waiting"] -= 1
+                st["running"] += 1
+                st["wait_ms_total"] += wait_ms
+                st["wait_ms_max"] = max(st["wait_ms_max"], wait_ms)
+                self._queued += 1
+            admitted = True
+            if job["cancel"].is_set():
+                raise QuerySuperseded()  # superseded while waiting for its cap
+            future = self._pool.submit(functools.partial(self._call, st, job, fn, args, kwargs))
+            result = await self._wait(future, job)
+            with self._lock:
+                st["completed"] += 1
+            return result
+        except QuerySuperseded:
+            with self._lock:
+                st["superseded"] += 1
+            raise QuerySuperseded(f"{endpoint} request superseded for view {view_id}") from None
+        except BaseException:
+            with self._lock:
+                st["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                if not admitted:
+                    st["waiting"] -= 1
+                elif future is None or future.cancelled():  # never reached a worker
+                    self._queued -= 1
+                if key and self._latest.get(key) is job:
+                    del self._latest[key]
+            if admitted:
+                if future is not None and not future.done():
+                    self._release_when_done(future, limiter, borrower, st)
+                else:
+                    with self._lock:
+                        st["running"] -= 1
+                    limiter.release_on_behalf_of(borrower)
+
+    def stats(self) -> dict:
+        """Snapshot: pool size, queue depth and per-endpoint counters."""
+        with self._lock:
+            endpoints = {
+                name: {**st, "limit": self.limits.get(name, self.workers),
+                       "wait_ms_avg": round(st["wait_ms_total"] / max(1, st["completed"] + st["failed"]), 2),
+                       "wait_ms_total": round(st["wait_ms_total"], 2),
+                       "wait_ms_max": round(st["wait_ms_max"], 2),
+                       "run_ms_total": round(st["run_ms_total"], 2)}
+                for name, st in self._stats.items()
+            }
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": sum(st["running"] for st in self._stats.values()),
+                "waiting": sum(st["waiting"] for st in self._stats.values()),
+                "endpoints": endpoints,
+            }
+
+
+query_executor = QueryExecutor()
+
+
+async def run_query(endpoint: str, fn: Callable, *args, view_id: Optional[str] = None, **kwargs):
+    """Run a blocking dataset query on the shared executor (see QueryExecutor.run)."""
+    return await query_executor.run(endpoint, fn, *args, view_id=view_id, **kwargs)
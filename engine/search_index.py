@@ -0,0 +1,243 @@
+"""
+Chronos-DFIR Search Index — ingest-time substring indexes for Global Search and
+column filters.
+
+Two optional sidecars are written next to each processed Parquet store:
+
+``<name>.tokens.parquet`` — inverted token index. Maps (column, lowercased word
+token ``\\w+``) to the sorted ``_id`` list of rows containing it, for every
+string column. Global Search semantics stay the same (case-insensitive
+substring per query token, AND across tokens, OR across columns):
+
+* A query token made of word characters only can never span a separator, so the
+  rows matching it are exactly the union of postings of every vocabulary token
+  that contains it. No row data is read.
+* A token with separators (paths, IPs, ``user@host``) is split into its word
+  pieces; per column, the intersection of their postings is a superset of the
+  matches and only those candidate rows are verified with ``str.contains``.
+
+``<name>.trigrams.parquet`` — trigram index over the high-value free-text
+columns (TRIGRAM_COLUMNS). Maps (column, lowercased 3-char gram) to row ids.
+Any substring of length >= 3 narrows to the intersection of its grams'
+postings; used by ``like``/``regex`` column filters and to tighten the
+separator case of Global Search on those columns. Values longer than
+TRIGRAM_MAX_VALUE_LEN are not split into grams; their ids are stored under a
+null gram and are always candidates.
+
+Row-id lists are stored sorted in zstd Parquet files (no roaring dependency).
+"""
+import os
+import logging
+from typing import Optional
+import polars as pl
+
+logger = logging.getLogger("Chronos-DFIR")
+
+SEARCH_INDEX_ENABLED = os.environ.get("CHRONOS_SEARCH_INDEX", "1") != "0"
+SEARCH_INDEX_EXT = ".tokens.parquet"
+TRIGRAM_INDEX_EXT = ".trigrams.parquet"
+TOKEN_PATTERN = r"\w+"
+
+# Free-text columns where analysts hunt for arbitrary fragments
+TRIGRAM_COLUMNS = ("CommandLine", "Image", "Destination_Entity", "Message", "URL")
+TRIGRAM_MAX_VALUE_LEN = 4096
+
+
+def search_index_path(store_file: str) -> str:
+    """Sidecar path for the token index of a Parquet store."""
+    return os.path.splitext(store_file)[0] + SEARCH_INDEX_EXT
+
+
+def trigram_index_path(store_file: str) -> str:
+    """Sidecar path for the trigram index of a Parquet store."""
+    return os.path.splitext(store_file)[0] + TRIGRAM_INDEX_EXT
+
+
+def trigram_columns(columns: list) -> list:
+    """Columns (case-insensitive match on TRIGRAM_COLUMNS) that get a trigram index."""
+    wanted = {c.lower() for c in TRIGRAM_COLUMNS}
+    return [c for c in columns if c.lower() in wanted]
+
+
+def _write_postings(postings: pl.DataFrame, dest: str) -> None:
+    tmp = dest + ".tmp"
+    try:
+        postings.write_parquet(tmp, compression="zstd", statistics=True)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def build_search_index(df: pl.DataFrame, columns: list, dest: str) -> int:
+    """Tokenize the given string columns of df and write the token postings file.
+    df must carry the _id values readers will see. Returns the vocabulary size."""
+    parts = [
+        df.lazy().select(
+            pl.lit(c).alias("column"),
+            pl.col(c).cast(pl.Utf8).str.to_lowercase().str.extract_all(TOKEN_PATTERN).alias("token"),
+            pl.col("_id").cast(pl.Int64),
+        )
+        for c in columns
+    ]
+    postings = (
+        pl.concat(parts)
+        .explode("token")
+        .drop_nulls("token")
+        .unique()
+        .group_by(["column", "token"])
+        .agg(pl.col("_id").sort().alias("ids"))
+        .sort(["column", "token"])
+        .collect(engine="streaming")
+    )
+    _write_postings(postings, dest)
+    return postings.height
+
+
+def build_trigram_index(df: pl.DataFrame, columns: list, dest: str) -> int:
+    """Write (column, gram) -> ids postings for the given columns. Grams are
+    generated once per distinct value. Returns the number of postings."""
+    parts = []
+    for c in columns:
+        values = (
+            df.lazy()
+            .select(pl.col("_id").cast(pl.Int64), pl.col(c).cast(pl.Utf8).str.to_lowercase().alias("v"))
+            .drop_nulls("v")
+            .with_columns(pl.col("v").str.len_chars().alias("n"))
+        )
+        grams = (
+            values.filter(pl.col("n").is_between(3, TRIGRAM_MAX_VALUE_LEN))
+            .group_by("v")
+            .agg(pl.col("_id"))
+            .with_columns(pl.int_ranges(0, pl.col("v").str.len_chars() - 2).alias("off"))
+            .explode("off")
+            .select(pl.col("v").str.slice(pl.col("off"), 3).alias("gram"), "_id")
+            .explode("_id")
+        )
+        overlong = (
+            values.filter(pl.col("n") > TRIGRAM_MAX_VALUE_LEN)
+            .select(pl.lit(None, dtype=pl.Utf8).alias("gram"), "_id")
+        )
+        parts.append(pl.concat([grams, overlong]).with_columns(pl.lit(c).alias("column")))
+    postings = (
+        pl.concat(parts)
+        .unique()
+        .group_by(["column", "gram"])
+        .agg(pl.col("_id").sort().alias("ids"))
+        .sort(["column", "gram"], nulls_last=True)
+        .collect(engine="streaming")
+    )
+    _write_postings(postings, dest)
+    return postings.height
+
+
+def _pieces(token: str) -> list:
+    return pl.Series([token]).str.extract_all(TOKEN_PATTERN).item().to_list()
+
+
+def trigram_ids(trigram_file: str, column: str, literal: str) -> Optional[pl.Series]:
+    """Candidate ids whose lowercased value in column may contain literal.
+    None if literal is too short to narrow (fewer than 3 chars)."""
+    lowered = literal.lower()
+    grams = list({lowered[i:i + 3] for i in range(len(lowered) - 2)})
+    if not grams:
+        return None
+    lf = pl.scan_parquet(trigram_file).filter(pl.col("column") == column)
+    matched = (
+        lf.filter(pl.col("gram").is_in(grams))
+        .select(pl.col("ids").explode().alias("_id"))
+        .group_by("_id")
+        .agg(pl.len().alias("n"))
+        .filter(pl.col("n") == len(grams))
+        .select("_id")
+    )
+    overlong = lf.filter(pl.col("gram").is_null()).select(pl.col("ids").explode().alias("_id"))
+    return pl.concat([matched, overlong]).collect().to_series()
+
+
+# Regex syntax Python's re and the Rust regex crate behind Polars read differently
+# (character classes, groups / flags / alternation, counted repetition): never narrowed
+_REGEX_UNCERTAIN = frozenset("[](){}|")
+# Escapes both dialects read as one unknown character (or a word boundary)
+_REGEX_CLASS_ESCAPES = frozenset("dDwWsSbB")
+
+
+def regex_literals(pattern: str) -> list:
+    """Literal runs every match of pattern must contain. Only syntax the Rust
+    regex dialect (what Polars runs) reads unambiguously is understood: plain and
+    escaped-punctuation literals, . ^ $, \\d \\w \\s \\b and the ? * + quantifiers.
+    Anything else yields no runs, so the caller keeps the full scan."""
+    runs, current = [], []
+
+    def end_run():
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch in _REGEX_UNCERTAIN or ch in "?*+":
+            return []
+        if ch == "\\":
+            nxt = pattern[i + 1:i + 2]
+            if nxt.isascii() and nxt and not nxt.isalnum():
+                lit = nxt
+            elif nxt and nxt in _REGEX_CLASS_ESCAPES:
+                lit = None
+            else:
+                return []
+            i += 2
+        else:
+            lit = None if ch in ".^$" else ch
+            i += 1
+        quantifier = pattern[i:i + 1]
+        if quantifier and quantifier in "?*+":
+            i += 1
+            if pattern[i:i + 1] == "?":  # lazy
+                i += 1
+            if quantifier == "+" and lit is not None:
+                current.append(lit)
+            end_run()
+        elif lit is None:
+            end_run()
+        else:
+            current.append(lit)
+    end_run()
+    return runs
+
+
+def token_candidates(index_file: str, token: str, trigram_file: Optional[str] = None,
+                     tri_cols: Optional[list] = None) -> Optional[tuple]:
+    """
+    Resolve one lowercased Global Search token against the token index.
+    Returns (ids, exact): exact=True means ids are precisely the rows whose indexed
+    columns contain token; otherwise ids is a candidate superset to verify.
+    Returns None when the token has no word characters (index cannot help).
+    """
+    pieces = list(dict.fromkeys(_pieces(token)))
+    if not pieces:
+        return None
+    exact = pieces == [token]
+    vocab = pl.scan_parquet(index_file)
+    hits = pl.concat([
+        vocab.filter(pl.col("token").str.contains(p, literal=True))
+        .select("column", pl.lit(i).alias("piece"), pl.col("ids").alias("_id"))
+        .explode("_id")
+        for i, p in enumerate(pieces)
+    ])
+    # Per column: rows whose tokens cover every piece
+    per_col = (
+        hits.unique()
+        .group_by(["column", "_id"])
+        .agg(pl.len().alias("n"))
+        .filter(pl.col("n") == len(pieces))
+        .select("column", "_id")
+        .collect()
+    )
+    if not exact and trigram_file and tri_cols:
+        for c in tri_cols:
+            tri = trigram_ids(trigram_file, c, token)
+            if tri is not None:
+                per_col = per_col.filter((pl.col("column") != c) | pl.col("_id").is_in(tri.implode()))
+    return per_col["_id"].unique(), exact
@@ -0,0 +1,606 @@
+"""
+Chronos-DFIR Session Store — columnar persistence for ingested timelines.
+
+Every ingested artifact is identified by its logical processed filename
+(``import_<name>_<ts>.csv`` / ``Timeline_<type>_<ts>.csv``). That handle is what
+the frontend, the case DB and the API URLs keep using, but the data itself is
+stored next to it as a typed, zstd-compressed Parquet file with row groups
+sized for scanning. CSV is only materialized on export.
+
+Legacy sessions (or files dropped into chronos_output by hand) that only have
+the CSV are still readable through the same entry points.
+
+Open datasets are tracked in a process-wide registry of DatasetHandle objects
+keyed by processed filename. Encoding, schema, row count and file version are
+resolved once (at ingest, or on first access) and only re-resolved when the
+backing file changes on disk.
+
+Stores that carry the canonical _ts column are written physically sorted by it
+(stable, nulls first, _id preserved) together with a small sidecar index of
+per-row-group min/max timestamps. A time window then resolves to a contiguous
+row range by binary search instead of a full filter and re-sort.
+
+A per-column stats sidecar (null / sentinel-empty counts, distinct estimate,
+value length range) answers metadata questions such as "Hide Empty" without
+scanning the data. The same estimate picks the low-cardinality string columns
+that are stored as Categorical (dictionary codes instead of repeated strings).
+
+Unless disabled (CHRONOS_SEARCH_INDEX=0), an inverted token index over the
+string columns and a trigram index over the free-text columns are written
+alongside for Global Search and column filters (engine/search_index.py).
+
+Time-sorted stores also get a time-bucket cube of event counts per chart
+breakdown, so unfiltered and time-window charts never rescan the rows
+(engine/time_cube.py).
+
+Lazy sources (Parquet, NDJSON) are written without being collected: they are
+streamed to a spill file, sorted out of core in _ts-range runs and streamed
+into the store, so exports larger than RAM can be ingested.
+"""
+import io
+import os
+import json
+import bisect
+import functools
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import polars as pl
+
+from engine.forensic import (
+    TS_COL, POS_COL, INTERNAL_COLUMNS, TIME_KEYWORDS, add_canonical_ts, add_validated_event_id,
+)
+from engine.analyzer import chart_columns
+from engine.time_cube import build_time_cube, time_cube_path
+from engine.search_index import (
+    SEARCH_INDEX_ENABLED, search_index_path, build_search_index,
+    trigram_index_path, trigram_columns, build_trigram_index,
+)
+
+logger = logging.getLogger("Chronos-DFIR")
+
+STORE_EXT = ".parquet"
+STORE_COMPRESSION = "zstd"
+STORE_COMPRESSION_LEVEL = 3
+# ~128k rows per row group: large enough for efficient column scans,
+# small enough that row-group statistics still prune time/id ranges.
+ROW_GROUP_SIZE = 131_072
+TIME_INDEX_EXT = ".tsidx.json"
+# Row groups whose _ts values a handle keeps for window-edge binary searches (~1 MB each)
+TS_GROUP_CACHE = 8
+STATS_EXT = ".stats.json"
+# Low-cardinality string columns (EventID, Level, Provider, ...) are stored
+# dictionary-encoded and read back as Categorical: filters and group_bys run on
+# integer codes. Thresholds apply to the ingest-time distinct estimate.
+CATEGORICAL_MAX_DISTINCT = 4096
+CATEGORICAL_MAX_RATIO = 0.5  # distinct / non-null rows
+# Common string representations of null/empty in forensics ("Hide Empty")
+EMPTY_VALUE_REGEX = r"^(?i)(-+|n/?a|null|none|nan|undefined|unknown|\s*)$"
+# Out-of-core sort of LazyFrame stores: _ts-range runs of about this many
+# in-memory bytes, estimated as SPILL_EXPANSION x their lz4 spill size
+SORT_RUN_BYTES = 512 * 2 ** 20
+SPILL_EXPANSION = 4
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def store_path(path: str) -> str:
+    """Return the Parquet store path that backs a logical processed filename."""
+    root, ext = os.path.splitext(path)
+    if ext.lower() == STORE_EXT:
+        return path
+    return root + STORE_EXT
+
+
+def time_index_path(path: str) -> str:
+    """Sidecar holding the per-row-group _ts ranges of a time-sorted store."""
+    return os.path.splitext(store_path(path))[0] + TIME_INDEX_EXT
+
+
+def stats_path(path: str) -> str:
+    """Sidecar holding per-column statistics of a store."""
+    return os.path.splitext(store_path(path))[0] + STATS_EXT
+
+
+def dataset_exists(path: str) -> bool:
+    """True if a processed dataset (Parquet store or legacy CSV) exists for path."""
+    return os.path.exists(store_path(path)) or os.path.exists(path)
+
+
+def _flatten_nested(data):
+    """Cast nested/untyped columns (List, Struct, Object, Null) to Utf8.
+    The grid, search and export paths all assume scalar cells."""
+    is_lazy = isinstance(data, pl.LazyFrame)
+    schema = data.collect_schema() if is_lazy else data.schema
+    exprs = []
+    for name, dtype in schema.items():
+        if isinstance(dtype, pl.Struct):
+            exprs.append(pl.col(name).struct.json_encode().alias(name))
+        elif isinstance(dtype, (pl.List, pl.Array)):
+            exprs.append(
+                pl.col(name).cast(pl.List(pl.Utf8), strict=False).list.join(", ").alias(name)
+            )
+        elif dtype in (pl.Null, pl.Object):
+            exprs.append(pl.col(name).cast(pl.Utf8, strict=False).alias(name))
+    return data.with_columns(exprs) if exprs else data
+
+
+def _build_time_index(ts: pl.Series) -> dict:
+    """Per-row-group [offset, length, min_us, max_us] of a sorted _ts column."""
+    ts_us = ts.dt.replace_time_zone(None).dt.epoch("us")
+    groups = []
+    for offset in range(0, len(ts_us), ROW_GROUP_SIZE):
+        chunk = ts_us.slice(offset, ROW_GROUP_SIZE)
+        groups.append([offset, len(chunk), chunk.min(), chunk.max()])
+    return {"rows": len(ts_us), "null_count": ts_us.null_count(), "groups": groups}
+
+
+def _column_stats(data) -> dict:
+    """Null / sentinel-empty counts, distinct estimate and value length range per
+    column, computed in a single (streaming) pass over a DataFrame or LazyFrame."""
+    lf = data.lazy()
+    schema = lf.collect_schema()
+    cols = [c for c in schema.names() if c not in INTERNAL_COLUMNS]
+    exprs = [pl.len().alias("rows")]
+    for i, c in enumerate(cols):
+        as_str = pl.col(c).cast(pl.Utf8, strict=False)
+        exprs += [
+            pl.col(c).null_count().alias(f"{i}_null"),
+            as_str.str.contains(EMPTY_VALUE_REGEX).fill_null(False).sum().alias(f"{i}_empty"),
+            pl.col(c).approx_n_unique().alias(f"{i}_distinct"),
+            as_str.str.len_chars().min().alias(f"{i}_min_len"),
+            as_str.str.len_chars().max().alias(f"{i}_max_len"),
+        ]
+    row = lf.select(exprs).collect(engine="streaming").row(0, named=True)
+    return {
+        "rows": row["rows"],
+        "columns": {
+            c: {
+                "dtype": str(schema[c]),
+                "null_count": row[f"{i}_null"],
+                "empty_count": row[f"{i}_empty"],
+                "distinct": row[f"{i}_distinct"],
+                "min_len": row[f"{i}_min_len"],
+                "max_len": row[f"{i}_max_len"],
+            }
+            for i, c in enumerate(cols)
+        },
+    }
+
+
+def _search_columns(schema) -> list:
+    """String columns covered by the Global Search token index."""
+    return [c for c, dtype in schema.items()
+            if dtype in (pl.Utf8, pl.String, pl.Categorical) and c not in INTERNAL_COLUMNS]
+
+
+def categorical_columns(schema, stats: dict) -> list:
+    """String columns worth storing as Categorical: few distinct values relative
+    to their non-null rows. Time-like columns (parsed as text downstream), free
+    text trigram columns and row ids are left as Utf8."""
+    free_text = set(trigram_columns(list(schema.names())))
+    chosen = []
+    for c, dtype in schema.items():
+        st = stats["columns"].get(c)
+        if (st is None or dtype not in (pl.Utf8, pl.String) or c == "_id" or c in free_text
+                or any(k in c.lower() for k in TIME_KEYWORDS)):
+            continue
+        non_null = stats["rows"] - st["null_count"]
+        if non_null and st["distinct"] <= min(CATEGORICAL_MAX_DISTINCT, non_null * CATEGORICAL_MAX_RATIO):
+            chosen.append(c)
+    return chosen
+
+
+def _write_json(obj: dict, dest: str) -> None:
+    tmp = dest + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(obj, f)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _safe_column_stats(data, path: str) -> Optional[dict]:
+    try:
+        return _column_stats(data)
+    except Exception as e:
+        logger.warning(f"Column stats failed for {os.path.basename(path)}: {e}")
+        return None
+
+
+def _categorize(data, stats: dict):
+    """Cast the low-cardinality string columns (per stats) to Categorical."""
+    cat_cols = categorical_columns(data.collect_schema(), stats)
+    for c in cat_cols:
+        stats["columns"][c]["dtype"] = str(pl.Categorical)
+    return data.with_columns(pl.col(c).cast(pl.Categorical) for c in cat_cols) if cat_cols else data
+
+
+def _baseline_sort(data):
+    # Same order the baseline sort would produce, so readers can skip it
+    return data.sort(TS_COL, descending=False, nulls_last=False, maintain_order=True)
+
+
+def _sort_runs(scan: pl.LazyFrame, spill: str) -> tuple:
+    """Out-of-core _ts sort of a spilled store: (sorted LazyFrame, run files).
+    Only the _ts column is loaded. Rows already in baseline order are not
+    rewritten; otherwise they are range-partitioned on _ts quantiles into runs of
+    about SORT_RUN_BYTES, each sorted on its own (stable, so ties keep file order)
+    and concatenated in range order."""
+    ts = scan.select(TS_COL).collect().to_series()
+    nulls = ts.null_count()
+    if ts.head(nulls).null_count() == nulls and ts.slice(nulls).is_sorted():
+        return scan, []
+    n_runs = -(-os.path.getsize(spill) * SPILL_EXPANSION // SORT_RUN_BYTES)
+    if n_runs <= 1:
+        return _baseline_sort(scan), []
+    present = ts.drop_nulls().sort()
+    bounds = present.gather([len(present) * i // n_runs for i in range(1, n_runs)]).unique(maintain_order=True)
+    conds = [pl.col(TS_COL).is_null()]
+    lower = None
+    for b in [*bounds, None]:
+        cond = pl.col(TS_COL).is_not_null()
+        if lower is not None:
+            cond &= pl.col(TS_COL) >= lower
+        if b is not None:
+            cond &= pl.col(TS_COL) < b
+        conds.append(cond)
+        lower = b
+    runs = []
+    try:
+        for i, cond in enumerate(conds):
+            runs.append(f"{spill}.{i}")
+            _baseline_sort(scan.filter(cond)).sink_parquet(
+                runs[-1], compression="lz4", statistics=False, row_group_size=ROW_GROUP_SIZE, engine="streaming")
+    except BaseException:
+        _remove_files(runs)
+        raise
+    return pl.concat([pl.scan_parquet(r) for r in runs]), runs
+
+
+def _remove_files(paths) -> None:
+    for p in paths:
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def _sink_store(lf: pl.LazyFrame, dest: str, path: str) -> tuple:
+    """Out-of-core store write: lf is streamed to a spill file once (so the
+    source, e.g. a multi-GB NDJSON, is parsed a single time), stats are taken
+    from the spill in a streaming pass, and the sorted / categorized store is
+    streamed from it. Returns (stats, tmp store path)."""
+    spill = dest + ".spill"
+    tmp = dest + ".tmp"
+    runs = []
+    try:
+        lf.sink_parquet(spill, compression="lz4", statistics=False,
+                        row_group_size=ROW_GROUP_SIZE, engine="streaming")
+        out = pl.scan_parquet(spill)
+        stats = _safe_column_stats(out, path)
+        if TS_COL in out.collect_schema():
+            out, runs = _sort_runs(out, spill)
+        if stats is not None:
+            out = _categorize(out, stats)
+        out.sink_parquet(tmp, compression=STORE_COMPRESSION, compression_level=STORE_COMPRESSION_LEVEL,
+                         row_group_size=ROW_GROUP_SIZE, statistics=True, engine="streaming")
+    except BaseException:
+        _remove_files([tmp])
+        raise
+    finally:
+        _remove_files([spill, *runs])
+    return stats, tmp
+
+
+def write_store(data, path: str) -> int:
+    """Write a DataFrame/LazyFrame as the Parquet store for a processed filename.
+    The canonical _ts timestamp and the validated Event ID (Int32 _eid) are
+    derived here, once per ingest; when _ts is present the rows are stored
+    sorted by it and time-index and time-cube sidecars are written. Low-cardinality
+    string columns are stored as Categorical. Column stats and (optionally) search
+    indexes are written alongside. Files are written to a temp path and renamed, so
+    readers never observe a partially written store.
+
+    A LazyFrame is never collected: it is sunk with the streaming engine
+    (_sink_store) and the sidecars are built from scans of the written store, so
+    sources larger than memory can be ingested. Returns the row count (from the
+    Parquet footer on the lazy path)."""
+    dest = store_path(path)
+    idx_dest = time_index_path(path)
+    data = add_validated_event_id(add_canonical_ts(_flatten_nested(data)))
+    tokens_dest = search_index_path(dest)
+    trigrams_dest = trigram_index_path(dest)
+    stats_dest = stats_path(path)
+    cube_dest = time_cube_path(dest)
+    for stale in (idx_dest, tokens_dest, trigrams_dest, stats_dest, cube_dest):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    if isinstance(data, pl.LazyFrame):
+        stats, tmp = _sink_store(data, dest, path)
+        os.replace(tmp, dest)
+        df = pl.scan_parquet(dest)
+        rows = df.select(pl.len()).collect().item()  # served from Parquet footer
+        ts = pl.read_parquet(dest, columns=[TS_COL])[TS_COL] if TS_COL in df.collect_schema() else None
+    else:
+        stats = _safe_column_stats(data, path)  # order-independent: taken before the sort
+        df = _baseline_sort(data) if TS_COL in data.columns else data
+        if stats is not None:
+            df = _categorize(df, stats)
+        rows = df.height
+        ts = df[TS_COL] if TS_COL in df.columns else None
+        tmp = dest + ".tmp"
+        try:
+            df.write_parquet(
+                tmp,
+                compression=STORE_COMPRESSION,
+                compression_level=STORE_COMPRESSION_LEVEL,
+                row_group_size=ROW_GROUP_SIZE,
+                statistics=True,
+            )
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    if ts is not None:
+        time_index = _build_time_index(ts)
+        _write_json(time_index, idx_dest)
+        if time_index["null_count"] < rows:
+            try:
+                build_time_cube(df, chart_columns(df.lazy()), cube_dest)
+            except Exception as e:
+                logger.warning(f"Time cube failed for {os.path.basename(path)}: {e}")
+
+    if stats is not None:
+        _write_json(stats, stats_dest)
+
+    schema = df.collect_schema()
+    search_cols = _search_columns(schema)
+    if SEARCH_INDEX_ENABLED and search_cols and rows:
+        # Optional accelerators: a failure only costs search speed, never the ingest
+        id_df = df if "_id" in schema else df.with_row_index(name="_id", offset=1)
+        for build, cols, dest_file in (
+            (build_search_index, search_cols, tokens_dest),
+            (build_trigram_index, trigram_columns(search_cols), trigrams_dest),
+        ):
+            if not cols:
+                continue
+            try:
+                build(id_df, cols, dest_file)
+            except Exception as e:
+                logger.warning(f"{build.__name__} failed for {os.path.basename(path)}: {e}")
+    return rows
+
+
+def _load_sidecar(sidecar: str, row_count: int) -> Optional[dict]:
+    """Read a JSON sidecar; ignored if missing, unreadable or stale."""
+    try:
+        with open(sidecar) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("rows") != row_count:
+        return None
+    return data
+
+
+def _to_epoch_us(dt: datetime) -> int:
+    """Epoch microseconds of a boundary; naive values are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _scan_csv(path: str, encoding: str = "utf8", row_index: Optional[str] = None) -> pl.LazyFrame:
+    return pl.scan_csv(path, encoding=encoding, ignore_errors=True,
+                       infer_schema_length=0, truncate_ragged_lines=True,
+                       row_index_name=row_index)
+
+
+class DatasetHandle:
+    """Resolved, immutable view of one processed dataset at one file version."""
+
+    def __init__(self, filename: str, path: str, fmt: str, encoding: str,
+                 schema: pl.Schema, row_count: int, mtime_ns: int, size: int,
+                 time_index: Optional[dict] = None, column_stats: Optional[dict] = None):
+        self.filename = filename
+        self.path = path            # backing file actually read (Parquet or legacy CSV)
+        self.fmt = fmt              # "parquet" | "csv"
+        self.encoding = encoding    # "utf8" | "utf8-lossy" (CSV only)
+        self.schema = schema
+        self.row_count = row_count
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.time_index = time_index  # set only for stores physically sorted by _ts
+        self.search_index = None      # token index sidecar path, when present
+        self.search_columns = []      # string columns that sidecar covers
+        self.column_stats = column_stats  # per-column stats sidecar contents, when present
+        self.trigram_index = None     # trigram index sidecar path, when present
+        self.trigram_columns = []     # free-text columns that sidecar covers
+        self.time_cube = None         # time-bucket cube sidecar path, when present
+        if fmt == "parquet" and os.path.exists(search_index_path(path)):
+            self.search_index = search_index_path(path)
+            self.search_columns = _search_columns(schema)
+        if fmt == "parquet" and os.path.exists(trigram_index_path(path)):
+            self.trigram_index = trigram_index_path(path)
+            self.trigram_columns = trigram_columns(_search_columns(schema))
+        if time_index and os.path.exists(time_cube_path(path)):
+            self.time_cube = time_cube_path(path)
+        if time_index:
+            self._ranged = [g for g in time_index["groups"] if g[3] is not None]
+            self._group_max = [g[3] for g in self._ranged]
+            # Window edges of consecutive requests (brush zoom, paging) hit the same groups
+            self._group_ts = functools.lru_cache(maxsize=TS_GROUP_CACHE)(self._read_group_ts)
+
+    @property
+    def time_sorted(self) -> bool:
+        """True if rows are stored in baseline (_ts ascending, nulls first) order."""
+        return self.time_index is not None
+
+    @property
+    def version(self) -> tuple:
+        """Identity of the on-disk file version; changes whenever the file is rewritten."""
+        return (self.path, self.mtime_ns, self.size)
+
+    @property
+    def columns(self) -> list:
+        return list(self.schema.names())
+
+    def scan(self, row_index: Optional[str] = None) -> pl.LazyFrame:
+        """Fresh LazyFrame over the dataset, with a stable 1-based _id guaranteed.
+        row_index names an optional 0-based physical position column (kept correct
+        under slice pushdown)."""
+        if self.fmt == "parquet":
+            lf = pl.scan_parquet(self.path, row_index_name=row_index)
+        else:
+            lf = _scan_csv(self.path, self.encoding, row_index)
+        if "_id" not in self.schema:
+            lf = lf.with_row_index(name="_id", offset=1)
+        return lf
+
+    def gather(self, positions: pl.Series, ordered: bool = True) -> pl.LazyFrame:
+        """Rows at the given physical positions, in the given order (file order when
+        ordered=False). Positions are grouped per row group and each group is read
+        as one slice, so a page costs a few row-group reads no matter where the
+        rows sit in the file."""
+        pos = pl.DataFrame({POS_COL: positions.cast(pl.Int64)}).with_row_index("_ord")
+        if pos.is_empty():
+            return self.scan().head(0)
+        spans = (
+            pos.group_by((pl.col(POS_COL) // ROW_GROUP_SIZE).alias("_rg"))
+            .agg(pl.col(POS_COL).min().alias("lo"), pl.col(POS_COL).max().alias("hi"))
+            .sort("lo")
+        )
+        parts = [
+            self.scan(row_index=POS_COL).slice(lo, hi - lo + 1)
+            for lo, hi in spans.select("lo", "hi").iter_rows()
+        ]
+        lf = pl.concat(parts).with_columns(pl.col(POS_COL).cast(pl.Int64))
+        if not ordered:
+            return lf.join(pos.lazy(), on=POS_COL, how="semi").drop(POS_COL)
+        return lf.join(pos.lazy(), on=POS_COL, how="inner").sort("_ord").drop(["_ord", POS_COL])
+
+    def _read_group_ts(self, g: int) -> pl.Series:
+        """Epoch-microsecond _ts values of ranged row group g."""
+        offset, length = self._ranged[g][0], self._ranged[g][1]
+        return (pl.scan_parquet(self.path).select(TS_COL).slice(offset, length)
+                .collect().to_series().dt.replace_time_zone(None).dt.epoch("us"))
+
+    def _ts_position(self, value_us: int, side: str) -> int:
+        """First physical row whose _ts is >= value (side="left") or > value
+        (side="right"). Binary search over row-group maxima, then inside one group."""
+        key = value_us if side == "left" else value_us + 1
+        g = bisect.bisect_left(self._group_max, key)
+        if g == len(self._ranged):
+            return self.row_count
+        offset = self._ranged[g][0]
+        ts = self._group_ts(g)
+        nulls = ts.null_count()  # nulls sort first, only possible in leading groups
+        return offset + nulls + ts.slice(nulls).search_sorted(value_us, side=side)
+
+    def time_row_range(self, start: Optional[datetime], end: Optional[datetime]) -> tuple:
+        """Contiguous physical row range [lo, hi) whose _ts lies within [start, end]."""
+        lo = self.time_index["null_count"]
+        hi = self.row_count
+        if start is not None:
+            lo = max(lo, self._ts_position(_to_epoch_us(start), "left"))
+        if end is not None:
+            hi = self._ts_position(_to_epoch_us(end), "right")
+        return lo, max(lo, hi)
+
+
+_registry: dict = {}
+_registry_lock = threading.Lock()
+
+
+def _resolve_handle(path: str) -> DatasetHandle:
+    filename = os.path.basename(path)
+    pq_path = store_path(path)
+    if os.path.exists(pq_path):
+        st = os.stat(pq_path)
+        lf = pl.scan_parquet(pq_path)
+        schema = lf.collect_schema()
+        row_count = lf.select(pl.len()).collect().item()  # served from Parquet footer
+        time_index = _load_sidecar(time_index_path(path), row_count) if TS_COL in schema else None
+        column_stats = _load_sidecar(stats_path(path), row_count)
+        return DatasetHandle(filename, pq_path, "parquet", "utf8", schema, row_count,
+                             st.st_mtime_ns, st.st_size, time_index, column_stats)
+
+    st = os.stat(path)
+    # Legacy CSV: a single counting pass validates the encoding and yields the row count
+    encoding = "utf8"
+    try:
+        row_count = _scan_csv(path).select(pl.len()).collect().item()
+    except Exception:
+        encoding = "utf8-lossy"
+        row_count = _scan_csv(path, encoding).select(pl.len()).collect().item()
+    schema = _scan_csv(path, encoding).collect_schema()
+    return DatasetHandle(filename, path, "csv", encoding, schema, row_count,
+                         st.st_mtime_ns, st.st_size)
+
+
+def get_dataset(path: str) -> DatasetHandle:
+    """Return the registered handle for a processed filename, re-resolving it only
+    if the backing file changed (mtime/size) since it was registered."""
+    key = os.path.basename(path)
+    with _registry_lock:
+        handle = _registry.get(key)
+    if handle is not None:
+        try:
+            st = os.stat(handle.path)
+            if (st.st_mtime_ns, st.st_size) == (handle.mtime_ns, handle.size) \
+                    and (handle.fmt == "parquet" or not os.path.exists(store_path(path))):
+                return handle
+        except OSError:
+            pass
+    if not dataset_exists(path):
+        raise FileNotFoundError(path)
+    handle = _resolve_handle(path)
+    with _registry_lock:
+        _registry[key] = handle
+    return handle
+
+
+def register_dataset(path: str) -> DatasetHandle:
+    """Resolve and register a freshly ingested dataset (called once at ingest)."""
+    invalidate_dataset(path)
+    return get_dataset(path)
+
+
+def invalidate_dataset(path: str) -> None:
+    with _registry_lock:
+        _registry.pop(os.path.basename(path), None)
+
+
+def clear_registry() -> None:
+    with _registry_lock:
+        _registry.clear()
+
+
+def scan_dataset(path: str) -> pl.LazyFrame:
+    """Open a processed dataset lazily through the registry (Parquet store preferred,
+    legacy all-Utf8 CSV otherwise). The returned frame always carries _id."""
+    return get_dataset(path).scan()
+
+
+def read_text_sample(path: str, max_bytes: int = 5 * 1024 * 1024) -> str:
+    """Return up to max_bytes of the dataset rendered as CSV text.
+    Used by content scanners (YARA) that need text rather than Parquet pages."""
+    pq_path = store_path(path)
+    if not os.path.exists(pq_path):
+        with open(path, "r", errors="replace") as f:
+            return f.read(max_bytes)
+
+    lf = pl.scan_parquet(pq_path)
+    buf = io.StringIO()
+    batch, offset, header = 10_000, 0, True
+    while buf.tell() < max_bytes:
+        df = lf.slice(offset, batch).collect()
+        if df.is_empty():
+            break
+        buf.write(df.write_csv(include_header=header))
+        header = False
+        offset += batch
+    return buf.getvalue()[:max_bytes]
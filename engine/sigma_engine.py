@@ -81,7 +81,7 @@ def load_sigma_rules(rules_dir: Optional[str] = None, force_reload: bool = False
 # Expression builders
 # ---------------------------------------------------------------------------
 
-def _field_expr(col_name: str, columns: list[str]) -> Optional[pl.Expr]:
+def _resolve_column(col_name: str, columns: list[str]) -> Optional[str]:
     """
     Case-insensitive column lookup.  Returns None if not found.
     Also handles dot-notation (e.g. 'EventData.CommandLine') by trying the
@@ -90,13 +90,13 @@ def _field_expr(col_name: str, columns: list[str]) -> Optional[pl.Expr]:
     # Exact match first
     for c in columns:
         if c.lower() == col_name.lower():
-            return pl.col(c).cast(pl.Utf8, strict=False)
+            return c
 
     # Dot-notation fallback: "EventData.CommandLine" → "CommandLine"
     last_part = col_name.rsplit(".", 1)[-1]
     for c in columns:
         if c.lower() == last_part.lower():
-            return pl.col(c).cast(pl.Utf8, strict=False)
+            return c
 
     return None
 
@@ -136,13 +136,15 @@ def _apply_modifier(expr: pl.Expr, modifier: str, values) -> pl.Expr:
     return expr.is_in(values)
 
 
-def _build_field_condition(field_raw: str, values, columns: list[str]) -> Optional[pl.Expr]:
+def _build_field_condition(field_raw: str, values, columns: list[str],
+                           categorical: frozenset = frozenset()) -> Optional[pl.Expr]:
     """
     Parse a Sigma field spec like 'Image|endswith|any' into a Polars expression.
     Handles:
       - plain field  (exact match / list)
       - field|modifier
       - field|not|modifier  (negation)
+    Plain matches on columns in categorical run on the dictionary codes.
     """
     parts = field_raw.split("|")
     field_name = parts[0]
@@ -152,9 +154,10 @@ def _build_field_condition(field_raw: str, values, columns: list[str]) -> Option
     mods_clean = [m for m in modifiers if m != "not"]
     modifier = "|".join(mods_clean) if mods_clean else ""
 
-    col_expr = _field_expr(field_name, columns)
-    if col_expr is None:
+    col_name = _resolve_column(field_name, columns)
+    if col_name is None:
         return None  # Column not present in this dataset — skip silently
+    col_expr = pl.col(col_name).cast(pl.Utf8, strict=False)
 
     if isinstance(values, list):
         vals = [str(v) for v in values if v is not None]
@@ -166,14 +169,15 @@ def _build_field_condition(field_raw: str, values, columns: list[str]) -> Option
 
     if modifier == "":
         # Plain value(s) — treat as is_in or equality
-        expr = col_expr.is_in(vals)
+        expr = (pl.col(col_name) if col_name in categorical else col_expr).is_in(vals)
     else:
         expr = _apply_modifier(col_expr, modifier, vals)
 
     return (~expr) if negate else expr
 
 
-def _build_named_condition(named_block: dict, columns: list[str]) -> Optional[pl.Expr]:
+def _build_named_condition(named_block: dict, columns: list[str],
+                           categorical: frozenset = frozenset()) -> Optional[pl.Expr]:
     """
     Convert a named detection block (dict of field: value pairs) into a Polars AND expression.
     All field conditions within a named block are implicitly AND-ed.
@@ -182,21 +186,25 @@ def _build_named_condition(named_block: dict, columns: list[str]) -> Optional[pl
     for field_raw, values in named_block.items():
         if field_raw.startswith("EventID") or field_raw.lower() in ("eventid", "wineventid", "event_id"):
             # Special handling: EventID as integer-string list
-            col_expr = _field_expr(field_raw, columns)
-            if col_expr is None:
+            col_name = _resolve_column(field_raw, columns)
+            if col_name is None:
                 # Try common aliases
                 for alias in ["EventID", "WinEventId", "EventId", "event_id", "Id", "id"]:
-                    col_expr = _field_expr(alias, columns)
-                    if col_expr is not None:
+                    col_name = _resolve_column(alias, columns)
+                    if col_name is not None:
                         break
-            if col_expr is not None:
+            if col_name is not None:
                 vals = [str(v) for v in (values if isinstance(values, list) else [values]) if v is not None]
-                # Strip trailing .0 from float-parsed IDs
-                clean_col = col_expr.str.replace(r"\.0$", "", literal=False)
-                sub_exprs.append(clean_col.is_in(vals))
+                if col_name in categorical:
+                    # Match float-parsed IDs ("4624.0") on the codes instead of rewriting every row
+                    sub_exprs.append(pl.col(col_name).is_in(vals + [f"{v}.0" for v in vals]))
+                else:
+                    # Strip trailing .0 from float-parsed IDs
+                    clean_col = pl.col(col_name).cast(pl.Utf8, strict=False).str.replace(r"\.0$", "", literal=False)
+                    sub_exprs.append(clean_col.is_in(vals))
             continue
 
-        cond = _build_field_condition(field_raw, values, columns)
+        cond = _build_field_condition(field_raw, values, columns, categorical)
         if cond is not None:
             sub_exprs.append(cond)
 
@@ -432,6 +440,7 @@ def match_sigma_rules(df: pl.DataFrame, rules: Optional[list] = None) -> list[di
 
     columns = df.columns
     columns_lower = {c.lower(): c for c in columns}
+    categorical = frozenset(c for c, dtype in df.schema.items() if dtype == pl.Categorical)
     hits = []
 
     for rule in rules:
@@ -476,14 +485,14 @@ def match_sigma_rules(df: pl.DataFrame, rules: Optional[list] = None) -> list[di
             if block_name in _meta_keys:
                 continue
             if isinstance(block_value, dict):
-                named_exprs[block_name] = _build_named_condition(block_value, columns)
+                named_exprs[block_name] = _build_named_condition(block_value, columns, categorical)
                 # Track which fields this block references
                 for field_raw in block_value.keys():
                     base_field = field_raw.split("|")[0]
                     detection_fields.add(base_field)
             elif isinstance(block_value, list):
                 # List of dicts — OR them
-                sub = [_build_named_condition(b, columns) for b in block_value if isinstance(b, dict)]
+                sub = [_build_named_condition(b, columns, categorical) for b in block_value if isinstance(b, dict)]
                 sub = [e for e in sub if e is not None]
                 named_exprs[block_name] = functools.reduce(operator.or_, sub) if sub else None
                 for b in block_value:
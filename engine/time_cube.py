@@ -0,0 +1,174 @@
+"""
+Chronos-DFIR Time Cube — pre-aggregated event counts per time bucket.
+
+Written at ingest next to each time-sorted Parquet store as
+``<name>.cube.parquet``: event counts per bucket at several resolutions
+(CUBE_LEVELS), in total and broken down by the chart columns the analyzer
+picks (level, EventID, process, category, source, plus the EventID fallback and
+generic Top-N column when the chart needs them). Rows:
+(level, bucket [epoch us], role [None = total], value, count).
+
+Unfiltered and time-window-only charts are answered from the cube. A window is
+split into the coarsest aligned buckets that fit inside it; only the partial
+minutes at its two edges are counted from the store, which is cheap because
+rows are sorted by _ts (two short contiguous slices).
+"""
+import os
+import json
+import logging
+import functools
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import polars as pl
+
+from engine.forensic import TS_COL
+
+logger = logging.getLogger("Chronos-DFIR")
+
+CUBE_EXT = ".cube.parquet"
+# (name, size in microseconds), finest first; each size divides the next
+CUBE_LEVELS = (
+    ("1m", 60_000_000),
+    ("5m", 300_000_000),
+    ("1h", 3_600_000_000),
+    ("1d", 86_400_000_000),
+)
+BASE_BUCKET_US = CUBE_LEVELS[0][1]
+# Cubes kept in memory (a few MB each even for months of minute buckets)
+CUBE_CACHE_ENTRIES = 8
+_COLUMNS_KEY = "chronos_chart_columns"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_SCHEMA = {"bucket": pl.Int64, "role": pl.Utf8, "value": pl.Utf8, "count": pl.Int64}
+
+
+def time_cube_path(store_file: str) -> str:
+    """Sidecar path for the time cube of a Parquet store."""
+    return os.path.splitext(store_file)[0] + CUBE_EXT
+
+
+def _base_rows(lf: pl.LazyFrame, columns: dict) -> pl.LazyFrame:
+    """(bucket, role, value, count) at base resolution for the rows of lf with a _ts."""
+    rows = lf.filter(pl.col(TS_COL).is_not_null()).select(
+        (pl.col(TS_COL).dt.epoch("us") // BASE_BUCKET_US * BASE_BUCKET_US).alias("bucket"),
+        *[pl.col(c).alias(f"_r_{role}") for role, c in columns.items()],
+    )
+    parts = [
+        rows.group_by("bucket").agg(pl.len().alias("count"))
+        .select("bucket", pl.lit(None, pl.Utf8).alias("role"), pl.lit(None, pl.Utf8).alias("value"), "count")
+    ]
+    for role in columns:
+        parts.append(
+            rows.group_by("bucket", pl.col(f"_r_{role}").alias("value"))
+            .agg(pl.len().alias("count"))
+            .select("bucket", pl.lit(role).alias("role"), pl.col("value").cast(pl.Utf8, strict=False), "count")
+        )
+    return pl.concat(parts).cast(_SCHEMA)
+
+
+def build_time_cube(df: pl.DataFrame, columns: dict, dest: str) -> int:
+    """Write the cube for df (must carry _ts) with breakdowns for columns
+    (role -> column name). Returns the number of cube rows."""
+    base = _base_rows(df.lazy(), columns).collect(engine="streaming")
+    levels = [base.with_columns(pl.lit(CUBE_LEVELS[0][0]).alias("level"))]
+    for name, size in CUBE_LEVELS[1:]:
+        levels.append(
+            base.group_by(pl.col("bucket") // size * size, "role", "value")
+            .agg(pl.col("count").sum())
+            .with_columns(pl.lit(name).alias("level"))
+        )
+    cube = (pl.concat(levels, how="diagonal")
+            .select("level", *_SCHEMA)
+            .sort(["level", "bucket"]))
+    tmp = dest + ".tmp"
+    try:
+        cube.write_parquet(tmp, compression="zstd", statistics=True,
+                           metadata={_COLUMNS_KEY: json.dumps(columns)})
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return cube.height
+
+
+@functools.lru_cache(maxsize=CUBE_CACHE_ENTRIES)
+def _load_cube(cube_file: str, mtime_ns: int) -> tuple:
+    cube = pl.read_parquet(cube_file)
+    levels = {name: cube.filter(pl.col("level") == name).drop("level") for name, _ in CUBE_LEVELS}
+    return levels, json.loads(pl.read_parquet_metadata(cube_file)[_COLUMNS_KEY])
+
+
+def load_cube(cube_file: str) -> tuple:
+    """({level: rows sorted by bucket}, role -> column map), cached in memory per
+    file version."""
+    return _load_cube(cube_file, os.stat(cube_file).st_mtime_ns)
+
+
+def cube_columns(cube_file: str) -> dict:
+    """Role -> column map the cube was built with."""
+    return load_cube(cube_file)[1]
+
+
+def _ceil(v: int, size: int) -> int:
+    return -(-v // size) * size
+
+
+def _floor(v: int, size: int) -> int:
+    return v // size * size
+
+
+def _utc(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def cube_window(dataset, cube_file: str, start_us: int, end_us: int, bucket_us: int,
+                roles: Optional[list] = None) -> pl.DataFrame:
+    """
+    Counts of rows with _ts in [start_us, end_us] per epoch-aligned bucket of
+    bucket_us (a multiple of BASE_BUCKET_US): DataFrame[bucket, role, value,
+    count], role None for the totals. roles limits the breakdowns returned
+    (None = all). dataset is the time-sorted DatasetHandle the cube belongs to.
+    """
+    cube, columns = load_cube(cube_file)
+    if roles is not None:
+        columns = {r: c for r, c in columns.items() if r in roles}
+    keep_role = pl.col("role").is_null() | pl.col("role").is_in(list(columns))
+
+    def level_rows(name, lo, hi):
+        rows = cube[name]
+        first, last = rows["bucket"].search_sorted([lo, hi], side="left").to_list()
+        rows = rows.slice(first, last - first)
+        return rows if roles is None else rows.filter(keep_role)
+
+    parts = []
+    a, b = _ceil(start_us, BASE_BUCKET_US), _floor(end_us + 1, BASE_BUCKET_US)
+    if a < b:
+        edges = [(start_us, a - 1), (b, end_us)]
+        levels = [(n, size) for n, size in CUBE_LEVELS if bucket_us % size == 0]
+        for i, (name, _) in enumerate(levels):
+            # This level covers [a, b) minus the aligned middle the next level takes
+            spans = [(a, b)]
+            if i + 1 < len(levels):
+                coarse = levels[i + 1][1]
+                a2, b2 = _ceil(a, coarse), _floor(b, coarse)
+                if a2 < b2:
+                    spans = [(a, a2), (b2, b)]
+            parts.extend(level_rows(name, lo, hi) for lo, hi in spans)
+            if len(spans) == 1:
+                break
+            a, b = a2, b2
+    else:
+        edges = [(start_us, end_us)]
+
+    for lo_us, hi_us in edges:
+        if lo_us > hi_us:
+            continue
+        lo, hi = dataset.time_row_range(_utc(lo_us), _utc(hi_us))
+        if hi > lo:
+            # Collected on its own: inside a union the slice is not pushed into the scan
+            parts.append(_base_rows(dataset.scan().slice(lo, hi - lo), columns).collect())
+
+    if not parts:
+        return pl.DataFrame(schema=_SCHEMA)
+    return (pl.concat(parts)
+            .group_by(pl.col("bucket") // bucket_us * bucket_us, "role", "value")
+            .agg(pl.col("count").sum()))
@@ -0,0 +1,330 @@
+"""
+Chronos-DFIR Upload Router.
+
+Ingest of saved uploads — start_ingest(), shared by POST /upload in app.py —
+and the resumable chunked upload protocol under /api/uploads
+(engine/upload_sessions.py): init -> PUT chunks (any order, in parallel,
+retried / resumed freely) -> complete. Complete verifies the assembled file's
+SHA256 and feeds the same ingest path as /upload.
+
+app.py calls configure_uploads() with its output / upload directories and the
+processed_files map before serving requests.
+"""
+import os
+import time
+import shutil
+import logging
+import functools
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from engine.ingest_pool import run_ingest, ingest_bundle, ingest_file_job, forensic_timeline_job, IngestCancelled
+from engine.ingest_jobs import ingest_jobs, IngestQueueFull, DEFAULT_PRIORITY
+from engine.upload_stream import run_upload_io, parse_hash_list
+from engine.upload_sessions import UploadSessionStore, UploadSessionError
+from engine.session_store import register_dataset
+
+logger = logging.getLogger("Chronos-DFIR")
+
+upload_router = APIRouter(prefix="/api/uploads", tags=["uploads"])
+
+OUTPUT_DIR = None
+UPLOAD_DIR = None
+processed_files = {}
+upload_sessions = None
+
+
+def configure_uploads(output_dir: str, upload_dir: str, processed: dict) -> None:
+    """Directories and original -> processed filename map shared with app.py."""
+    global OUTPUT_DIR, UPLOAD_DIR, processed_files, upload_sessions
+    OUTPUT_DIR, UPLOAD_DIR, processed_files = output_dir, upload_dir, processed
+    upload_sessions = UploadSessionStore(upload_dir)
+
+
+def _warm_dataset_handle(path: str) -> None:
+    """Resolve schema/row count/version for a freshly ingested dataset once, up front."""
+    try:
+        register_dataset(path)
+    except Exception as e:
+        logger.warning(f"Dataset registry warm-up failed for {os.path.basename(path)}: {e}")
+
+
+async def start_ingest(background_tasks: BackgroundTasks, job, background: bool, **work_kwargs):
+    """Hand a saved upload to the ingest queue: the job handle (background) or the
+    ingest result. Shared by /upload and the resumable /api/uploads protocol."""
+    work = functools.partial(_ingest_uploaded_file, **work_kwargs)
+    if background:
+        background_tasks.add_task(ingest_jobs.run, job, work)
+        original_filename = work_kwargs["original_filename"]
+        return {
+            "status": "queued",
+            "job_id": job.id,
+            "status_url": f"/api/ingest/jobs/{job.id}",
+            "events_url": f"/api/ingest/jobs/{job.id}/events",
+            "original_filename": original_filename,
+            "chain_of_custody": _chain_of_custody(original_filename, work_kwargs["digests"],
+                                                  work_kwargs["file_size"]),
+        }
+
+    await ingest_jobs.run(job, work)
+    if job.status == "done":
+        return job.result
+    return JSONResponse(content={"error": job.error or "Ingest job cancelled", "job_id": job.id},
+                        status_code=409 if job.status == "cancelled" else 500)
+
+
+# --- Resumable chunked upload (engine/upload_sessions.py) ---------------------
+
+class UploadInitRequest(BaseModel):
+    filename: str
+    size: int
+    artifact_type: str = "generic"
+    chunk_size: Optional[int] = None
+    sha256: Optional[str] = None
+    hashes: Optional[str] = None
+    case_id: Optional[str] = None
+    phase_id: Optional[str] = None
+    priority: int = DEFAULT_PRIORITY
+
+
+class UploadCompleteRequest(BaseModel):
+    sha256: Optional[str] = None
+    background: bool = False
+
+
+def _session_error(e: UploadSessionError) -> JSONResponse:
+    return JSONResponse(content={"error": str(e)}, status_code=e.status)
+
+
+@upload_router.post("")
+async def init_upload(req: UploadInitRequest):
+    """Start a resumable upload: the target file is preallocated and the client
+    PUTs chunk_size-byte chunks (the last one shorter) to upload_url/chunks/{index}."""
+    try:
+        parse_hash_list(req.hashes)
+        session = await run_upload_io(
+            upload_sessions.create, req.filename, req.size, req.chunk_size, req.sha256,
+            {"artifact_type": req.artifact_type, "hashes": req.hashes, "case_id": req.case_id,
+             "phase_id": req.phase_id, "priority": req.priority})
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    except UploadSessionError as e:
+        return _session_error(e)
+    return {**session.status(), "upload_url": f"/api/uploads/{session.id}"}
+
+
+@upload_router.get("/{upload_id}")
+async def upload_status(upload_id: str):
+    """Received / missing chunks: a client resumes by PUTting the missing ones."""
+    try:
+        return upload_sessions.get(upload_id).status()
+    except UploadSessionError as e:
+        return _session_error(e)
+
+
+async def _read_chunk_body(request: Request, limit: int) -> bytes:
+    """Request body of at most limit bytes; UploadSessionError (413) past it, so an
+    oversized PUT is refused before it is buffered."""
+    too_large = UploadSessionError(f"Chunk body exceeds its {limit} bytes", status=413)
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise too_large
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > limit:
+            raise too_large
+    return bytes(data)
+
+
+@upload_router.put("/{upload_id}/chunks/{index}")
+async def upload_chunk(upload_id: str, index: int, request: Request):
+    """Raw chunk body; an X-Chunk-SHA256 header is verified before the write."""
+    try:
+        session = upload_sessions.get(upload_id)
+        session.check_index(index)
+        data = await _read_chunk_body(request, session.chunk_length(index))
+        return await run_upload_io(upload_sessions.write_chunk, session, index, data,
+                                   request.headers.get("x-chunk-sha256"))
+    except UploadSessionError as e:
+        return _session_error(e)
+
+
+@upload_router.delete("/{upload_id}")
+async def abort_upload(upload_id: str):
+    try:
+        upload_sessions.discard(upload_id)
+    except UploadSessionError as e:
+        return _session_error(e)
+    return {"status": "aborted", "upload_id": upload_id}
+
+
+@upload_router.post("/{upload_id}/complete")
+async def complete_upload(upload_id: str, background_tasks: BackgroundTasks,
+                          req: Optional[UploadCompleteRequest] = None):
+    """Verify the assembled file (SHA256 from init or this body; 422 on mismatch,
+    409 while chunks are missing) and ingest it exactly like /upload."""
+    req = req or UploadCompleteRequest()
+    try:
+        session = upload_sessions.get(upload_id)
+    except UploadSessionError as e:
+        return _session_error(e)
+    opts = session.meta["options"]
+    try:
+        job = ingest_jobs.create(session.filename, session.size, opts.get("priority", DEFAULT_PRIORITY))
+    except IngestQueueFull as e:
+        return JSONResponse(content={"error": str(e)}, status_code=429)
+    job.update(stage="verifying", bytes_read=session.size)
+    try:
+        file_path, file_size, digests = await run_upload_io(
+            upload_sessions.complete, session, parse_hash_list(opts.get("hashes")), req.sha256)
+    except UploadSessionError as e:
+        ingest_jobs.finish(job, "failed", error=str(e))
+        return _session_error(e)
+    except Exception as e:
+        # e.g. disk full while moving the file, or the session deleted meanwhile
+        ingest_jobs.finish(job, "failed", error=str(e))
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+    try:
+        job.update(stage="uploaded")
+        logger.info(f"Chain of Custody — {session.filename} (resumable upload): "
+                    + ", ".join(f"{a.upper()}={d}" for a, d in digests.items()) + f", Size={file_size}")
+        return await start_ingest(background_tasks, job, req.background, file_path=file_path,
+                                   original_filename=session.filename,
+                                   artifact_type=opts.get("artifact_type", "generic"),
+                                   case_id=opts.get("case_id"), phase_id=opts.get("phase_id"),
+                                   digests=digests, file_size=file_size)
+    except Exception as e:
+        ingest_jobs.finish(job, "failed", error=str(e))
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+
+def _chain_of_custody(original_filename: str, digests: dict, file_size: int) -> dict:
+    return {
+        **digests,
+        "file_size_bytes": file_size,
+        "original_filename": original_filename,
+    }
+
+
+async def _ingest_uploaded_file(job, file_path: str, original_filename: str, artifact_type: str,
+                                case_id: Optional[str], phase_id: Optional[str],
+                                digests: dict, file_size: int) -> dict:
+    """Parse a saved upload on the ingest worker pool and register it; the /upload
+    response body. Raises on forensic processing failures."""
+    file_hash = digests["sha256"]
+    ext = os.path.splitext(original_filename)[1].lower()
+
+    # LOGIC BRANCH: Generic Report vs Forensic Artifact
+    generic_exts = ['.csv', '.xlsx', '.tsv', '.parquet', '.json', '.jsonl', '.ndjson',
+                    '.db', '.sqlite', '.sqlite3', '.pslist', '.txt', '.log', '.trc', '.plist', '.zip']
+    if ext in generic_exts:
+        csv_filename = f"import_{original_filename.split('.')[0]}_{int(time.time())}.csv"
+        dest_path = os.path.join(OUTPUT_DIR, csv_filename)
+
+        row_count = "Unknown (Lazy)"
+        file_cat = "generic"
+
+        try:
+            if ext == '.zip':
+                # Triage bundles: members parsed in parallel across the pool, never extracted
+                rc, file_cat = await ingest_bundle(file_path, dest_path, cancel=job.cancel,
+                                                   on_progress=lambda p: job.update(**p))
+            else:
+                rc, file_cat = await run_ingest(ingest_file_job, file_path, ext, dest_path,
+                                                cancel=job.cancel, on_progress=lambda p: job.update(**p))
+            row_count = rc if rc >= 0 else "Unknown"
+            processed_files[original_filename] = csv_filename
+
+        except IngestCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Ingest worker processing failed: {e}. Copying raw file.")
+            try:
+                shutil.copy(file_path, dest_path)
+                processed_files[original_filename] = csv_filename
+            except Exception as copy_e:
+                logger.error(f"Raw copy FAILED: {copy_e}")
+            row_count = "Unknown"
+
+        job.update(stage="registering")
+        _warm_dataset_handle(dest_path)
+
+        # Register file in case database if case context provided
+        _file_id = None
+        if case_id:
+            try:
+                from engine.case_db import register_file as _reg_file
+                _rc = int(row_count) if isinstance(row_count, (int, float)) else 0
+                _file_id = _reg_file(
+                    case_id=case_id, phase_id=phase_id,
+                    original_filename=original_filename,
+                    processed_filename=csv_filename,
+                    sha256=file_hash, file_size=file_size,
+                    file_category=file_cat, row_count=_rc,
+                )
+            except Exception as reg_e:
+                logger.warning(f"Case file registration failed: {reg_e}")
+
+        return {
+            "status": "success",
+            "message": "File uploaded successfully",
+            "data_url": f"/api/data/{csv_filename}",
+            "csv_filename": csv_filename,
+            "xlsx_filename": None,
+            "processed_records": row_count,
+            "file_category": file_cat,
+            "original_filename": original_filename,
+            "file_id": _file_id,
+            "chain_of_custody": _chain_of_custody(original_filename, digests, file_size),
+        }
+
+    # Forensic Processing (MFT/EVTX) — run on the ingest worker pool to isolate Polars crashes
+    try:
+        result = await run_ingest(forensic_timeline_job, file_path, artifact_type, OUTPUT_DIR,
+                                  cancel=job.cancel, on_progress=lambda p: job.update(**p))
+    except IngestCancelled:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Forensic processing failed: {str(e)[-500:]}") from e
+
+    if result.get("status") != "success":
+        raise RuntimeError(result.get("error", "Unknown error"))
+
+    job.update(stage="registering", rows=result.get("processed_records"))
+    result['file_category'] = 'forensic'
+    csv_path = result['files']['csv']
+    filename = os.path.basename(csv_path)
+    processed_files[original_filename] = filename
+    _warm_dataset_handle(csv_path)
+
+    # Register forensic file in case database
+    _file_id = None
+    if case_id:
+        try:
+            from engine.case_db import register_file as _reg_file
+            _file_id = _reg_file(
+                case_id=case_id, phase_id=phase_id,
+                original_filename=original_filename,
+                processed_filename=filename,
+                sha256=file_hash, file_size=file_size,
+                file_category='forensic',
+                row_count=result.get("processed_records", 0) or 0,
+            )
+        except Exception as reg_e:
+            logger.warning(f"Case file registration failed: {reg_e}")
+
+    return {
+        "status": "success",
+        "message": "File processed successfully",
+        "data_url": f"/api/data/{filename}",
+        "processed_records": result.get("processed_records"),
+        "csv_filename": filename,
+        "xlsx_filename": os.path.basename(result['files']['excel']),
+        "original_filename": original_filename,
+        "file_id": _file_id,
+        "chain_of_custody": _chain_of_custody(original_filename, digests, file_size),
+    }
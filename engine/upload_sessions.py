@@ -0,0 +1,216 @@
+"""
+Chronos-DFIR Upload Sessions — resumable chunked uploads for multi-GB evidence.
+
+Protocol (endpoints in app.py):
+
+1. POST /api/uploads                      {filename, size, chunk_size?, sha256?, ...}
+   -> upload_id, chunk_size, total_chunks. The target file is preallocated.
+2. PUT /api/uploads/{id}/chunks/{index}   raw bytes of chunk index (any order,
+   in parallel). Chunk i covers [i * chunk_size, min(size, (i + 1) * chunk_size)).
+   An optional X-Chunk-SHA256 header is verified before the write.
+3. GET /api/uploads/{id}                  received / missing chunks, to resume
+   after a network failure (also after a server restart: state is on disk).
+4. POST /api/uploads/{id}/complete        all chunks present -> the file is
+   hashed once (SHA256 + requested digests), checked against the expected
+   SHA256 and handed to the normal ingest path. A second complete while the
+   first runs answers 409 instead of assembling the file twice.
+
+Sessions live under chronos_uploads/.sessions/<id>/ (meta.json, the
+preallocated data file, one marker file per received chunk) and are dropped
+after UPLOAD_SESSION_TTL seconds without activity.
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from typing import Optional
+
+from engine.upload_stream import MultiHasher, UPLOAD_CHUNK_SIZE
+
+logger = logging.getLogger("Chronos-DFIR")
+
+DEFAULT_SESSION_CHUNK = 8 * 2 ** 20
+MIN_SESSION_CHUNK = 256 * 2 ** 10
+MAX_SESSION_CHUNK = 64 * 2 ** 20
+UPLOAD_SESSION_TTL = 24 * 3600
+SESSIONS_DIRNAME = ".sessions"
+
+
+class UploadSessionError(Exception):
+    """Protocol error; status is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadSession:
+    """One resumable upload: metadata plus the chunks received so far (on disk)."""
+
+    def __init__(self, root: str, meta: dict):
+        self.meta = meta
+        self.id = meta["upload_id"]
+        self.dir = os.path.join(root, self.id)
+        self.data_path = os.path.join(self.dir, "data.part")
+        self.chunks_dir = os.path.join(self.dir, "chunks")
+        # Created exclusively by complete(): the session is being assembled
+        self.completing_path = os.path.join(self.dir, "completing")
+
+    @property
+    def filename(self) -> str:
+        return self.meta["filename"]
+
+    @property
+    def size(self) -> int:
+        return self.meta["size"]
+
+    @property
+    def chunk_size(self) -> int:
+        return self.meta["chunk_size"]
+
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index: int) -> int:
+        return max(0, min(self.size, (index + 1) * self.chunk_size) - index * self.chunk_size)
+
+    def check_index(self, index: int) -> None:
+        if not 0 <= index < self.total_chunks:
+            raise UploadSessionError(f"Chunk index {index} out of range 0..{self.total_chunks - 1}")
+
+    def received(self) -> list:
+        return sorted(int(n) for n in os.listdir(self.chunks_dir) if n.isdigit())
+
+    def status(self) -> dict:
+        received = self.received()
+        done = set(received)
+        return {
+            "upload_id": self.id, "filename": self.filename, "size": self.size,
+            "chunk_size": self.chunk_size, "total_chunks": self.total_chunks,
+            "received": received,
+            "missing": [i for i in range(self.total_chunks) if i not in done],
+            "bytes_received": sum(self.chunk_length(i) for i in received),
+        }
+
+
+class UploadSessionStore:
+    """Upload sessions under <upload_dir>/.sessions; see the module docstring."""
+
+    def __init__(self, upload_dir: str):
+        self.upload_dir = upload_dir
+        self.root = os.path.join(upload_dir, SESSIONS_DIRNAME)
+
+    def create(self, filename: str, size: int, chunk_size: Optional[int] = None,
+               sha256: Optional[str] = None, options: Optional[dict] = None) -> UploadSession:
+        """New session with its data file preallocated to size bytes. options are
+        the ingest parameters replayed on completion (artifact_type, case_id, ...)."""
+        filename = os.path.basename(filename or "")
+        if not filename:
+            raise UploadSessionError("filename is required")
+        if size is None or size < 0:
+            raise UploadSessionError("size must be >= 0")
+        chunk_size = chunk_size or DEFAULT_SESSION_CHUNK
+        if not MIN_SESSION_CHUNK <= chunk_size <= MAX_SESSION_CHUNK:
+            raise UploadSessionError(f"chunk_size must be within {MIN_SESSION_CHUNK}..{MAX_SESSION_CHUNK} bytes")
+        self.prune()
+        meta = {"upload_id": uuid.uuid4().hex, "filename": filename, "size": size,
+                "chunk_size": chunk_size, "sha256": (sha256 or "").lower() or None,
+                "options": options or {}, "created": time.time()}
+        session = UploadSession(self.root, meta)
+        os.makedirs(session.chunks_dir)
+        with open(session.data_path, "wb") as f:
+            f.truncate(size)
+        with open(os.path.join(session.dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        path = os.path.join(self.root, os.path.basename(upload_id), "meta.json")
+        try:
+            with open(path) as f:
+                return UploadSession(self.root, json.load(f))
+        except FileNotFoundError:
+            raise UploadSessionError(f"Unknown upload {upload_id}", status=404) from None
+
+    def write_chunk(self, session: UploadSession, index: int, data: bytes,
+                    sha256: Optional[str] = None) -> dict:
+        """Store chunk index at its offset (blocking; chunks may arrive in parallel).
+        Re-sending a chunk overwrites it."""
+        if os.path.exists(session.completing_path):
+            raise UploadSessionError(f"Upload {session.id} is being completed", status=409)
+        session.check_index(index)
+        expected = session.chunk_length(index)
+        if len(data) != expected:
+            raise UploadSessionError(f"Chunk {index} has {len(data)} bytes, expected {expected}")
+        if sha256 and hashlib.sha256(data).hexdigest() != sha256.lower():
+            raise UploadSessionError(f"Chunk {index} failed its SHA256 check", status=422)
+        fd = os.open(session.data_path, os.O_WRONLY)
+        try:
+            view, offset = memoryview(data), index * session.chunk_size
+            while view:
+                n = os.pwrite(fd, view, offset)
+                view, offset = view[n:], offset + n
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        # Marker after the data is durable: a listed chunk is always complete
+        open(os.path.join(session.chunks_dir, str(index)), "w").close()
+        os.utime(session.dir)
+        return {"index": index, "bytes": expected}
+
+    def complete(self, session: UploadSession, algos=("sha256",),
+                 sha256: Optional[str] = None) -> tuple:
+        """Verify and move the assembled file into the upload dir (blocking):
+        (path, size, {algo: hexdigest}). The session is removed on success.
+        Only one caller completes a session: a concurrent or repeated complete
+        gets 409 (404 once the session is gone); a failed check releases it."""
+        try:
+            os.close(os.open(session.completing_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            raise UploadSessionError(f"Upload {session.id} is already being completed", status=409) from None
+        except FileNotFoundError:
+            raise UploadSessionError(f"Unknown upload {session.id}", status=404) from None
+        try:
+            missing = session.status()["missing"]
+            if missing and session.size:
+                raise UploadSessionError(f"{len(missing)} chunk(s) missing: {missing[:20]}", status=409)
+            hasher = MultiHasher(algos)
+            with open(session.data_path, "rb") as f:
+                while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                    hasher.update(chunk)
+            digests = hasher.hexdigests()
+            expected = (sha256 or "").lower() or session.meta.get("sha256")
+            if expected and digests["sha256"] != expected:
+                raise UploadSessionError(
+                    f"SHA256 mismatch: expected {expected}, assembled file is {digests['sha256']}", status=422)
+        except BaseException:
+            os.remove(session.completing_path)
+            raise
+        dest = os.path.join(self.upload_dir, session.filename)
+        os.replace(session.data_path, dest)
+        # Renamed away first so no caller can claim a half-deleted session
+        done_dir = session.dir + ".done"
+        os.rename(session.dir, done_dir)
+        shutil.rmtree(done_dir, ignore_errors=True)
+        return dest, session.size, digests
+
+    def discard(self, upload_id: str) -> None:
+        shutil.rmtree(self.get(upload_id).dir, ignore_errors=True)
+
+    def prune(self) -> None:
+        """Drop sessions idle for longer than UPLOAD_SESSION_TTL."""
+        if not os.path.isdir(self.root):
+            return
+        cutoff = time.time() - UPLOAD_SESSION_TTL
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+                    logger.info(f"Dropped stale upload session {name}")
+            except OSError:
+                pass
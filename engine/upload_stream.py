@@ -0,0 +1,117 @@
+"""
+Chronos-DFIR Upload Stream — evidence copy + chain-of-custody hashing off the event loop.
+
+An uploaded body (already spooled by the multipart parser) is copied into
+chronos_uploads in UPLOAD_CHUNK_SIZE chunks (env CHRONOS_UPLOAD_CHUNK_MB,
+default 4) on a worker thread, so a multi-GB upload never blocks other
+requests. Every chunk is hashed with each requested algorithm (SHA256 always,
+MD5 / SHA1 on request) in one pass; the digests run on parallel threads next to
+the disk write (hashlib releases the GIL on large buffers), so adding MD5 and
+SHA1 costs little wall time.
+"""
+import os
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import BinaryIO, Callable, Optional
+
+from engine.query_executor import wait_future
+
+logger = logging.getLogger("Chronos-DFIR")
+
+
+def _env_chunk_size() -> int:
+    try:
+        mb = int(os.environ.get("CHRONOS_UPLOAD_CHUNK_MB", "4"))
+    except ValueError:
+        mb = 4
+    return min(8, max(1, mb)) * 2 ** 20
+
+
+UPLOAD_CHUNK_SIZE = _env_chunk_size()
+SUPPORTED_HASHES = ("sha256", "md5", "sha1")
+# Concurrent uploads being copied (each also uses up to one hash thread per algorithm)
+UPLOAD_COPY_THREADS = 4
+
+_copy_pool = ThreadPoolExecutor(max_workers=UPLOAD_COPY_THREADS, thread_name_prefix="chronos-upload")
+_hash_pool = ThreadPoolExecutor(max_workers=UPLOAD_COPY_THREADS * len(SUPPORTED_HASHES),
+                                thread_name_prefix="chronos-hash")
+
+
+class UploadCancelled(Exception):
+    """The upload's ingest job was cancelled while the body was being copied."""
+
+
+def parse_hash_list(raw: Optional[str]) -> list:
+    """'md5,sha1' -> ['sha256', 'md5', 'sha1']: SHA256 is always computed.
+    Unknown algorithms raise ValueError."""
+    algos = ["sha256"]
+    for name in (raw or "").replace(" ", "").lower().split(","):
+        if not name or name in algos:
+            continue
+        if name not in SUPPORTED_HASHES:
+            raise ValueError(f"Unsupported hash '{name}' (expected {', '.join(SUPPORTED_HASHES)})")
+        algos.append(name)
+    return algos
+
+
+class MultiHasher:
+    """Several hashlib digests fed the same chunks; with more than one
+    algorithm each chunk is hashed on parallel threads."""
+
+    def __init__(self, algos=("sha256",)):
+        self._hashes = {a: hashlib.new(a) for a in algos}
+
+    def update(self, chunk: bytes, alongside: Optional[Callable[[], None]] = None) -> None:
+        """Hash chunk with every algorithm; alongside() (e.g. the disk write)
+        runs on the calling thread meanwhile."""
+        if len(self._hashes) == 1 and alongside is None:
+            next(iter(self._hashes.values())).update(chunk)
+            return
+        futures = [_hash_pool.submit(h.update, chunk) for h in self._hashes.values()]
+        if alongside is not None:
+            alongside()
+        wait(futures)
+        for f in futures:
+            f.result()
+
+    def hexdigests(self) -> dict:
+        return {a: h.hexdigest() for a, h in self._hashes.items()}
+
+
+def copy_with_hashes(src: BinaryIO, dest_path: str, algos=("sha256",),
+                     chunk_size: int = UPLOAD_CHUNK_SIZE,
+                     on_progress: Optional[Callable[[int], None]] = None,
+                     cancel: Optional[threading.Event] = None) -> tuple:
+    """Copy src to dest_path (fsynced) while hashing it: (size, {algo: hexdigest}).
+    Blocking; raises UploadCancelled (and removes dest_path) when cancel is set."""
+    hasher = MultiHasher(algos)
+    size = 0
+    try:
+        with open(dest_path, "wb") as out:
+            while chunk := src.read(chunk_size):
+                if cancel is not None and cancel.is_set():
+                    raise UploadCancelled(os.path.basename(dest_path))
+                hasher.update(chunk, alongside=lambda: out.write(chunk))
+                size += len(chunk)
+                if on_progress is not None:
+                    on_progress(size)
+            out.flush()
+            os.fsync(out.fileno())
+    except UploadCancelled:
+        os.remove(dest_path)
+        raise
+    return size, hasher.hexdigests()
+
+
+async def run_upload_io(fn: Callable, *args, **kwargs):
+    """fn(*args, **kwargs) on an upload thread; awaitable from asyncio or trio."""
+    future = _copy_pool.submit(fn, *args, **kwargs)
+    await wait_future(future)
+    return future.result()
+
+
+async def save_upload(src: BinaryIO, dest_path: str, algos=("sha256",), **kwargs) -> tuple:
+    """copy_with_hashes on an upload thread."""
+    return await run_upload_io(copy_with_hashes, src, dest_path, algos, **kwargs)
@@ -0,0 +1,235 @@
+"""
+Chronos-DFIR View Cache — bounded LRU of filtered/sorted grid views.
+
+Tabulator pages through a view by re-requesting /api/data with identical
+query/filter/time/sort params. The first request materializes the view once
+(ordered physical row positions + summary: total rows and time bounds); every
+following page is a gather of `size` rows from the Parquet store.
+
+Entries are keyed by (dataset file version, normalized params fingerprint), so
+a rewritten store never serves stale results. Views that are one contiguous
+run of rows (e.g. unfiltered, or just a time window on a time-sorted store)
+are stored as (start, count) instead of a position vector.
+"""
+import json
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional
+import polars as pl
+
+from engine.forensic import POS_COL, TS_COL, apply_standard_processing
+from engine.session_store import EMPTY_VALUE_REGEX
+from engine.query_executor import collect
+
+logger = logging.getLogger("Chronos-DFIR")
+
+VIEW_CACHE_MAX_ENTRIES = 64
+# Budget for stored position vectors across all entries (UInt32 -> ~4 bytes each)
+VIEW_CACHE_MAX_POSITIONS = 50_000_000
+
+
+class ViewResult:
+    """Ordered physical row positions of one view plus its summary."""
+
+    def __init__(self, total: int, view_start=None, view_end=None,
+                 positions: Optional[pl.Series] = None, start: int = 0):
+        self.total = total
+        self.view_start = view_start
+        self.view_end = view_end
+        self.positions = positions  # None -> contiguous run [start, start + total)
+        self.start = start
+
+    @classmethod
+    def from_positions(cls, positions: pl.Series, view_start=None, view_end=None) -> "ViewResult":
+        n = len(positions)
+        if n == 0:
+            return cls(0, view_start, view_end)
+        first, last = positions[0], positions[-1]
+        if last - first + 1 == n and positions.is_sorted():
+            return cls(n, view_start, view_end, start=first)
+        return cls(n, view_start, view_end, positions=positions)
+
+    @property
+    def size(self) -> int:
+        """Number of stored positions (0 for contiguous runs)."""
+        return 0 if self.positions is None else len(self.positions)
+
+    def page_positions(self, offset: int, size: int) -> pl.Series:
+        offset = max(0, min(offset, self.total))
+        end = min(self.total, offset + size)
+        if self.positions is not None:
+            return self.positions.slice(offset, end - offset)
+        return pl.int_range(self.start + offset, self.start + end, dtype=pl.UInt32, eager=True)
+
+
+class ViewCache:
+    """Thread-safe LRU of ViewResult, bounded by entry count and stored positions."""
+
+    def __init__(self, max_entries: int = VIEW_CACHE_MAX_ENTRIES,
+                 max_positions: int = VIEW_CACHE_MAX_POSITIONS):
+        self.max_entries = max_entries
+        self.max_positions = max_positions
+        self._entries: OrderedDict = OrderedDict()
+        self._positions = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[ViewResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result: ViewResult) -> None:
+        if result.size > self.max_positions:
+            return  # larger than the whole budget: recompute instead
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._positions -= old.size
+            self._entries[key] = result
+            self._positions += result.size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._positions > self.max_positions):
+                _, evicted = self._entries.popitem(last=False)
+                self._positions -= evicted.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._positions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "stored_positions": self._positions,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+view_cache = ViewCache()
+
+
+def view_key(dataset, params: dict) -> tuple:
+    """(file version, fingerprint) for a view; col_filters JSON is normalized so
+    equivalent filter strings share an entry."""
+    norm = {k: v for k, v in params.items() if k != "dataset" and v not in (None, "", [], {})}
+    if isinstance(norm.get("col_filters"), str):
+        try:
+            norm["col_filters"] = json.loads(norm["col_filters"])
+        except ValueError:
+            pass
+    return dataset.version, json.dumps(norm, sort_keys=True, default=str)
+
+
+def _bounds(df: pl.DataFrame, col: Optional[str]) -> tuple:
+    if col is None or df.is_empty():
+        return None, None
+    s = df[col]
+    if col == TS_COL:
+        s = s.dt.strftime("%Y-%m-%d %H:%M:%S")
+    lo, hi = s.min(), s.max()
+    return (str(lo) if lo is not None else None), (str(hi) if hi is not None else None)
+
+
+def resolve_view(dataset, params: dict) -> ViewResult:
+    """Cached view for params over dataset; runs the filter/sort pipeline once per key."""
+    key = view_key(dataset, params)
+    result = view_cache.get(key)
+    if result is not None:
+        return result
+
+    lf = apply_standard_processing(dataset.scan(row_index=POS_COL), dict(params, dataset=dataset))
+    names = lf.collect_schema().names()
+    # View time bounds: canonical _ts when present, legacy "Time" string otherwise
+    bound_col = TS_COL if TS_COL in names else ("Time" if "Time" in names else None)
+    df = collect(lf.select([POS_COL] + ([bound_col] if bound_col else [])), engine="streaming")
+    result = ViewResult.from_positions(df[POS_COL], *_bounds(df, bound_col))
+    view_cache.put(key, result)
+    return result
+
+
+_FILTER_KEYS = ("query", "col_filters", "start_time", "end_time", "selected_ids")
+
+
+def is_unfiltered(params: dict) -> bool:
+    """True when params select every row of the dataset (sort is irrelevant)."""
+    for k in _FILTER_KEYS:
+        v = params.get(k)
+        if isinstance(v, str):
+            v = v.strip()
+            if v in ("[]", "{}", "null"):
+                v = None
+        if v:
+            return False
+    return True
+
+
+def view_rows(dataset, view: ViewResult) -> pl.LazyFrame:
+    """Every row of view in file order: a plain slice for contiguous views."""
+    if view.positions is None:
+        return dataset.scan().slice(view.start, view.total)
+    return dataset.gather(view.positions, ordered=False)
+
+
+def _blank_expr(col: str) -> pl.Expr:
+    return (
+        pl.col(col).is_null() |
+        pl.col(col).cast(pl.Utf8, strict=False).str.contains(EMPTY_VALUE_REGEX).fill_null(False)
+    )
+
+
+def empty_columns_plan(dataset, params: dict, columns: list, view: Optional[ViewResult] = None) -> tuple:
+    """
+    (always, query): columns settled as empty by the dataset's column stats, plus
+    a one-row LazyFrame of all-blank flags for the columns the stats cannot
+    settle (None when there are none). Columns blank everywhere are empty in any
+    view and columns with no blank value are empty in none, so only the remaining
+    ones are checked, against the view rows. Unfiltered views are answered from
+    the stats alone. view: the already resolved view for params, if any (sort
+    order does not matter).
+    """
+    stats = dataset.column_stats["columns"]
+    rows = dataset.column_stats["rows"]
+    unfiltered = is_unfiltered(params)
+    always, unknown = [], []
+    for c in columns:
+        st = stats.get(c)
+        blank = None if st is None else st["null_count"] + st["empty_count"]
+        if blank == rows:
+            always.append(c)
+        elif blank is None or (blank > 0 and not unfiltered):
+            unknown.append(c)
+    if unfiltered and not unknown:
+        return always, None
+
+    view = view or resolve_view(dataset, params)
+    if view.total == 0:
+        return list(columns), None  # every column is empty in an empty view
+    if not unknown:
+        return always, None
+    return always, view_rows(dataset, view).select([_blank_expr(c).all().alias(c) for c in unknown])
+
+
+def merge_empty_columns(columns: list, always: list, flags: Optional[pl.DataFrame]) -> list:
+    """Empty columns in columns order, from empty_columns_plan and its collected flags."""
+    settled = set(always)
+    if flags is not None:
+        settled.update(c for c in flags.columns if flags[c][0])
+    return [c for c in columns if c in settled]
+
+
+def view_empty_columns(dataset, params: dict, columns: list) -> list:
+    """Columns whose every value in the view is null or a sentinel empty value
+    (see empty_columns_plan)."""
+    always, query = empty_columns_plan(dataset, params, columns)
+    flags = collect(query, engine="streaming") if query is not None else None
+    return merge_empty_columns(columns, always, flags)
@@ -0,0 +1,93 @@
+"""
+Chronos-DFIR View Snapshot — everything the UI shows for one filter state.
+
+After a filter change the grid page, row counts, view time bounds, histogram
+and empty-column flags used to come from /api/data, /api/histogram and
+/api/empty_columns, each re-running the query/filter pipeline on its own.
+view_snapshot() resolves the view once (resolve_view: ordered row positions,
+total and time bounds, shared with /api/data's cache) and derives the rest from
+those positions instead of re-filtering:
+
+- page rows and empty-column flags are evaluated together with pl.collect_all,
+  so their gathers share one pass over the store;
+- the chart is answered from the time cube when the view is at most a time
+  window, otherwise analyzed over the view's rows (gathered, not re-filtered).
+"""
+import math
+import logging
+from typing import Optional
+import polars as pl
+
+from engine.forensic import (
+    INTERNAL_COLUMNS, sanitize_context_data, normalize_time_columns_in_df,
+    drop_internal_columns,
+)
+from engine.view_cache import (
+    resolve_view, is_unfiltered, view_rows, empty_columns_plan, merge_empty_columns,
+)
+from engine.analyzer import analyze_dataframe, analyze_time_cube, dataset_file_bounds
+from engine.query_executor import check_cancelled
+
+logger = logging.getLogger("Chronos-DFIR")
+
+# Index columns that always hold data; never reported as empty
+INDEX_COLUMNS = frozenset({"_id", "No.", "Original_No."})
+SNAPSHOT_PARTS = ("page", "histogram", "empty_columns")
+
+
+def view_snapshot(dataset, params: dict, page: int = 1, size: int = 50,
+                  columns: Optional[list] = None, parts=SNAPSHOT_PARTS) -> dict:
+    """
+    Grid page + counts + time bounds (always), plus the histogram and the
+    empty columns of the view when listed in parts. params: query, col_filters,
+    start_time, end_time, sort_col, sort_dir (as for /api/data). columns: grid
+    projection (None = every column). empty_columns is left out for stores
+    without ingest column stats. The page comes back as a DataFrame under
+    "data" so callers pick the wire format.
+    """
+    view = resolve_view(dataset, params)
+    total = view.total
+    result = {
+        "current_page": page,
+        "last_page": math.ceil(total / size) if size > 0 else 1,
+        "total": total,
+        "total_unfiltered": dataset.row_count,
+        "start_time": view.view_start if total else None,
+        "end_time": view.view_end if total else None,
+    }
+
+    queries, empty_plan = [], None
+    if total and "page" in parts:
+        q = sanitize_context_data(dataset.gather(view.page_positions((page - 1) * size, size)))
+        if columns:
+            names = q.collect_schema().names()
+            q = q.select([c for c in dict.fromkeys(["_id", *columns]) if c in names])
+        queries.append(drop_internal_columns(normalize_time_columns_in_df(q)))
+    if "empty_columns" in parts and dataset.column_stats is not None:
+        all_cols = [c for c in dataset.schema.names() if c not in INTERNAL_COLUMNS]
+        always, flags_lf = empty_columns_plan(dataset, params, all_cols, view=view)
+        empty_plan = (all_cols, always, flags_lf is not None)
+        if flags_lf is not None:
+            queries.append(flags_lf)
+
+    check_cancelled()
+    frames = pl.collect_all(queries) if queries else []
+    check_cancelled()
+
+    if "page" in parts:
+        result["data"] = frames.pop(0) if total else pl.DataFrame()
+    if empty_plan is not None:
+        all_cols, always, has_flags = empty_plan
+        empty = merge_empty_columns(all_cols, always, frames.pop(0) if has_flags else None)
+        result["empty_columns"] = [c for c in empty if c not in INDEX_COLUMNS]
+
+    if "histogram" in parts:
+        if dataset.time_cube and is_unfiltered({**params, "start_time": None, "end_time": None}):
+            result["histogram"] = analyze_time_cube(dataset, start_time=params.get("start_time"),
+                                                    end_time=params.get("end_time"))
+        else:
+            result["histogram"] = analyze_dataframe(
+                sanitize_context_data(view_rows(dataset, view)),
+                start_time=params.get("start_time"), end_time=params.get("end_time"),
+                file_bounds=dataset_file_bounds(dataset))
+    return result
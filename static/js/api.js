@@ -3,6 +3,60 @@
  * Centralizes all backend communications.
  */
 
+import { sha256Blob } from './sha256.js?v=202';
+
+// Loaded on first use of format=arrow only
+const ARROW_MODULE_URL = 'https://cdn.jsdelivr.net/npm/apache-arrow@17.0.0/+esm';
+let arrowModule = null;
+
+/** Nested params as bracketed query keys (sort[0][field]=...), like Tabulator's own ajax URLs; nulls are omitted */
+function flattenParams(params, prefix = '', out = {}) {
+    for (const [k, v] of Object.entries(params || {})) {
+        const key = prefix ? `${prefix}[${k}]` : k;
+        if (v === null || v === undefined) continue;
+        if (typeof v === 'object') flattenParams(v, key, out);
+        else out[key] = v;
+    }
+    return out;
+}
+
+/** Row objects from column arrays ({col: [values]}) in the given column order */
+function columnsToRows(columns, data) {
+    const n = columns.length ? data[columns[0]].length : 0;
+    const rows = new Array(n);
+    for (let i = 0; i < n; i++) {
+        const row = {};
+        for (const c of columns) row[c] = data[c][i];
+        rows[i] = row;
+    }
+    return rows;
+}
+
+/** Arrow IPC page → {columns, data}; Int64 values come back as BigInt, turned into Numbers */
+async function decodeArrowPage(buffer) {
+    arrowModule = arrowModule || await import(ARROW_MODULE_URL);
+    const table = arrowModule.tableFromIPC(new Uint8Array(buffer));
+    const columns = table.schema.fields.map(f => f.name);
+    const data = {};
+    columns.forEach((c, i) => {
+        data[c] = Array.from(table.getChildAt(i) || [], v => typeof v === 'bigint' ? Number(v) : v);
+    });
+    return { columns, data };
+}
+
+/** Paging fields the server sends as X-Chronos-* headers with format=arrow */
+function arrowPageMeta(headers) {
+    const num = (h) => { const v = headers.get(h); return v === null ? undefined : Number(v); };
+    return {
+        current_page: num('X-Chronos-Current-Page'),
+        last_page: num('X-Chronos-Last-Page'),
+        total: num('X-Chronos-Total'),
+        total_unfiltered: num('X-Chronos-Total-Unfiltered'),
+        start_time: headers.get('X-Chronos-Start-Time'),
+        end_time: headers.get('X-Chronos-End-Time')
+    };
+}
+
 export const API = {
     async uploadFile(formData) {
         const response = await fetch('/upload', {
@@ -12,6 +66,103 @@ export const API = {
         return await response.json();
     },
 
+    /**
+     * Resumable chunked upload (/api/uploads) for multi-GB evidence: chunks are
+     * PUT `parallel` at a time, each retried with backoff; an interrupted upload
+     * of the same file (name + size + mtime) resumes from the server's list of
+     * missing chunks. Every chunk carries its SHA-256 (X-Chunk-SHA256) and the
+     * whole file's SHA-256, hashed while the chunks upload, is checked on
+     * /complete. Resolves with the /complete response (same shapes as /upload;
+     * background=true returns the ingest job id).
+     */
+    async uploadResumable(file, { artifactType = 'generic', background = true, parallel = 4,
+                                  retries = 4, onProgress = () => {} } = {}) {
+        const key = `chronos-upload:${file.name}:${file.size}:${file.lastModified}`;
+        let session = null;
+        const saved = localStorage.getItem(key);
+        if (saved) {
+            const r = await fetch(`/api/uploads/${saved}`);
+            if (r.ok) session = await r.json();
+        }
+        if (!session) {
+            const r = await fetch('/api/uploads', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ filename: file.name, size: file.size, artifact_type: artifactType })
+            });
+            session = await r.json();
+            if (!r.ok) throw new Error(session.error || `Upload init failed (${r.status})`);
+            localStorage.setItem(key, session.upload_id);
+        }
+        const { upload_id: id, chunk_size: chunkSize } = session;
+        // Whole-file digest, read alongside the chunk uploads
+        const fileSha256 = sha256Blob(file, chunkSize);
+        const queue = [...session.missing];
+        let sent = session.bytes_received;
+        onProgress(sent, file.size);
+
+        const putChunk = async (index) => {
+            const blob = file.slice(index * chunkSize, Math.min(file.size, (index + 1) * chunkSize));
+            const body = await blob.arrayBuffer();
+            const digest = new Uint8Array(await crypto.subtle.digest('SHA-256', body));
+            const headers = { 'X-Chunk-SHA256': Array.from(digest, b => b.toString(16).padStart(2, '0')).join('') };
+            for (let attempt = 0; ; attempt++) {
+                try {
+                    const r = await fetch(`/api/uploads/${id}/chunks/${index}`, { method: 'PUT', headers, body });
+                    if (r.ok) break;
+                    if (r.status < 500) throw new Error((await r.json()).error || `Chunk ${index}: HTTP ${r.status}`);
+                } catch (err) {
+                    if (attempt >= retries) throw err;
+                }
+                await new Promise(res => setTimeout(res, 500 * 2 ** attempt));
+            }
+            sent += blob.size;
+            onProgress(sent, file.size);
+        };
+        const lane = async () => {
+            while (queue.length) await putChunk(queue.shift());
+        };
+        await Promise.all(Array.from({ length: Math.min(parallel, queue.length) }, lane));
+
+        const r = await fetch(`/api/uploads/${id}/complete`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ background, sha256: await fileSha256 })
+        });
+        const result = await r.json();
+        if (r.status !== 409) localStorage.removeItem(key);
+        return result;
+    },
+
+    /**
+     * Follow an ingest job (POST /upload with background=true) over its SSE
+     * stream. onUpdate(job) gets every progress event; resolves with the final
+     * job ({status: 'done'|'failed'|'cancelled', result, error, ...}).
+     */
+    followIngestJob(jobId, onUpdate = () => {}) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`/api/ingest/jobs/${jobId}/events`);
+            source.onmessage = (event) => {
+                const job = JSON.parse(event.data);
+                onUpdate(job);
+                if (['done', 'failed', 'cancelled'].includes(job.status)) {
+                    source.close();
+                    resolve(job);
+                }
+            };
+            source.onerror = () => {
+                // Stream dropped: fall back to one status read
+                source.close();
+                fetch(`/api/ingest/jobs/${jobId}`).then(r => r.json()).then(resolve, reject);
+            };
+        });
+    },
+
+    async cancelIngestJob(jobId) {
+        const response = await fetch(`/api/ingest/jobs/${jobId}`, { method: 'DELETE' });
+        return await response.json();
+    },
+
     async processArtifact(artifactType, filePath) {
         const formData = new FormData();
         formData.append('artifact_type', artifactType);
@@ -24,10 +175,41 @@ export const API = {
         return await response.json();
     },
 
+    /**
+     * Grid page. params.format selects the wire format ('json' default,
+     * 'columnar-json', 'arrow'); every format resolves to the same
+     * {data: [rows], total, ...} shape, plus `columns` for the columnar ones.
+     */
     async fetchData(filename, params = {}) {
-        const urlParams = new URLSearchParams(params);
-        const response = await fetch(`/api/data/${filename}?${urlParams.toString()}`);
-        return await response.json();
+        return this.fetchPage(`/api/data/${filename}`, params);
+    },
+
+    async fetchPage(url, params = {}) {
+        const urlParams = new URLSearchParams(flattenParams(params));
+        const response = await fetch(`${url}?${urlParams.toString()}`);
+        if (response.status === 409) {
+            // Superseded by a newer request of this tab; Tabulator drops the stale load
+            return { superseded: true, data: [], last_page: 1 };
+        }
+        const type = response.headers.get('Content-Type') || '';
+        if (type.includes('arrow')) {
+            const { columns, data } = await decodeArrowPage(await response.arrayBuffer());
+            return { ...arrowPageMeta(response.headers), columns, data: columnsToRows(columns, data) };
+        }
+        const json = await response.json();
+        if (Array.isArray(json.columns) && json.data && !Array.isArray(json.data)) {
+            return { ...json, data: columnsToRows(json.columns, json.data) };
+        }
+        return json;
+    },
+
+    /**
+     * View snapshot: grid page + counts + time bounds, histogram and empty
+     * columns for one filter state in a single request (params.include picks
+     * the parts). Same params as fetchData; JSON only.
+     */
+    async fetchView(filename, params = {}) {
+        return this.fetchPage(`/api/view/${filename}`, params);
     },
 
     async getEmptyColumns(filename, params = {}) {
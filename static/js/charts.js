@@ -526,9 +526,11 @@ export class ChartManager {
         if (selectedIds.length > 0) {
             params.append('selected_ids', JSON.stringify(selectedIds));
         }
+        params.append('view_id', ChronosState.viewId);
 
         try {
             const response = await fetch(`/api/histogram/${encodeURIComponent(filename)}?${params.toString()}`);
+            if (response.status === 409) return; // superseded: the newer request renders
             if (!response.ok) throw new Error("Chart data fetch failed");
             const data = await response.json();
             this.updateWithData(data);
@@ -550,10 +552,12 @@ export class ChartManager {
                     query: ChronosState.currentQuery || "",
                     start_time: ChronosState.startTime || "",
                     end_time: ChronosState.endTime || "",
-                    col_filters: JSON.stringify(ChronosState.currentColumnFilters || {})
+                    col_filters: JSON.stringify(ChronosState.currentColumnFilters || {}),
+                    view_id: ChronosState.viewId
                 })
             });
 
+            if (response.status === 409) return; // superseded: the newer request renders
             if (!response.ok) throw new Error("Subset data fetch failed");
             const data = await response.json();
             this.updateWithData(data);
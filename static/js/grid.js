@@ -54,15 +54,26 @@ export class GridManager {
         });
     }
 
+    /** Visible data fields when some are hidden (server then reads/serializes only those), else null */
+    _visibleFields() {
+        if (!this.table) return null;
+        const fields = this.table.getColumns().filter(c => c.getField());
+        const visible = fields.filter(c => c.isVisible()).map(c => c.getField());
+        return visible.length < fields.length ? visible : null;
+    }
+
     reload() {
         if (!this.table || !ChronosState.currentFilename) return;
         this._isReloading = true;
-        this.table.setData(`/api/data/${ChronosState.currentFilename}`, {
+        const params = {
             query: ChronosState.currentQuery,
             start_time: ChronosState.startTime,
             end_time: ChronosState.endTime,
             col_filters: JSON.stringify(ChronosState.currentColumnFilters)
-        }).then(() => {
+        };
+        this._fetchedFields = this._visibleFields();
+        if (this._fetchedFields) params.columns = JSON.stringify(this._fetchedFields);
+        this.table.setData(`/api/data/${ChronosState.currentFilename}`, params).then(() => {
             this._isReloading = false;
             this._resyncSelectionUI();
         }).catch(() => {
@@ -147,6 +158,9 @@ export class GridManager {
         this.table = new Tabulator(`#${this.elementId}`, {
             ...defaultConfig,
             ...options,
+            // Pages travel as columnar JSON (one array per column, no repeated keys)
+            // and are rebuilt into row objects by the API client
+            ajaxRequestFunc: (url, config, params) => API.fetchPage(url, { ...params, format: 'columnar-json', view_id: ChronosState.viewId }),
             ajaxResponse: (url, params, response) => {
                 if (response.total !== undefined) {
                     const unfiltered = response.total_unfiltered ?? response.total;
@@ -178,6 +192,15 @@ export class GridManager {
             events.emit('SELECTION_CHANGED');
         });
 
+        // Pages only carry the fields visible at the last reload; showing another
+        // column needs its data, so refetch (once per batch of show() calls)
+        this._fetchedFields = null;
+        this.table.on("columnVisibilityChanged", (column, visible) => {
+            if (!visible || !this._fetchedFields || this._fetchedFields.includes(column.getField())) return;
+            clearTimeout(this._projectionTimer);
+            this._projectionTimer = setTimeout(() => this.reload(), 0);
+        });
+
         // Sync header filters → ChronosState via updateFilters (emits FILTERS_CHANGED).
         // This ensures grid, chart, and exports all use the exact same filter state.
         this._headerFilterTimer = null;
@@ -385,9 +408,11 @@ export class GridManager {
                 start_time: window.ChronosState?.startTime || '',
                 end_time: window.ChronosState?.endTime || '',
                 col_filters: JSON.stringify(window.ChronosState?.currentColumnFilters || this.table.getHeaderFilters() || []),
-                selected_ids: JSON.stringify(window.ChronosState?.selectedIds || [])
+                selected_ids: JSON.stringify(window.ChronosState?.selectedIds || []),
+                view_id: ChronosState.viewId
             };
             const data = await API.getEmptyColumns(filename, params);
+            if (data.superseded) return;
             const emptySet = new Set((data.empty_columns || []).map(c => c.toLowerCase()));
 
             const toHide = [];
@@ -622,6 +647,7 @@ export class GridManager {
             ...otherDefs.map(c => ({ ...c, visible: false }))
         ];
         this.table.setColumns(rebuiltDefs);
+        this.reload(); // Refetch the current view with only the selected columns
 
         setTimeout(() => {
             if (this.columnManagerActive) this.injectColumnManagerUI();
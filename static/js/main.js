@@ -423,6 +423,9 @@ async function exportData(format) {
     }
 }
 
+// Files at least this large go through the resumable chunked upload (/api/uploads)
+const RESUMABLE_UPLOAD_THRESHOLD = 256 * 1024 * 1024;
+
 async function processArtifact() {
     if (window._uploadInProgress) return;
 
@@ -444,12 +447,32 @@ async function processArtifact() {
     processBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
     processBtn.disabled = true;
 
-    const formData = new FormData();
-    formData.append('file', file);
-    formData.append('artifact_type', artifactType);
-
     try {
-        const result = await API.uploadFile(formData);
+        let result;
+        if (file.size >= RESUMABLE_UPLOAD_THRESHOLD) {
+            // Multi-GB evidence: parallel, resumable chunks instead of one multipart body
+            result = await API.uploadResumable(file, {
+                artifactType,
+                onProgress: (sent, total) => {
+                    const pct = total ? Math.floor(sent * 100 / total) : 100;
+                    processBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Uploading ${pct}%...`;
+                }
+            });
+        } else {
+            const formData = new FormData();
+            formData.append('file', file);
+            formData.append('artifact_type', artifactType);
+            formData.append('background', 'true');
+            result = await API.uploadFile(formData);
+        }
+        if (result.job_id) {
+            // Parsing runs as an ingest job: show its stage / rows while it runs
+            const job = await API.followIngestJob(result.job_id, (j) => {
+                const rows = j.rows ? ` — ${Number(j.rows).toLocaleString()} rows` : '';
+                processBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${j.stage}${rows}...`;
+            });
+            result = job.status === 'done' ? job.result : { error: job.error || `Ingest ${job.status}` };
+        }
         if (result.status === 'success') {
             ChronosState.setSession(result.csv_filename, { csv: result.csv_filename, excel: null });
         } else {
@@ -0,0 +1,92 @@
+/**
+ * Incremental SHA-256 for the resumable upload's final digest.
+ * crypto.subtle.digest only hashes a whole buffer, and a multi-GB file cannot
+ * be held in memory, so the file is fed through update() slice by slice.
+ */
+
+const K = new Int32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+]);
+
+export class Sha256 {
+    constructor() {
+        this.h = new Int32Array([0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+                                  0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19]);
+        this.w = new Int32Array(64);
+        this.block = new Uint8Array(64);
+        this.pending = 0;
+        this.length = 0;
+    }
+
+    /** Hash the 64-byte block at bytes[offset] */
+    compress(bytes, offset) {
+        const w = this.w, h = this.h;
+        for (let i = 0; i < 16; i++, offset += 4) {
+            w[i] = (bytes[offset] << 24) | (bytes[offset + 1] << 16) | (bytes[offset + 2] << 8) | bytes[offset + 3];
+        }
+        for (let i = 16; i < 64; i++) {
+            const x = w[i - 15], y = w[i - 2];
+            const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+            const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+            w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+        }
+        let a = h[0] | 0, b = h[1] | 0, c = h[2] | 0, d = h[3] | 0;
+        let e = h[4] | 0, f = h[5] | 0, g = h[6] | 0, k = h[7] | 0;
+        for (let i = 0; i < 64; i++) {
+            const s1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+            const t1 = (k + s1 + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0;
+            const s0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+            const t2 = (s0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+            k = g; g = f; f = e; e = (d + t1) | 0;
+            d = c; c = b; b = a; a = (t1 + t2) | 0;
+        }
+        h[0] = (h[0] + a) | 0; h[1] = (h[1] + b) | 0; h[2] = (h[2] + c) | 0; h[3] = (h[3] + d) | 0;
+        h[4] = (h[4] + e) | 0; h[5] = (h[5] + f) | 0; h[6] = (h[6] + g) | 0; h[7] = (h[7] + k) | 0;
+    }
+
+    /** @param {Uint8Array} bytes */
+    update(bytes) {
+        let i = 0;
+        this.length += bytes.length;
+        if (this.pending) {
+            i = Math.min(64 - this.pending, bytes.length);
+            this.block.set(bytes.subarray(0, i), this.pending);
+            this.pending += i;
+            if (this.pending < 64) return this;
+            this.compress(this.block, 0);
+            this.pending = 0;
+        }
+        for (; i + 64 <= bytes.length; i += 64) this.compress(bytes, i);
+        this.block.set(bytes.subarray(i), 0);
+        this.pending = bytes.length - i;
+        return this;
+    }
+
+    /** Lowercase hex digest; the hasher must not be updated afterwards */
+    hexdigest() {
+        const bits = this.length * 8;
+        const tail = new Uint8Array(this.pending < 56 ? 64 - this.pending : 128 - this.pending);
+        tail[0] = 0x80;
+        const view = new DataView(tail.buffer);
+        view.setUint32(tail.length - 8, Math.floor(bits / 2 ** 32));
+        view.setUint32(tail.length - 4, bits >>> 0);
+        this.update(tail);
+        return Array.from(this.h, x => (x >>> 0).toString(16).padStart(8, '0')).join('');
+    }
+}
+
+/** SHA-256 hex digest of a File / Blob, read in sliceSize pieces */
+export async function sha256Blob(blob, sliceSize = 8 * 2 ** 20) {
+    const hasher = new Sha256();
+    for (let offset = 0; offset < blob.size; offset += sliceSize) {
+        hasher.update(new Uint8Array(await blob.slice(offset, offset + sliceSize).arrayBuffer()));
+    }
+    return hasher.hexdigest();
+}
@@ -7,6 +7,9 @@ import events from './events.js?v=202';
 const ChronosState = {
     // Session Data
     currentFilename: null,
+    // Per-tab id sent with grid/chart queries: the server cancels this tab's
+    // superseded in-flight requests when a newer one arrives
+    viewId: (crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(16).slice(2)}`),
     processedFiles: { csv: null, excel: null },
 
     // Data State
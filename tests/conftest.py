@@ -2,5 +2,28 @@
 import sys
 import os
 
+import pytest
+
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def isolated_app_dirs(tmp_path, monkeypatch):
+    """Point the app's output / upload dirs and the case DB at tmp_path, so API
+    tests never write into chronos_output/, chronos_uploads/ or chronos_cases.duckdb.
+    Returns (output_dir, upload_dir)."""
+    import app
+    from engine import case_db, upload_router
+    out, up = str(tmp_path / "chronos_output"), str(tmp_path / "chronos_uploads")
+    os.makedirs(out)
+    os.makedirs(up)
+    for module in (app, upload_router):
+        monkeypatch.setattr(module, "OUTPUT_DIR", out)
+        monkeypatch.setattr(module, "UPLOAD_DIR", up)
+    monkeypatch.setattr(upload_router, "upload_sessions", upload_router.UploadSessionStore(up))
+    monkeypatch.setattr(case_db, "_DB_PATH", str(tmp_path / "chronos_cases.duckdb"))
+    monkeypatch.setattr(case_db, "_conn", None)
+    yield out, up
+    if case_db._conn is not None:
+        case_db._conn.close()
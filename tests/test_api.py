@@ -2,26 +2,26 @@
 Run: pytest tests/test_api.py -v
 """
 import os
+import hashlib
 import tempfile
 import polars as pl
 import pytest
 from httpx import AsyncClient, ASGITransport
 
-from app import app, OUTPUT_DIR, UPLOAD_DIR
+from app import app
 
 
 @pytest.fixture(autouse=True)
-def _ensure_dirs():
-    """Ensure upload/output dirs exist for tests."""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+def _dirs(isolated_app_dirs):
+    """Upload/output dirs and case DB under tmp_path: (output_dir, upload_dir)."""
+    return isolated_app_dirs
 
 
 @pytest.fixture
-def _seed_csv():
+def _seed_csv(_dirs):
     """Create a test CSV in OUTPUT_DIR and return its filename."""
     fname = "test_api_seed.csv"
-    path = os.path.join(OUTPUT_DIR, fname)
+    path = os.path.join(_dirs[0], fname)
     pl.DataFrame({
         "Time": ["2025-01-01 10:00:00", "2025-01-02 11:00:00", "2025-01-03 12:00:00"],
         "EventID": ["4624", "4625", "4624"],
@@ -60,6 +60,32 @@ async def test_upload_csv():
         assert body["csv_filename"].endswith(".csv")
 
 
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_download_processed_csv(anyio_backend, _dirs, monkeypatch):
+    """GET /download/<processed>.csv exports the Parquet store behind the handle."""
+    import app as app_module
+    monkeypatch.setattr(app_module, "delete_file", os.remove)  # no 30 s grace period
+    csv_content = "Time,EventID,Source\n2025-01-01 10:00:00,4624,WS01\n2025-01-02 11:00:00,4625,WS02\n"
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(
+            "/upload",
+            files={"file": ("test_download.csv", csv_content.encode(), "text/csv")},
+            data={"artifact_type": "Generic"},
+        )
+        csv_filename = r.json()["csv_filename"]
+        assert not os.path.exists(os.path.join(_dirs[0], csv_filename))
+        r = await client.get(f"/download/{csv_filename}")
+        assert r.status_code == 200
+        df = pl.read_csv(r.content, infer_schema_length=0)
+        assert df.select("_id", "Time", "EventID", "Source").rows() == [
+            ("1", "2025-01-01 10:00:00", "4624", "WS01"), ("2", "2025-01-02 11:00:00", "4625", "WS02")]
+        assert "_ts" not in df.columns
+        assert not [f for f in os.listdir(_dirs[0]) if f.startswith("Download_")]
+        assert (await client.get("/download/missing.csv")).status_code == 404
+
+
 @pytest.mark.anyio
 async def test_data_endpoint_pagination(_seed_csv):
     """GET /api/data/{filename} should return paginated data."""
@@ -125,6 +151,25 @@ async def test_export_filtered_csv(_seed_csv):
         assert "text/csv" in r.headers.get("content-type", "") or r.status_code == 200
 
 
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_forensic_report_and_html_export(anyio_backend, _seed_csv, _dirs):
+    """Report and HTML export run on the query executor and answer as before."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post("/api/forensic_report", json={"filename": _seed_csv})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["total_records"] == 3
+        assert {"top_tactic", "primary_identity", "risk_level", "eps"} <= set(body)
+        r = await client.post("/api/export/html", json={"filename": _seed_csv, "query": "4624"})
+        assert r.status_code == 200
+        with open(os.path.join(_dirs[0], r.json()["filename"]), encoding="utf-8") as f:
+            assert "<html" in f.read().lower()
+        r = await client.post("/api/export/html", json={"filename": "missing.csv"})
+        assert r.status_code == 404
+
+
 @pytest.mark.anyio
 async def test_reset_endpoint():
     """POST /api/reset should clear state and return success."""
@@ -134,3 +179,110 @@ async def test_reset_endpoint():
         assert r.status_code == 200
         body = r.json()
         assert "message" in body or body.get("status") == "success"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_upload_background_job(anyio_backend):
+    """POST /upload with background=true returns a job id; status and the SSE
+    stream end with the same result a blocking upload returns."""
+    csv_content = "Time,EventID,Source\n2025-01-01 10:00:00,4624,WS01\n2025-01-01 11:00:00,4625,WS02\n"
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(
+            "/upload",
+            files={"file": ("test_upload_bg.csv", csv_content.encode(), "text/csv")},
+            data={"artifact_type": "Generic", "background": "true", "priority": "1", "hashes": "md5"},
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert body["status"] == "queued" and body["chain_of_custody"]["file_size_bytes"] == len(csv_content)
+        assert body["chain_of_custody"]["md5"] == hashlib.md5(csv_content.encode()).hexdigest()
+        job = (await client.get(body["status_url"])).json()
+        assert job["status"] == "done" and job["rows"] == 2
+        assert job["result"]["csv_filename"].endswith(".csv")
+        events = (await client.get(body["events_url"])).text
+        assert events.startswith("data: ") and '"status": "done"' in events
+        assert (await client.get("/api/ingest/jobs/nope")).status_code == 404
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_resumable_chunked_upload(anyio_backend):
+    """init -> chunks out of order (one resent after a status check) -> complete
+    verifies the SHA256 and ingests like /upload."""
+    from engine.upload_sessions import MIN_SESSION_CHUNK
+    rows = "".join(f"2025-01-01 10:{i % 60:02d}:00,{4624 + i % 2},WS{i:05d}\n" for i in range(12000))
+    data = ("Time,EventID,Source\n" + rows).encode()
+    sha = hashlib.sha256(data).hexdigest()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post("/api/uploads", json={"filename": "test_resumable.csv", "size": len(data),
+                                                    "chunk_size": MIN_SESSION_CHUNK, "sha256": sha,
+                                                    "hashes": "sha1"})
+        assert r.status_code == 200
+        session = r.json()
+        url, n = session["upload_url"], session["total_chunks"]
+        assert n > 1 and session["missing"] == list(range(n))
+        part = lambda i: data[i * MIN_SESSION_CHUNK:(i + 1) * MIN_SESSION_CHUNK]
+        for i in reversed(range(1, n)):
+            assert (await client.put(f"{url}/chunks/{i}", content=part(i))).status_code == 200
+        assert (await client.post(f"{url}/complete", json={})).status_code == 409
+        assert (await client.get(url)).json()["missing"] == [0]
+        bad = await client.put(f"{url}/chunks/0", content=part(0), headers={"X-Chunk-SHA256": "0" * 64})
+        assert bad.status_code == 422
+        good = hashlib.sha256(part(0)).hexdigest()
+        assert (await client.put(f"{url}/chunks/0", content=part(0),
+                                 headers={"X-Chunk-SHA256": good})).status_code == 200
+        r = await client.post(f"{url}/complete", json={"sha256": sha})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["status"] == "success" and body["processed_records"] == 12000
+        assert body["chain_of_custody"]["sha256"] == sha
+        assert body["chain_of_custody"]["sha1"] == hashlib.sha1(data).hexdigest()
+        assert (await client.get(url)).status_code == 404
+        assert (await client.post(f"{url}/complete", json={"sha256": sha})).status_code == 404
+
+        r = await client.post("/api/uploads", json={"filename": "bad.csv", "size": 3, "sha256": "f" * 64})
+        url = r.json()["upload_url"]
+        await client.put(f"{url}/chunks/0", content=b"a,b")
+        r = await client.post(f"{url}/complete")
+        assert r.status_code == 422 and "SHA256 mismatch" in r.json()["error"]
+        assert (await client.delete(url)).json()["status"] == "aborted"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_resumable_upload_limits_chunk_bodies_and_fails_jobs(anyio_backend, monkeypatch):
+    """Chunk bodies over the chunk's length get 413 before being buffered (by
+    Content-Length or while streaming); an I/O error on complete fails its job."""
+    from engine import upload_router
+    from engine.ingest_jobs import ingest_jobs
+    from engine.upload_sessions import MIN_SESSION_CHUNK
+    data = b"x" * (MIN_SESSION_CHUNK + 10)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post("/api/uploads", json={"filename": "test_limits.csv", "size": len(data),
+                                                    "chunk_size": MIN_SESSION_CHUNK})
+        url = r.json()["upload_url"]
+        r = await client.put(f"{url}/chunks/1", content=data)
+        assert r.status_code == 413
+
+        async def stream():
+            for _ in range(4):
+                yield b"y" * 8
+        r = await client.put(f"{url}/chunks/1", content=stream())
+        assert r.status_code == 413 and "10 bytes" in r.json()["error"]
+        assert (await client.put(f"{url}/chunks/2", content=b"y")).status_code == 400
+        assert (await client.get(url)).json()["received"] == []
+
+        assert (await client.put(f"{url}/chunks/0", content=data[:MIN_SESSION_CHUNK])).status_code == 200
+        assert (await client.put(f"{url}/chunks/1", content=data[MIN_SESSION_CHUNK:])).status_code == 200
+
+        def disk_full(*args, **kwargs):
+            raise OSError(28, "No space left on device")
+        monkeypatch.setattr(upload_router.upload_sessions, "complete", disk_full)
+        r = await client.post(f"{url}/complete", json={})
+        assert r.status_code == 500 and "No space left" in r.json()["error"]
+        job = [j for j in ingest_jobs.list() if j["filename"] == "test_limits.csv"][-1]
+        assert job["status"] == "failed" and "No space left" in job["error"]
@@ -9,6 +9,7 @@ import json
 import os
 
 import httpx
+import polars as pl
 import pytest
 
 # ── Config ─────────────────────────────────────────────────────────────────
@@ -111,6 +112,18 @@ def count_csv_rows(content: bytes) -> int:
     return len(rows) - 1  # subtract header
 
 
+def _chart_key(chart: dict) -> dict:
+    """Histogram payload with Top-N (labels, values) pairs as sets: equal counts
+    may come back in any order."""
+    out = dict(chart)
+    out["distributions"] = {
+        k: {**v, "labels": None, "values": sorted(zip(v["labels"], v["values"]))}
+        if isinstance(v, dict) and "labels" in v else v
+        for k, v in chart.get("distributions", {}).items()
+    }
+    return out
+
+
 def count_json_rows(content: bytes) -> int:
     """Count items in JSON array export."""
     data = json.loads(content.decode("utf-8"))
@@ -427,6 +440,66 @@ class TestVisibleColumns:
             expected_keys = {"No.", "Time", "User"}
             assert keys == expected_keys, f"Expected keys {expected_keys}, got {keys}"
 
+    def test_grid_columns_projection(self, client, uploaded_filename):
+        """Grid pages carry only the requested columns (plus _id), filtered on others."""
+        cf = json.dumps([{"field": "Forensic_Category", "type": "=", "value": "Logon"}])
+        _, filtered, data = get_grid_data(client, uploaded_filename, col_filters=cf,
+                                          columns=json.dumps(["User", "EventID", "Missing"]),
+                                          **{"sort[0][field]": "Time", "sort[0][dir]": "desc"})
+        assert filtered == 5
+        assert all(set(row) == {"_id", "User", "EventID"} for row in data)
+        assert [str(row["EventID"]) for row in data] == ["4624"] * 5
+
+    @pytest.mark.parametrize("fmt", ["columnar-json", "arrow"])
+    def test_grid_page_formats_match_json(self, client, uploaded_filename, fmt):
+        """columnar-json and Arrow IPC pages carry the same rows and paging fields as JSON."""
+        params = {"page": 2, "size": 7, "query": "logon",
+                  "sort[0][field]": "Time", "sort[0][dir]": "desc"}
+        expected = client.get(f"/api/data/{uploaded_filename}", params=params).json()
+        resp = client.get(f"/api/data/{uploaded_filename}", params={**params, "format": fmt})
+        assert resp.status_code == 200, resp.text
+        if fmt == "arrow":
+            assert resp.headers["content-type"] == "application/vnd.apache.arrow.stream"
+            df = pl.read_ipc_stream(io.BytesIO(resp.content))
+            assert int(resp.headers["x-chronos-total"]) == expected["total"]
+            assert int(resp.headers["x-chronos-last-page"]) == expected["last_page"]
+        else:
+            body = resp.json()
+            assert {k: body[k] for k in ("total", "total_unfiltered", "last_page", "start_time")} == \
+                {k: expected[k] for k in ("total", "total_unfiltered", "last_page", "start_time")}
+            df = pl.DataFrame(body["data"]).select(body["columns"])
+        assert df.to_dicts() == expected["data"]
+
+    def test_grid_unknown_format_rejected(self, client, uploaded_filename):
+        resp = client.get(f"/api/data/{uploaded_filename}", params={"format": "xml"})
+        assert resp.status_code == 400
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {"start_time": "2025-01-02 08:00:00", "end_time": "2025-01-02 12:30:00"},
+        {"query": "logon", "col_filters": json.dumps([{"field": "User", "type": "=", "value": "admin"}])},
+    ])
+    def test_view_snapshot_matches_separate_endpoints(self, client, uploaded_filename, params):
+        """/api/view returns the same page, counts, chart and empty columns as
+        /api/data, /api/histogram and /api/empty_columns."""
+        page = {"page": 1, "size": 6, "sort[0][field]": "Time", "sort[0][dir]": "desc"}
+        resp = client.get(f"/api/view/{uploaded_filename}", params={**params, **page})
+        assert resp.status_code == 200, resp.text
+        snap = resp.json()
+        grid = client.get(f"/api/data/{uploaded_filename}", params={**params, **page}).json()
+        hist = client.get(f"/api/histogram/{uploaded_filename}", params=params).json()
+        empty = client.get(f"/api/empty_columns/{uploaded_filename}", params=params).json()
+        assert {k: snap[k] for k in grid} == grid
+        assert _chart_key(snap["histogram"]) == _chart_key(hist)
+        assert snap["empty_columns"] == empty["empty_columns"]
+
+    def test_view_snapshot_parts(self, client, uploaded_filename):
+        resp = client.get(f"/api/view/{uploaded_filename}", params={"include": "histogram"})
+        assert resp.status_code == 200
+        assert "histogram" in resp.json() and "data" not in resp.json()
+        assert resp.json()["total"] == TOTAL_ROWS
+        assert client.get(f"/api/view/{uploaded_filename}", params={"include": "pie"}).status_code == 400
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 5. SORT + FILTER TESTS
@@ -0,0 +1,165 @@
+"""Tests for engine/ingest_jobs.py — ingest admission queue and job progress.
+Run: pytest tests/test_ingest_jobs.py -v
+"""
+import anyio
+import pytest
+
+from engine.ingest_jobs import IngestJobManager, IngestQueueFull, estimate_ram_mb
+from engine.ingest_pool import IngestCancelled
+
+MB = 2 ** 20
+
+
+def _work(log, seconds=0.05):
+    async def work(job):
+        log.append(("start", job.filename))
+        await anyio.sleep(seconds)
+        if job.cancel.is_set():
+            raise IngestCancelled()
+        log.append(("end", job.filename))
+        return {"file": job.filename}
+    return work
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "trio"])
+def test_priority_and_concurrency(backend):
+    """One slot: the running job finishes, then waiting jobs start by priority, FIFO within one."""
+    mgr = IngestJobManager(max_running=1, ram_budget_mb=10_000)
+    log = []
+
+    async def main():
+        jobs = [mgr.create(name, MB, prio) for name, prio in
+                [("first.csv", 5), ("low.csv", 9), ("high.csv", 1), ("mid-a.csv", 5), ("mid-b.csv", 5)]]
+        async with anyio.create_task_group() as tg:
+            for job in jobs:
+                tg.start_soon(mgr.run, job, _work(log))
+                await anyio.sleep(0.005)
+        return jobs
+
+    jobs = anyio.run(main, backend=backend)
+    starts = [name for ev, name in log if ev == "start"]
+    assert starts == ["first.csv", "high.csv", "mid-a.csv", "mid-b.csv", "low.csv"]
+    assert all(j.status == "done" and j.result == {"file": j.filename} for j in jobs)
+    assert mgr.stats()["running"] == mgr.stats()["reserved_mb"] == 0
+
+
+def test_ram_budget_limits_concurrency():
+    """Jobs whose estimates exceed the budget together run one after the other;
+    a job larger than the whole budget still runs when alone."""
+    mgr = IngestJobManager(max_running=4, ram_budget_mb=100)
+    log, peak = [], {"running": 0}
+
+    async def main():
+        jobs = [mgr.create(f"big{i}.csv", 20 * MB) for i in range(3)]  # ~60 MB each
+        jobs.append(mgr.create("huge.zip", 50 * MB))  # ~500 MB > budget
+        async def watch():
+            while any(j.status != "done" for j in jobs):
+                peak["running"] = max(peak["running"], mgr.stats()["running"])
+                await anyio.sleep(0.005)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(watch)
+            for job in jobs:
+                tg.start_soon(mgr.run, job, _work(log))
+        return jobs
+
+    jobs = anyio.run(main)
+    assert all(j.status == "done" for j in jobs)
+    assert peak["running"] == 1
+    assert estimate_ram_mb("huge.zip", 50 * MB) > mgr.ram_budget_mb
+    # Streamed formats reserve a bounded footprint however large the file is
+    assert estimate_ram_mb("supertimeline.csv", 50 * 2 ** 30) == estimate_ram_mb("x.ndjson", 2 ** 40)
+
+
+def test_cancel_queued_and_running():
+    mgr = IngestJobManager(max_running=1, ram_budget_mb=10_000)
+    log = []
+
+    async def main():
+        running, queued = mgr.create("a.csv"), mgr.create("b.csv")
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(mgr.run, running, _work(log, 0.2))
+            await anyio.sleep(0.01)
+            tg.start_soon(mgr.run, queued, _work(log))
+            await anyio.sleep(0.01)
+            assert queued.status == "queued"
+            mgr.cancel(queued.id)
+            mgr.cancel(running.id)
+        return running, queued
+
+    running, queued = anyio.run(main)
+    assert (running.status, queued.status) == ("cancelled", "cancelled")
+    assert log == [("start", "a.csv")]
+
+
+def test_cancel_after_admission_finishes_the_job():
+    """A job cancelled right as it is admitted (through the API, or because its
+    awaiting request went away) ends up cancelled, never starts its work and
+    frees its slot."""
+    mgr = IngestJobManager(max_running=1, ram_budget_mb=10_000)
+    log, scope = [], {}
+    by_api, by_request = mgr.create("b.csv"), mgr.create("c.csv")
+    admit = mgr._admit
+
+    def admit_and_cancel():
+        if "request" in scope and by_request.status == "queued" and not mgr.stats()["running"]:
+            scope["request"].cancel()  # delivered only after the admission below
+        admit()
+        if by_api.status == "running":
+            mgr.cancel(by_api.id)
+
+    mgr._admit = admit_and_cancel
+
+    async def request():
+        with anyio.CancelScope() as scope["request"]:
+            await mgr.run(by_request, _work(log))
+
+    async def main():
+        for start_waiter in (lambda tg: tg.start_soon(mgr.run, by_api, _work(log)),
+                             lambda tg: tg.start_soon(request)):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(mgr.run, mgr.create("a.csv"), _work([]))
+                await anyio.sleep(0.01)
+                start_waiter(tg)
+
+    anyio.run(main)
+    assert (by_api.status, by_request.status, log) == ("cancelled", "cancelled", [])
+    assert mgr.stats()["running"] == mgr.stats()["reserved_mb"] == 0
+
+
+def test_failures_are_recorded_and_queue_is_bounded():
+    mgr = IngestJobManager(max_running=1, max_pending=1)
+
+    async def boom(job):
+        raise ValueError("parse error")
+
+    job = anyio.run(mgr.run, mgr.create("bad.csv"), boom)
+    assert (job.status, job.error) == ("failed", "parse error")
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(mgr.run, mgr.create("a.csv"), _work([], 0.1))
+            await anyio.sleep(0.01)
+            tg.start_soon(mgr.run, mgr.create("b.csv"), _work([]))
+            await anyio.sleep(0.01)
+            with pytest.raises(IngestQueueFull):
+                mgr.create("c.csv")
+
+    anyio.run(main)
+
+
+def test_events_stream_until_terminal():
+    mgr = IngestJobManager()
+
+    async def main():
+        job = mgr.create("a.csv")
+        events = []
+        async def follow():
+            async for ev in mgr.events(job):
+                events.append(ev)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(follow)
+            await mgr.run(job, _work([], 0.6))
+        return events
+
+    events = anyio.run(main)
+    assert events[0].startswith("data: ") and '"status": "done"' in events[-1]
@@ -0,0 +1,143 @@
+"""Tests for engine/ingest_pool.py — supervised ingest worker processes.
+Run: pytest tests/test_ingest_pool.py -v
+"""
+import os
+import time
+import tempfile
+import threading
+import anyio
+import polars as pl
+import pytest
+
+from engine.ingest_pool import (
+    IngestPool, IngestJobError, IngestWorkerCrashed, IngestCancelled, ingest_file_job,
+)
+from engine.zip_bundle import MIXED_CATEGORY
+from engine.session_store import get_dataset, clear_registry
+
+
+@pytest.fixture
+def pool():
+    p = IngestPool(workers=1, max_jobs=3)
+    yield p
+    p.shutdown()
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "trio"])
+def test_worker_is_reused_and_recycled(pool, backend):
+    """Jobs run in one long-lived process until it reaches max_jobs."""
+    async def main():
+        return [await pool.run(os.getpid) for _ in range(4)]
+
+    pids = anyio.run(main, backend=backend)
+    assert os.getpid() not in pids
+    assert pids[0] == pids[1] == pids[2] != pids[3]
+    st = pool.stats()
+    assert (st["completed"], st["recycled"], st["alive"]) == (4, 1, 1)
+
+
+def test_job_errors_are_structured_and_keep_the_worker(pool):
+    async def main():
+        pid = await pool.run(os.getpid)
+        with pytest.raises(IngestJobError, match="ValueError"):
+            await pool.run(int, "not a number")
+        return pid, await pool.run(os.getpid)
+
+    before, after = anyio.run(main)
+    assert before == after
+    assert pool.stats()["failed"] == 1
+
+
+def test_crashed_worker_is_respawned(pool):
+    """A worker killed mid-job fails only that job; the next job gets a fresh worker."""
+    async def main():
+        pid = await pool.run(os.getpid)
+        with pytest.raises(IngestWorkerCrashed, match="exit code"):
+            await pool.run(os.abort)
+        return pid, await pool.run(os.getpid)
+
+    before, after = anyio.run(main)
+    assert before != after
+    st = pool.stats()
+    assert (st["crashed"], st["respawned"], st["alive"]) == (1, 1, 1)
+
+
+def test_ingest_file_job_writes_store(pool):
+    with tempfile.TemporaryDirectory() as d:
+        src = os.path.join(d, "triage.csv")
+        pl.DataFrame({"Time": ["2025-01-01 10:00:00", "2025-01-01 11:00:00"],
+                      "EventID": ["4624", "4625"]}).write_csv(src)
+        dest = os.path.join(d, "import_triage_1.csv")
+        rc, cat = anyio.run(pool.run, ingest_file_job, src, ".csv", dest)
+        assert rc == 2 and isinstance(cat, str)
+        clear_registry()
+        assert get_dataset(dest).row_count == 2
+        clear_registry()
+
+
+def test_ingest_bundle_fans_out_and_merges():
+    """ZIP members parsed in batches across two workers land in one store;
+    the Arrow parts are removed afterwards."""
+    import zipfile
+    pool = IngestPool(workers=2)
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            src = os.path.join(d, "triage.zip")
+            with zipfile.ZipFile(src, "w") as z:
+                for i in range(4):
+                    z.writestr(f"host{i}/app.trc", f"2026-01-23 11:28:4{i} ERROR failed {i}\n")
+                z.writestr("C/logins.csv", "Time,EventID\n2025-01-01 10:00:00,4624\n2025-01-01 11:00:00,4625\n")
+            out = os.path.join(d, "out")
+            os.makedirs(out)
+            dest = os.path.join(out, "import_triage_1.csv")
+            rc, cat = anyio.run(pool.ingest_bundle, src, dest)
+            assert (rc, cat) == (6, MIXED_CATEGORY)
+            assert pool.stats()["completed"] >= 4
+            clear_registry()
+            assert get_dataset(dest).row_count == 6
+            clear_registry()
+            assert not [n for n in os.listdir(out) if n.startswith(".bundle-")]
+    finally:
+        pool.shutdown()
+
+
+def test_cancel_kills_running_job(pool):
+    """Cancelling a running job kills its worker and respawns it."""
+    cancel = threading.Event()
+
+    async def main():
+        pid = await pool.run(os.getpid)
+        async with anyio.create_task_group() as tg:
+            async def stop():
+                await anyio.sleep(0.2)
+                cancel.set()
+            tg.start_soon(stop)
+            t0 = time.perf_counter()
+            with pytest.raises(IngestCancelled):
+                await pool.run(time.sleep, 30, cancel=cancel)
+            assert time.perf_counter() - t0 < 5
+        return pid, await pool.run(os.getpid)
+
+    before, after = anyio.run(main)
+    assert before != after
+    assert pool.stats()["cancelled"] == 1
+
+
+def test_cancel_skips_queued_batches(pool):
+    """Batches still queued for a worker when the job is cancelled are never sent."""
+    cancel = threading.Event()
+
+    async def main():
+        await pool.run(os.getpid)
+        async with anyio.create_task_group() as tg:
+            async def stop():
+                await anyio.sleep(0.2)
+                cancel.set()
+            tg.start_soon(stop)
+            with pytest.raises(IngestCancelled):
+                await pool.map(time.sleep, [(30,)] * 4, cancel=cancel)
+
+    anyio.run(main)
+    stats = pool.stats()
+    assert stats["cancelled"] == 4
+    assert stats["respawned"] == 1
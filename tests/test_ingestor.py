@@ -12,21 +12,22 @@ from engine.ingestor import (
     _read_whitespace_csv,
     _sanitize_plist_val,
 )
+from engine.session_store import scan_dataset, store_path
 
 
 # ── CSV Round-trip ───────────────────────────────────────────────────
 
 def test_csv_ingest_basic():
-    """CSV file should produce a DataFrame with correct schema (read_csv, no mmap)."""
+    """CSV file should produce a lazy scan with the header's schema."""
     with tempfile.NamedTemporaryFile(suffix=".csv", mode="w", delete=False) as f:
         f.write("Time,EventID,Source\n2025-01-01 10:00:00,4624,WS01\n2025-01-02 11:00:00,4625,WS02\n")
         path = f.name
     try:
         lf, df_eager, cat = ingest_file(path, ".csv")
-        assert df_eager is not None, "CSV should produce DataFrame"
-        assert lf is None
-        assert "Time" in df_eager.columns
-        assert "EventID" in df_eager.columns
+        assert lf is not None, "CSV should produce LazyFrame"
+        assert df_eager is None
+        assert lf.collect_schema().names() == ["Time", "EventID", "Source"]
+        assert lf.collect().height == 2
     finally:
         os.unlink(path)
 
@@ -40,14 +41,54 @@ def test_csv_round_trip_normalize():
     try:
         lf, df_eager, cat = ingest_file(path, ".csv")
         rc = normalize_and_save(lf, df_eager, out_path)
-        result = pl.read_csv(out_path)
+        assert not os.path.exists(out_path), "CSV is only produced on export"
+        result = scan_dataset(out_path).collect()
         assert "Time" in result.columns, "Header '_time' should be normalized to 'Time'"
         assert "_id" in result.columns, "Should have _id index column"
-        assert result.height == 1
+        assert result.height == 1 == rc
     finally:
         os.unlink(path)
-        if os.path.exists(out_path):
-            os.unlink(out_path)
+        if os.path.exists(store_path(out_path)):
+            os.unlink(store_path(out_path))
+
+
+def test_csv_sniffed_once_and_streamed(monkeypatch):
+    """Headerless detection comes from the sniffed sample; invalid UTF-8 past
+    the sample and PSList fingerprints are handled in the single lazy pass."""
+    import engine.ingestor as ing
+    monkeypatch.setattr(ing, "CSV_SNIFF_BYTES", 64)
+    with tempfile.TemporaryDirectory() as d:
+        ls = os.path.join(d, "ls.csv")
+        with open(ls, "wb") as f:
+            f.write(b"-rw-r--r--,root,/etc/passwd\n" * 10 + b"drwxr-xr-x,r\xe9mi,/home/r\xe9mi\n")
+        lf, df, cat = ingest_file(ls, ".csv")
+        assert df is None and cat == "FileSystem/LS_Triage"
+        out = lf.collect()
+        assert out.columns == ["Field_0", "Field_1", "Field_2"] and out.height == 11
+        assert out["Field_1"][10] == "r\ufffdmi"
+
+        ps = os.path.join(d, "pslist.csv")
+        pl.DataFrame({"Offset(V)": ["0x1"], "Name": ["lsass.exe"], "PID": ["640"], "PPID": ["500"],
+                      "Threads": ["9"], "CreateTime": ["2025-01-01 10:00:00"]}).write_csv(ps)
+        lf, df, cat = ingest_file(ps, ".csv")
+        assert cat == "Memory/Volatility_PSList"
+        row = lf.collect().row(0, named=True)
+        assert row["Time"] == "2025-01-01 10:00:00" and row["Destination_Entity"] == "lsass.exe [640]"
+
+
+def test_normalize_writes_zstd_parquet_store():
+    """normalize_and_save should persist a typed, zstd-compressed Parquet store."""
+    import pyarrow.parquet as pq
+    df = pl.DataFrame({"Time": ["2025-01-01 10:00:00"], "Count": [3], "Tags": [["a", "b"]]})
+    with tempfile.TemporaryDirectory() as d:
+        out_path = os.path.join(d, "import_x_1.csv")
+        rc = normalize_and_save(None, df, out_path)
+        assert rc == 1
+        meta = pq.ParquetFile(store_path(out_path)).metadata
+        assert meta.row_group(0).column(0).compression == "ZSTD"
+        result = scan_dataset(out_path).collect()
+        assert result.schema["Count"] == pl.Int64, "Scalar types are preserved"
+        assert result["Tags"][0] == "a, b", "Nested values are flattened to text"
 
 
 # ── Whitespace-separated (PSList) ────────────────────────────────────
@@ -82,6 +123,97 @@ def test_whitespace_csv_short_rows():
         os.unlink(path)
 
 
+def test_whitespace_long_rows_fold_into_last_column():
+    """Extra fields stay in the last column with their original spacing."""
+    content = "\n\nPID  Name  CommandLine\n640  lsass.exe  C:\\lsass.exe   -k  netsvcs\n\n700 svchost.exe\n"
+    with tempfile.NamedTemporaryFile(suffix=".log", mode="w", delete=False) as f:
+        f.write(content)
+        path = f.name
+    try:
+        lf, df, cat = ingest_file(path, ".log")
+        assert df is None, ".log parses lazily"
+        out = lf.collect()
+        assert out.rows() == [("640", "lsass.exe", "C:\\lsass.exe   -k  netsvcs"), ("700", "svchost.exe", "")]
+    finally:
+        os.unlink(path)
+
+
+def test_txt_formats_parse_lazily():
+    """Unified Log and ls triage .txt files become LazyFrames over one line scan."""
+    with tempfile.TemporaryDirectory() as d:
+        unified = os.path.join(d, "unified.txt")
+        with open(unified, "w") as f:
+            f.write("2025-01-01 10:00:00.123456-0800  host1 sshd[812]: Accepted publickey\n"
+                    "noise\n2025-01-01 10:00:01.000001-0800  host1 launchd: spawn\n")
+        lf, df, cat = ingest_file(unified, ".txt")
+        assert cat == "macOS/Unified_Logs" and df is None
+        out = lf.collect()
+        assert out["Source_Entity"].to_list() == ["sshd", "launchd"] and out["pid"].to_list() == ["812", None]
+
+        ls = os.path.join(d, "ls.txt")
+        with open(ls, "w") as f:
+            f.write("/Library/LaunchDaemons:\ntotal 8\n"
+                    "drwxr-xr-x   5 root  wheel  160 Jan  3 10:22 .\n"
+                    "-rw-r--r--@  1 root  wheel  700 Mar  5  2023 com.evil.plist\n\n"
+                    "/Users/bob/Library/LaunchAgents:\n"
+                    "-rw-r--r--   1 bob  staff  512 Dec 31 9:05 agent x.plist\n")
+        lf, df, cat = ingest_file(ls, ".txt")
+        assert cat == "macOS/Persistence_Triage"
+        out = lf.collect()
+        assert out["Destination_Entity"].to_list() == [
+            "/Library/LaunchDaemons/com.evil.plist", "/Users/bob/Library/LaunchAgents/agent x.plist"]
+        assert out["Time"][0] == "2023-03-05 00:00:00" and out["Time"][1].endswith("-12-31 09:05:00")
+
+
+# ── TRC traces ───────────────────────────────────────────────────────
+
+ORACLE_TRC = (
+    "Trace file /u01/orcl_ora_1234.trc\n"
+    "*** 2026-01-23T11:28:44.123456+00:00\n"
+    "ORA-00600: internal error code\n"
+    "   ----- Call Stack Trace -----\n\n"
+    "*** 2026-01-23T11:29:00.000000+00:00\n"
+    "WARNING: timeout waiting for lock\n"
+)
+
+
+def test_trc_blocks_assembled():
+    """Timestamp lines open blocks; continuation lines join the block's Message."""
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "orcl.trc")
+        with open(path, "w") as f:
+            f.write(ORACLE_TRC)
+        lf, df, cat = ingest_file(path, ".trc")
+        assert cat == "Trace/TRC" and df is None
+        out = lf.collect()
+        assert out["Time"].to_list() == ["", "2026-01-23T11:28:44.123456", "2026-01-23T11:29:00.000000"]
+        assert out["Message"][1] == "+00:00 ORA-00600: internal error code    ----- Call Stack Trace -----"
+        assert out["Level"].to_list() == ["Debug", "Error", "Warning"]
+        assert set(out["Source_File"]) == {"orcl.trc"}
+
+
+def test_trc_without_timestamps_is_one_row_per_line():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "plain.trc")
+        with open(path, "w") as f:
+            f.write("plain line one\n\n  second WARN\n")
+        out = ingest_file(path, ".trc")[0].collect()
+        assert out.select("EventID", "Message", "Level", "Line").rows() == [
+            ("Trace_Line", "plain line one", "Info", "1"), ("Trace_Line", "second WARN", "Warning", "3")]
+
+
+def test_zip_of_trc_files():
+    import zipfile
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "bundle.zip")
+        with zipfile.ZipFile(path, "w") as z:
+            z.writestr("a/orcl.trc", ORACLE_TRC)
+            z.writestr("b/app.trc", "2026-01-23 11:28:45 ERROR something failed\n")
+        lf, df, cat = ingest_file(path, ".zip")
+        assert cat == "Trace/Bulk_TRC"
+        assert df.height == 4 and set(df["Source_File"]) == {"orcl.trc", "app.trc"}
+
+
 # ── TSV ──────────────────────────────────────────────────────────────
 
 def test_tsv_ingest():
@@ -0,0 +1,196 @@
+"""Tests for engine/query_executor.py — bounded worker pool for dataset queries.
+Run: pytest tests/test_query_executor.py -v
+"""
+import threading
+import time
+import functools
+import anyio
+import polars as pl
+import pytest
+
+from engine.query_executor import (
+    QueryExecutor,
+    QueryCancelled,
+    QuerySuperseded,
+    check_cancelled,
+    collect,
+    _env_limits,
+)
+
+
+def _tracking_job(state, lock, seconds=0.05):
+    def job(tag):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(seconds)
+        with lock:
+            state["running"] -= 1
+        return tag
+    return job
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "trio"])
+def test_endpoint_cap_and_results(backend):
+    """An endpoint never exceeds its cap; results come back in call order."""
+    ex = QueryExecutor(workers=4, limits={"export": 1})
+    state, lock = {"running": 0, "peak": 0}, threading.Lock()
+    job = _tracking_job(state, lock)
+    out = {}
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            for i in range(4):
+                async def one(i=i):
+                    out[i] = await ex.run("export", job, i)
+                tg.start_soon(one)
+
+    anyio.run(main, backend=backend)
+    assert out == {0: 0, 1: 1, 2: 2, 3: 3}
+    assert state["peak"] == 1
+    st = ex.stats()
+    assert st["endpoints"]["export"]["completed"] == 4
+    assert st["running"] == st["waiting"] == st["queued"] == 0
+
+
+def test_capped_endpoint_leaves_workers_for_others():
+    """A slow capped endpoint does not delay an uncapped one."""
+    ex = QueryExecutor(workers=3, limits={"export": 1})
+    timings = {}
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            for _ in range(3):
+                tg.start_soon(ex.run, "export", time.sleep, 0.3)
+            await anyio.sleep(0.02)
+            t0 = time.perf_counter()
+            await ex.run("grid", time.sleep, 0.01)
+            timings["grid"] = time.perf_counter() - t0
+
+    anyio.run(main)
+    assert timings["grid"] < 0.2
+    assert ex.stats()["endpoints"]["export"]["wait_ms_max"] > 200
+
+
+def test_errors_propagate_and_are_counted():
+    ex = QueryExecutor(workers=2, limits={})
+
+    def boom():
+        raise ValueError("bad query")
+
+    with pytest.raises(ValueError, match="bad query"):
+        anyio.run(ex.run, "grid", boom)
+    grid = ex.stats()["endpoints"]["grid"]
+    assert (grid["failed"], grid["running"], grid["limit"]) == (1, 0, 2)
+
+
+def test_env_limits_parsing():
+    assert _env_limits("export=1, histogram=3,bogus,grid=x,zero=0") == {"export": 1, "histogram": 3}
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "trio"])
+def test_newer_request_supersedes_same_view(backend):
+    """An older in-flight query of the same endpoint/view is answered with
+    QuerySuperseded and its worker stops at the next check point."""
+    ex = QueryExecutor(workers=2, limits={"grid": 2})
+    stopped = threading.Event()
+    out = {}
+
+    def slow(tag):
+        try:
+            for _ in range(200):
+                check_cancelled()
+                time.sleep(0.01)
+        except QueryCancelled:
+            stopped.set()
+            raise
+        return tag
+
+    async def main():
+        async def first():
+            try:
+                out["first"] = await ex.run("grid", slow, "old", view_id="tab-1")
+            except QuerySuperseded:
+                out["first"] = "superseded"
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(first)
+            await anyio.sleep(0.05)
+            out["other_view"] = await ex.run("grid", lambda: "other", view_id="tab-2")
+            out["second"] = await ex.run("grid", lambda: "new", view_id="tab-1")
+
+    t0 = time.perf_counter()
+    anyio.run(main, backend=backend)
+    assert out == {"first": "superseded", "other_view": "other", "second": "new"}
+    assert time.perf_counter() - t0 < 1.0
+    assert stopped.wait(1.0)
+    assert ex.stats()["endpoints"]["grid"]["superseded"] == 1
+
+
+def test_collect_stops_superseded_query_between_stages():
+    """collect() on a worker raises QueryCancelled at the next stage once superseded."""
+    ex = QueryExecutor(workers=2, limits={})
+    lf = pl.LazyFrame({"a": [1, 2, 3]}).select(pl.col("a").sum())
+    stages = []
+
+    def staged():
+        try:
+            for _ in range(100):
+                stages.append(collect(lf).item())
+                time.sleep(0.01)
+        except QueryCancelled:
+            stages.append("cancelled")
+            raise
+
+    async def main():
+        async def old():
+            with pytest.raises(QuerySuperseded):
+                await ex.run("histogram", staged, view_id="tab")
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(old)
+            await anyio.sleep(0.1)
+            await ex.run("histogram", lambda: None, view_id="tab")
+
+    anyio.run(main)
+    deadline = time.time() + 2
+    while "cancelled" not in stages and time.time() < deadline:
+        time.sleep(0.01)
+    assert stages[-1] == "cancelled" and 0 < len(stages) < 50
+
+
+def test_collect_outside_executor_is_plain():
+    assert collect(pl.LazyFrame({"a": [1, 2]}).select(pl.col("a").sum())).item() == 3
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "trio"])
+def test_superseded_query_keeps_its_slot_until_the_worker_returns(backend):
+    """A superseded request is answered at once, but its worker (stuck in a stage
+    that never checks for cancellation) still counts against the endpoint cap."""
+    ex = QueryExecutor(workers=4, limits={"export": 1})
+    state, lock = {"running": 0, "peak": 0}, threading.Lock()
+    job = _tracking_job(state, lock, seconds=0.3)
+    out = {}
+
+    async def main():
+        async def first():
+            try:
+                await ex.run("export", job, "old", view_id="tab")
+            except QuerySuperseded:
+                out["superseded_after"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(first)
+            await anyio.sleep(0.05)
+            tg.start_soon(functools.partial(ex.run, "export", job, "new", view_id="tab"))
+            await anyio.sleep(0.05)
+            out["stats"] = ex.stats()["endpoints"]["export"]
+        out["done_after"] = time.perf_counter() - t0
+
+    anyio.run(main, backend=backend)
+    assert out["superseded_after"] < 0.2
+    assert (out["stats"]["running"], out["stats"]["abandoned"], out["stats"]["waiting"]) == (1, 1, 1)
+    assert state["peak"] == 1 and out["done_after"] >= 0.6
+    st = ex.stats()["endpoints"]["export"]
+    assert (st["running"], st["abandoned"], st["waiting"], st["superseded"], st["completed"]) == (0, 0, 0, 1, 1)
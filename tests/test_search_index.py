@@ -0,0 +1,128 @@
+"""Tests for engine/search_index.py — token and trigram indexes behind search/filters.
+Run: pytest tests/test_search_index.py -v
+"""
+import os
+import tempfile
+import polars as pl
+import pytest
+
+from engine.forensic import apply_standard_processing
+from engine.search_index import (
+    token_candidates, search_index_path, trigram_ids, regex_literals,
+)
+from engine.session_store import write_store, register_dataset, store_path, clear_registry
+
+
+ROWS = {
+    "_id": [1, 2, 3, 4, 5],
+    "Time": ["2025-01-01 08:00:00", "2025-01-01 09:00:00", "2025-01-01 10:00:00",
+             "2025-01-01 11:00:00", "2025-01-01 12:00:00"],
+    "User": ["Administrator", "jdoe", "svc_backup", "JDOE", None],
+    "CommandLine": [r"C:\poleo\jre\bin\javaw.exe -jar x", "whoami /all",
+                    "net user hacker P@ss /add", r"cmd.exe /c dir C:\Users", "ping 10.0.0.5"],
+    "Port": [443, 8443, 22, 3389, 80],
+}
+
+
+@pytest.fixture
+def dataset():
+    with tempfile.TemporaryDirectory() as d:
+        clear_registry()
+        path = os.path.join(d, "import_search_1.csv")
+        write_store(pl.DataFrame(ROWS), path)
+        yield register_dataset(path)
+        clear_registry()
+
+
+def _ids(ds, query, use_index=True):
+    params = {"query": query}
+    if use_index:
+        params["dataset"] = ds
+    return sorted(apply_standard_processing(ds.scan(), params).collect()["_id"].to_list())
+
+
+def test_index_sidecar_written(dataset):
+    assert dataset.search_index == search_index_path(store_path(dataset.path))
+    assert "User" in dataset.search_columns and "Port" not in dataset.search_columns
+    ids, exact = token_candidates(dataset.search_index, "doe")
+    assert exact and sorted(ids.to_list()) == [2, 4]
+    assert dataset.trigram_columns == ["CommandLine"]
+    assert sorted(trigram_ids(dataset.trigram_index, "CommandLine", "\\BIN\\").to_list()) == [1]
+    assert trigram_ids(dataset.trigram_index, "CommandLine", "/c") is None  # too short to narrow
+
+
+@pytest.mark.parametrize("query", [
+    "jdoe", "admin", "JAVAW", r".\jre\bin\javaw", "10.0.0.5", "p@ss", "/add",
+    "443", "jdoe whoami", "user", "nomatch", "c:\\", "-",
+])
+def test_index_matches_full_scan(dataset, query, caplog):
+    """Indexed search must return exactly what the column scan returns."""
+    assert _ids(dataset, query) == _ids(dataset, query, use_index=False)
+    assert "lookup failed" not in caplog.text
+
+
+def _filtered_ids(ds, col_filters, use_index=True):
+    params = {"col_filters": col_filters}
+    if use_index:
+        params["dataset"] = ds
+    return sorted(apply_standard_processing(ds.scan(), params).collect()["_id"].to_list())
+
+
+@pytest.mark.parametrize("flt", [
+    {"field": "CommandLine", "type": "like", "value": r"\jre\bin\javaw"},
+    {"field": "CommandLine", "type": "like", "value": "USER"},
+    {"field": "CommandLine", "type": "like", "value": "/c"},
+    {"field": "CommandLine", "type": "like", "value": "zzzz"},
+    {"field": "CommandLine", "type": "regex", "value": r"net user \w+ P@ss"},
+    {"field": "CommandLine", "type": "regex", "value": r"^(whoami|ping) "},
+    {"field": "CommandLine", "type": "regex", "value": r"(?i)CMD\.exe"},
+    {"field": "User", "type": "like", "value": "doe"},
+])
+def test_trigram_filters_match_full_scan(dataset, flt, caplog):
+    assert _filtered_ids(dataset, [flt]) == _filtered_ids(dataset, [flt], use_index=False)
+    assert "lookup failed" not in caplog.text
+
+
+def test_regex_literals():
+    assert regex_literals(r"net user \w+ /add") == ["net user ", " /add"]
+    assert regex_literals(r"a|bcd") == []
+    assert regex_literals(r"(unclosed") == []
+    assert regex_literals(r"cmd\.exe x?yz") == ["cmd.exe ", "yz"]
+    assert regex_literals(r"\[abcd\]") == ["[abcd]"]
+    # Classes, counted repetition and alnum escapes are read differently by Rust regex
+    assert regex_literals("[[:digit:]]abcd") == []
+    assert regex_literals(r"\x41bcd") == [] and regex_literals("ab{2}cd") == []
+
+
+BRACKET_ROWS = ["1abcd", "x]abcd", "[abcd]", "9abcd]", "qabcd", r"a\]abcd", "zzzz"]
+
+
+@pytest.mark.parametrize("pattern", [
+    "[[:digit:]]abcd", "[[:alpha:][:digit:]]abcd", "[a-z[0-9]]abcd", "[^[:space:]]abcd",
+    r"[\]]abcd", r"\[abcd\]", r"[\[x]abcd", r"\]abcd",
+])
+def test_regex_filter_parity_with_rust_syntax(pattern):
+    """POSIX classes, nested sets and escaped brackets: the trigram prefilter
+    must never drop a row the full scan keeps."""
+    with tempfile.TemporaryDirectory() as d:
+        clear_registry()
+        path = os.path.join(d, "import_brackets_1.csv")
+        n = len(BRACKET_ROWS)
+        write_store(pl.DataFrame({"_id": list(range(1, n + 1)), "Time": ["2025-01-01 08:00:00"] * n,
+                                  "CommandLine": BRACKET_ROWS}), path)
+        ds = register_dataset(path)
+        flt = [{"field": "CommandLine", "type": "regex", "value": pattern}]
+        expected = _filtered_ids(ds, flt, use_index=False)
+        assert expected  # every pattern matches something
+        assert _filtered_ids(ds, flt) == expected
+        clear_registry()
+
+
+def test_overlong_values_are_always_candidates(monkeypatch):
+    import engine.search_index as si
+    monkeypatch.setattr(si, "TRIGRAM_MAX_VALUE_LEN", 10)
+    with tempfile.TemporaryDirectory() as d:
+        dest = os.path.join(d, "x.trigrams.parquet")
+        df = pl.DataFrame({"_id": [1, 2, 3], "Message": ["short msg", "a much longer message", "other"]})
+        si.build_trigram_index(df, ["Message"], dest)
+        assert sorted(trigram_ids(dest, "Message", "msg").to_list()) == [1, 2]
@@ -0,0 +1,237 @@
+"""Tests for engine/session_store.py — Parquet session store and dataset registry.
+Run: pytest tests/test_session_store.py -v
+"""
+import os
+import time
+from datetime import datetime
+import tempfile
+import polars as pl
+import pytest
+
+from engine.session_store import (
+    write_store,
+    store_path,
+    time_index_path,
+    get_dataset,
+    register_dataset,
+    scan_dataset,
+    clear_registry,
+)
+from engine.forensic import (
+    TS_COL, EID_COL, add_canonical_ts, apply_standard_processing, sanitize_context_data,
+    drop_internal_columns,
+)
+
+
+@pytest.fixture
+def out_dir():
+    with tempfile.TemporaryDirectory() as d:
+        clear_registry()
+        yield d
+        clear_registry()
+
+
+def test_handle_resolves_schema_and_row_count(out_dir):
+    """Registry handle should expose schema, row count and a ready LazyFrame."""
+    path = os.path.join(out_dir, "import_a_1.csv")
+    write_store(pl.DataFrame({"_id": [1, 2, 3], "EventID": ["1", "2", "3"]}), path)
+    ds = register_dataset(path)
+    assert ds.fmt == "parquet"
+    assert ds.row_count == 3
+    assert ds.columns == ["_id", "EventID", EID_COL]
+    assert ds.scan().collect().height == 3
+
+
+def test_handle_is_cached_until_file_changes(out_dir):
+    """Same handle object is returned until the backing file is rewritten."""
+    path = os.path.join(out_dir, "import_b_1.csv")
+    write_store(pl.DataFrame({"_id": [1], "A": ["x"]}), path)
+    first = get_dataset(path)
+    assert get_dataset(path) is first
+
+    time.sleep(0.01)
+    write_store(pl.DataFrame({"_id": [1, 2], "A": ["x", "y"]}), path)
+    second = get_dataset(path)
+    assert second is not first
+    assert second.row_count == 2
+
+
+def test_legacy_csv_gets_row_ids(out_dir):
+    """A CSV without a Parquet store is still readable and always carries _id."""
+    path = os.path.join(out_dir, "legacy.csv")
+    pl.DataFrame({"Time": ["2025-01-01 10:00:00", "2025-01-02 10:00:00"]}).write_csv(path)
+    assert not os.path.exists(store_path(path))
+    ds = get_dataset(path)
+    assert ds.fmt == "csv" and ds.encoding == "utf8"
+    df = scan_dataset(path).collect()
+    assert df["_id"].to_list() == [1, 2]
+
+
+def test_missing_dataset_raises(out_dir):
+    with pytest.raises(FileNotFoundError):
+        get_dataset(os.path.join(out_dir, "nope.csv"))
+
+
+def test_store_adds_canonical_ts(out_dir):
+    """Ingest derives a native UTC _ts from the primary time column, detecting the format once."""
+    path = os.path.join(out_dir, "import_ts_1.csv")
+    write_store(pl.DataFrame({
+        "_id": [1, 2, 3],
+        "Time": ["10/16/2026 08:00:00", "10/17/2026 09:30:00", "garbage"],
+    }), path)
+    df = scan_dataset(path).collect().sort("_id")
+    assert df.schema[TS_COL] == pl.Datetime("us", "UTC")
+    assert df["Time"].to_list()[0] == "10/16/2026 08:00:00"  # display string untouched
+    ts = df[TS_COL].to_list()
+    assert (ts[0].month, ts[0].day, ts[0].hour) == (10, 16, 8)
+    assert ts[2] is None
+
+
+def test_ts_offsets_and_epochs_convert_to_utc():
+    df = add_canonical_ts(pl.DataFrame({
+        "timestamp": ["2025-01-01T08:00:00+02:00", "2025-01-01T08:00:00Z"],
+    }))
+    assert [t.hour for t in df[TS_COL].to_list()] == [6, 8]
+    df = add_canonical_ts(pl.DataFrame({"EventTime": ["1735718400000", "1735718400"]}))
+    assert df[TS_COL].dt.strftime("%Y-%m-%d %H:%M").to_list() == ["2025-01-01 08:00"] * 2
+
+
+def test_store_adds_validated_event_id(out_dir):
+    """Validated_EventID is computed once at ingest (Int32) and served from the store
+    with the same values the on-the-fly expression gives legacy data."""
+    raw = pl.DataFrame({"_id": [1, 2, 3, 4, 5], "EventID": ["4624", "4688.0", "0", "70000", "macOS_Unified_Log"]})
+    path = os.path.join(out_dir, "import_eid_1.csv")
+    write_store(raw, path)
+    ds = get_dataset(path)
+    assert ds.schema[EID_COL] == pl.Int32
+    stored = sanitize_context_data(ds.scan()).collect().sort("_id")["Validated_EventID"]
+    legacy = sanitize_context_data(raw.lazy()).collect()["Validated_EventID"]
+    assert stored.to_list() == legacy.to_list() == [4624, 4688, None, None, None]
+    # Internal: never shown in the grid
+    assert EID_COL not in apply_standard_processing(ds.scan(), {"dataset": ds}).pipe(drop_internal_columns).collect_schema()
+
+
+def test_processing_filters_and_sorts_on_ts(out_dir):
+    path = os.path.join(out_dir, "import_ts_2.csv")
+    write_store(pl.DataFrame({
+        "_id": [1, 2, 3],
+        "Time": ["2025-01-03T10:00:00Z", "2025-01-01T10:00:00Z", "2025-01-02T10:00:00Z"],
+        "Msg": ["c", "a", "b"],
+    }), path)
+    lf = apply_standard_processing(scan_dataset(path), {
+        "start_time": "2025-01-01 12:00:00", "end_time": "2025-01-04 00:00:00",
+    })
+    assert lf.collect()["Msg"].to_list() == ["b", "c"]
+    # _ts is internal: a token only present in its rendering must not match
+    hits = apply_standard_processing(scan_dataset(path), {"query": "000000"}).collect()
+    assert hits.height == 0
+
+
+def test_store_is_time_sorted_with_row_group_index(out_dir, monkeypatch):
+    """Rows are stored in _ts order (nulls first, _id kept) with a per-group min/max sidecar."""
+    import engine.session_store as ss
+    monkeypatch.setattr(ss, "ROW_GROUP_SIZE", 4)
+    path = os.path.join(out_dir, "import_ts_3.csv")
+    times = [f"2025-01-01 {h:02d}:00:00" for h in range(20)]
+    order = [7, 3, 19, 0, 12, 5, 18, 1, 9, 14, 2, 16, 11, 6, 4, 15, 10, 13, 8, 17]
+    write_store(pl.DataFrame({
+        "_id": list(range(1, 22)),
+        "Time": [times[i] for i in order] + ["n/a"],
+    }), path)
+    assert os.path.exists(time_index_path(path))
+    ds = get_dataset(path)
+    assert ds.time_sorted and ds.time_index["null_count"] == 1
+    assert len(ds.time_index["groups"]) == 6
+
+    raw = ds.scan().collect()
+    assert raw["_id"][0] == 21  # unparseable time sorts first
+    assert raw["Time"].to_list()[1:] == times
+
+    lo, hi = ds.time_row_range(datetime(2025, 1, 1, 5), datetime(2025, 1, 1, 9))
+    assert raw["Time"].to_list()[lo:hi] == times[5:10]
+
+    lf = apply_standard_processing(ds.scan(), {
+        "dataset": ds, "start_time": "2025-01-01 05:30:00", "end_time": "2025-01-01T17:00:00Z",
+    })
+    assert lf.collect()["Time"].to_list() == times[6:18]
+    assert ds.time_row_range(datetime(2026, 1, 1), None) == (ds.row_count, ds.row_count)
+
+
+def test_store_writes_column_stats(out_dir):
+    """Stats sidecar counts nulls and sentinel empties per column."""
+    path = os.path.join(out_dir, "import_stats_1.csv")
+    write_store(pl.DataFrame({
+        "_id": [1, 2, 3, 4],
+        "User": ["alice", None, "N/A", "alice"],
+        "Note": ["", "-", None, "unknown"],
+    }), path)
+    stats = register_dataset(path).column_stats
+    assert stats["rows"] == 4
+    user, note = stats["columns"]["User"], stats["columns"]["Note"]
+    assert (user["null_count"], user["empty_count"]) == (1, 1)
+    assert note["null_count"] + note["empty_count"] == 4
+    assert user["distinct"] >= 2 and user["max_len"] == 5
+
+
+@pytest.mark.parametrize("run_bytes,presorted", [(None, False), (1, False), (1, True)])
+def test_lazy_store_streams_to_same_store(out_dir, monkeypatch, run_bytes, presorted):
+    """A LazyFrame source (streamed, never collected; sorted in _ts-range runs
+    when large) yields the same store and sidecars as the eager path."""
+    import engine.session_store as ss
+    from engine.search_index import search_index_path, trigram_index_path
+    from engine.time_cube import time_cube_path
+    monkeypatch.setattr(ss, "ROW_GROUP_SIZE", 16)
+    if run_bytes:
+        monkeypatch.setattr(ss, "SORT_RUN_BYTES", run_bytes)
+    n = 200
+    times = [f"2025-01-{1 + (i * 7) % 28:02d} {(i * 5) % 24:02d}:00:00" if i % 17 else "n/a" for i in range(n)]
+    df = pl.DataFrame({
+        "_id": list(range(1, n + 1)),
+        "Time": sorted(times, key=lambda t: (t != "n/a", t)) if presorted else times,
+        "EventID": ["4624", "4625", "4688", "7045"] * (n // 4),
+        "CommandLine": [f"cmd.exe /c whoami {i}" for i in range(n)],
+    })
+    src = os.path.join(out_dir, "src.ndjson")
+    df.write_ndjson(src)
+    eager, lazy = (os.path.join(out_dir, f"import_{k}_1.csv") for k in ("eager", "lazy"))
+    assert write_store(df, eager) == n
+    assert write_store(pl.scan_ndjson(src), lazy) == n
+    assert not [f for f in os.listdir(out_dir) if f.endswith((".spill", ".tmp"))]
+
+    a, b = register_dataset(eager), register_dataset(lazy)
+    assert a.scan().collect().equals(b.scan().collect())
+    assert a.schema == b.schema and b.schema["EventID"] == pl.Categorical
+    assert a.time_index == b.time_index and b.time_sorted
+    assert a.column_stats["rows"] == b.column_stats["rows"] == n
+    for sidecar in (search_index_path, trigram_index_path, time_cube_path):
+        assert os.path.exists(sidecar(store_path(lazy)))
+
+
+def test_low_cardinality_columns_stored_as_categorical(out_dir):
+    """Repetitive string columns are dictionary-encoded; filters and Sigma matches still hit."""
+    from engine.sigma_engine import match_sigma_rules
+    n = 400
+    path = os.path.join(out_dir, "import_cat_1.csv")
+    write_store(pl.DataFrame({
+        "_id": list(range(1, n + 1)),
+        "EventID": ["4624", "4625", "4688", "4688.0"] * (n // 4),
+        "User": [f"user{i}" for i in range(n)],
+    }), path)
+    ds = register_dataset(path)
+    schema = ds.scan().collect_schema()
+    assert schema["EventID"] == pl.Categorical
+    assert schema["User"] == pl.String
+    assert ds.column_stats["columns"]["EventID"]["dtype"] == str(pl.Categorical)
+
+    def count(filters):
+        params = {"dataset": ds, "col_filters": filters}
+        return apply_standard_processing(ds.scan(), params).collect().height
+
+    assert count([{"field": "EventID", "type": "=", "value": "4625"}]) == n // 4
+    assert count([{"field": "EventID", "type": "in", "value": "4624,4625"}]) == n // 2
+    assert count([{"field": "EventID", "type": ">", "value": "4625"}]) == n // 2
+
+    rule = {"title": "proc", "level": "low", "detection": {
+        "sel": {"EventID": [4688]}, "plain": {"EventID": "4624"}, "condition": "sel or plain"}}
+    hits = match_sigma_rules(ds.scan().collect(), rules=[rule])
+    assert hits and hits[0]["matched_rows"] == 3 * n // 4
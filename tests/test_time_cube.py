@@ -0,0 +1,94 @@
+"""Tests for engine/time_cube.py — pre-aggregated chart counts.
+Run: pytest tests/test_time_cube.py -v
+"""
+import os
+import json
+import random
+import tempfile
+from datetime import datetime, timezone
+import polars as pl
+import pytest
+
+import engine.session_store as ss
+from engine.analyzer import analyze_dataframe, analyze_time_cube, dataset_file_bounds
+from engine.forensic import apply_standard_processing, sanitize_context_data
+from engine.session_store import write_store, register_dataset, clear_registry
+from engine.time_cube import cube_window, cube_columns
+
+BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def dataset(monkeypatch):
+    monkeypatch.setattr(ss, "ROW_GROUP_SIZE", 256)  # several row groups
+    rng = random.Random(7)
+    n = 3000
+    secs = sorted(rng.randrange(0, 4 * 86400) for _ in range(n))
+    with tempfile.TemporaryDirectory() as d:
+        clear_registry()
+        path = os.path.join(d, "import_cube_1.csv")
+        write_store(pl.DataFrame({
+            "_id": list(range(1, n + 1)),
+            "Time": [datetime.fromtimestamp(BASE.timestamp() + s, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+                     for s in secs],
+            "EventID": [rng.choice(["4624"] * 8 + ["4625"] * 4 + ["4688"] * 2 + ["1102"]) for _ in range(n)],
+            "Level": [rng.choice(["Information"] * 5 + ["Warning"] * 2 + ["Error"]) for _ in range(n)],
+            "Provider": [rng.choice(["Security", "System", "Sysmon", None]) for _ in range(n)],
+        }), path)
+        yield register_dataset(path)
+        clear_registry()
+
+
+def _raw_chart(ds, start, end):
+    params = {"dataset": ds, "start_time": start, "end_time": end}
+    lf = sanitize_context_data(apply_standard_processing(ds.scan(), params))
+    return analyze_dataframe(lf, start_time=start, end_time=end, file_bounds=dataset_file_bounds(ds))
+
+
+def _canonical(result):
+    """JSON round trip; Top-N lists as sorted pairs (tied counts have no fixed order)."""
+    result = json.loads(json.dumps(result, default=str))
+    for dist in result.get("distributions", {}).values():
+        if isinstance(dist, dict) and "labels" in dist and "values" in dist:
+            dist["pairs"] = sorted(zip(dist.pop("labels"), dist.pop("values")))
+    return result
+
+
+def test_cube_sidecar_written(dataset):
+    assert dataset.time_cube is not None
+    assert cube_columns(dataset.time_cube) == {
+        "level": "Level", "eventid": "EventID", "source": "Provider", "fallback": "Provider",
+    }
+
+
+@pytest.mark.parametrize("start,end", [
+    (None, None),
+    ("2025-01-02 03:17:41", "2025-01-03 20:00:05"),
+    ("2025-01-02 10:00:00", "2025-01-02 11:30:00"),
+    ("2025-01-03 06:00:10", "2025-01-03 06:00:50"),
+    ("2030-01-01 00:00:00", None),
+])
+def test_cube_chart_matches_raw_chart(dataset, start, end):
+    """Same payload as the raw path over the view; on both, file_* stats describe
+    the whole dataset."""
+    expected = _canonical(_raw_chart(dataset, start, end))
+    assert _canonical(analyze_time_cube(dataset, start, end)) == expected
+    whole = _canonical(analyze_dataframe(dataset.scan()))["stats"]
+    for key in ("file_total", "file_start", "file_end"):
+        assert expected["stats"][key] == whole[key]
+    if (start, end) == ("2025-01-02 10:00:00", "2025-01-02 11:30:00"):
+        stats = expected["stats"]
+        assert stats["total_events"] < stats["file_total"] == dataset.row_count
+        assert stats["file_start"] < stats["start_time"] <= stats["end_time"] < stats["file_end"]
+
+
+def test_cube_window_matches_row_counts(dataset):
+    rng = random.Random(3)
+    ts = dataset.scan().select(pl.col("_ts").dt.epoch("us")).collect().to_series().drop_nulls()
+    for bucket_us in (300_000_000, 3_600_000_000, 86_400_000_000):
+        for _ in range(5):
+            lo, hi = sorted(rng.randrange(ts.min(), ts.max()) for _ in range(2))
+            got = cube_window(dataset, dataset.time_cube, lo, hi, bucket_us, roles=[])
+            expected = (ts.filter((ts >= lo) & (ts <= hi)).to_frame("t")
+                        .group_by(pl.col("t") // bucket_us * bucket_us).len())
+            assert dict(zip(got["bucket"], got["count"])) == dict(zip(expected["t"], expected["len"]))
@@ -0,0 +1,128 @@
+"""Tests for engine/upload_sessions.py — resumable chunked uploads.
+Run: pytest tests/test_upload_sessions.py -v
+"""
+import os
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from engine.upload_sessions import UploadSessionStore, UploadSessionError, MIN_SESSION_CHUNK
+
+CHUNK = MIN_SESSION_CHUNK
+
+
+@pytest.fixture
+def store():
+    with tempfile.TemporaryDirectory() as d:
+        yield UploadSessionStore(d)
+
+
+def _payload(n_bytes: int) -> bytes:
+    return (b"0123456789abcdef" * (n_bytes // 16 + 1))[:n_bytes]
+
+
+def _chunks(data: bytes) -> list:
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+def test_parallel_out_of_order_chunks_assemble(store):
+    data = _payload(5 * CHUNK + 123)
+    sha = hashlib.sha256(data).hexdigest()
+    session = store.create("evidence.csv", len(data), CHUNK, sha256=sha)
+    parts = _chunks(data)
+    assert session.total_chunks == len(parts) == 6
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: store.write_chunk(session, i, parts[i]), reversed(range(len(parts)))))
+    path, size, digests = store.complete(store.get(session.id), ("sha256", "md5"))
+    assert (size, digests["sha256"]) == (len(data), sha)
+    assert digests["md5"] == hashlib.md5(data).hexdigest()
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(session.dir)
+
+
+def test_status_lists_missing_chunks_for_resume(store):
+    data = _payload(3 * CHUNK)
+    session = store.create("disk.img", len(data), CHUNK)
+    parts = _chunks(data)
+    store.write_chunk(session, 1, parts[1])
+    st = store.get(session.id).status()
+    assert (st["received"], st["missing"], st["bytes_received"]) == ([1], [0, 2], CHUNK)
+    with pytest.raises(UploadSessionError) as e:
+        store.complete(session)
+    assert e.value.status == 409
+    for i in st["missing"]:
+        store.write_chunk(session, i, parts[i])
+    assert store.complete(session)[1] == len(data)
+
+
+def test_chunk_validation(store):
+    session = store.create("x.log", CHUNK + 10, CHUNK)
+    with pytest.raises(UploadSessionError, match="out of range"):
+        store.write_chunk(session, 2, b"x" * 10)
+    with pytest.raises(UploadSessionError, match="expected 10"):
+        store.write_chunk(session, 1, b"x" * 11)
+    with pytest.raises(UploadSessionError) as e:
+        store.write_chunk(session, 1, b"x" * 10, sha256="0" * 64)
+    assert e.value.status == 422
+    store.write_chunk(session, 1, b"x" * 10, sha256=hashlib.sha256(b"x" * 10).hexdigest())
+    assert session.received() == [1]
+    with pytest.raises(UploadSessionError, match="chunk_size"):
+        store.create("x.log", 10, chunk_size=1)
+    with pytest.raises(UploadSessionError) as e:
+        store.get("missing")
+    assert e.value.status == 404
+
+
+def test_sha256_mismatch_keeps_session(store):
+    data = _payload(CHUNK // 2)
+    session = store.create("a.csv", len(data), CHUNK, sha256="f" * 64)
+    store.write_chunk(session, 0, data)
+    with pytest.raises(UploadSessionError, match="SHA256 mismatch") as e:
+        store.complete(session)
+    assert e.value.status == 422 and os.path.exists(session.data_path)
+    store.discard(session.id)
+    assert not os.path.exists(session.dir)
+    with pytest.raises(UploadSessionError) as e:
+        store.complete(session)
+    assert e.value.status == 404
+
+
+def test_double_complete_assembles_once(store):
+    data = _payload(3 * CHUNK)
+    session = store.create("dup.csv", len(data), CHUNK)
+    for i, part in enumerate(_chunks(data)):
+        store.write_chunk(session, i, part)
+
+    def complete(_):
+        try:
+            return store.complete(store.get(session.id))
+        except UploadSessionError as e:
+            return e.status
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(complete, range(8)))
+    done = [r for r in results if isinstance(r, tuple)]
+    assert len(done) == 1 and {r for r in results if r is not done[0]} <= {404, 409}
+    with open(done[0][0], "rb") as f:
+        assert f.read() == data
+    with pytest.raises(UploadSessionError) as e:
+        store.complete(session)
+    assert e.value.status == 404
+
+
+def test_complete_claim_blocks_chunks_and_is_released_on_failure(store):
+    data = _payload(CHUNK // 2)
+    session = store.create("b.csv", len(data), CHUNK, sha256="f" * 64)
+    store.write_chunk(session, 0, data)
+    open(session.completing_path, "w").close()
+    for call in (lambda: store.complete(session), lambda: store.write_chunk(session, 0, data)):
+        with pytest.raises(UploadSessionError) as e:
+            call()
+        assert e.value.status == 409
+    os.remove(session.completing_path)
+    with pytest.raises(UploadSessionError, match="SHA256 mismatch"):
+        store.complete(session)
+    assert store.complete(session, sha256=hashlib.sha256(data).hexdigest())[1] == len(data)
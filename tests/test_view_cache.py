@@ -0,0 +1,112 @@
+"""Tests for engine/view_cache.py — cached grid views and page gathers.
+Run: pytest tests/test_view_cache.py -v
+"""
+import os
+import tempfile
+import polars as pl
+import pytest
+
+import engine.session_store as ss
+from engine.forensic import apply_standard_processing, drop_internal_columns
+from engine.session_store import write_store, register_dataset, clear_registry
+from engine.view_cache import ViewCache, ViewResult, resolve_view, view_cache
+
+
+@pytest.fixture
+def dataset(monkeypatch):
+    monkeypatch.setattr(ss, "ROW_GROUP_SIZE", 8)  # several row groups in a small file
+    with tempfile.TemporaryDirectory() as d:
+        clear_registry()
+        view_cache.clear()
+        path = os.path.join(d, "import_view_1.csv")
+        n = 40
+        write_store(pl.DataFrame({
+            "_id": list(range(1, n + 1)),
+            "Time": [f"2025-01-01 {h % 24:02d}:{h:02d}:00" for h in range(n)],
+            "User": [["alice", "bob", "carol"][i % 3] for i in range(n)],
+            "Bytes": [str((i * 37) % 101) for i in range(n)],
+        }), path)
+        yield register_dataset(path)
+        clear_registry()
+        view_cache.clear()
+
+
+def _direct_page(ds, params, offset, size):
+    lf = apply_standard_processing(ds.scan(), dict(params, dataset=ds))
+    return drop_internal_columns(lf.slice(offset, size)).collect()
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"start_time": "2025-01-01 05:00:00", "end_time": "2025-01-01 20:00:00"},
+    {"query": "bob"},
+    {"query": "carol", "sort_col": "Bytes", "sort_dir": "desc"},
+])
+def test_cached_pages_match_direct_processing(dataset, params):
+    view = resolve_view(dataset, params)
+    for offset in (0, 5, 10, 35):
+        page = drop_internal_columns(dataset.gather(view.page_positions(offset, 5))).collect()
+        assert page.equals(_direct_page(dataset, params, offset, 5))
+
+
+def test_view_is_computed_once_per_key(dataset):
+    params = {"query": "alice", "col_filters": '[{"field": "User", "type": "like", "value": "a"}]'}
+    first = resolve_view(dataset, params)
+    hits = view_cache.hits
+    assert resolve_view(dataset, dict(params)) is first
+    assert view_cache.hits == hits + 1
+    assert first.total == 14
+
+
+def test_contiguous_views_store_no_positions(dataset):
+    assert resolve_view(dataset, {}).positions is None
+    assert resolve_view(dataset, {"query": "bob"}).positions is not None
+
+
+def test_cache_evicts_by_position_budget():
+    cache = ViewCache(max_entries=10, max_positions=5)
+    cache.put("a", ViewResult.from_positions(pl.Series([3, 1, 2], dtype=pl.UInt32)))
+    cache.put("b", ViewResult.from_positions(pl.Series([9, 7, 8], dtype=pl.UInt32)))
+    assert cache.get("a") is None and cache.get("b") is not None
+    cache.put("c", ViewResult.from_positions(pl.Series(range(100), dtype=pl.UInt32)))
+    assert cache.get("c") is not None  # contiguous: no positions stored
+
+
+@pytest.fixture
+def sparse_dataset():
+    with tempfile.TemporaryDirectory() as d:
+        clear_registry()
+        view_cache.clear()
+        path = os.path.join(d, "import_sparse_1.csv")
+        write_store(pl.DataFrame({
+            "_id": [1, 2, 3, 4, 5, 6],
+            "Time": [f"2025-01-01 0{h}:00:00" for h in range(6)],
+            "User": ["alice", "bob", "alice", "bob", "alice", "bob"],
+            "Blank": [None, "", "N/A", "-", None, "null"],
+            "OnlyBob": [None, "x", None, "y", None, "z"],
+            "Full": ["a", "b", "c", "d", "e", "f"],
+        }), path)
+        yield register_dataset(path)
+        clear_registry()
+        view_cache.clear()
+
+
+def _scan_empty_columns(ds, params, cols):
+    from engine.view_cache import _blank_expr
+    lf = apply_standard_processing(ds.scan(), dict(params, dataset=ds))
+    res = lf.select([_blank_expr(c).all().alias(c) for c in cols]).collect()
+    return [c for c in cols if res[c][0]]
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"query": "alice"},
+    {"query": "bob"},
+    {"col_filters": "[]", "query": " "},
+    {"query": "nomatch"},
+    {"start_time": "2025-01-01 01:00:00", "end_time": "2025-01-01 01:30:00"},
+])
+def test_empty_columns_match_full_scan(sparse_dataset, params):
+    from engine.view_cache import view_empty_columns
+    cols = ["User", "Blank", "OnlyBob", "Full"]
+    assert view_empty_columns(sparse_dataset, params, cols) == _scan_empty_columns(sparse_dataset, params, cols)
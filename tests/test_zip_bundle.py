@@ -0,0 +1,76 @@
+"""Tests for engine/zip_bundle.py — ZIP triage bundles parsed without extraction.
+Run: pytest tests/test_zip_bundle.py -v
+"""
+import os
+import zipfile
+import plistlib
+import tempfile
+
+import polars as pl
+import pytest
+
+from engine.zip_bundle import plan_batches, read_bundle, write_batch, merge_parts, MIXED_CATEGORY
+
+
+@pytest.fixture
+def bundle():
+    """Mixed KAPE/UAC-style bundle: launchd plists, traces (two with the same
+    name), a CSV, AppleDouble junk, an unsupported and a broken member."""
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "triage.zip")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("Library/LaunchAgents/com.evil.plist", plistlib.dumps(
+                {"Label": "com.evil", "ProgramArguments": ["/tmp/x", "-d"], "RunAtLoad": True}))
+            z.writestr("__MACOSX/Library/LaunchAgents/._com.evil.plist", b"\x00\x05\x16\x07")
+            z.writestr("hostA/diag/app.trc", "2026-01-23 11:28:45 ERROR something failed\n  at frame 1\n")
+            z.writestr("hostB/diag/app.trc", "continuation first\n2026-01-23 11:30:00 retry scheduled\n")
+            z.writestr("hostB/diag/plain.trc", "no timestamps here\nsecond line\n")
+            z.writestr("C/logins.csv", "Time,EventID,User\n2025-01-01 10:00:00,4624,alice\n")
+            z.writestr("C/$MFT", b"\x00" * 64)
+            z.writestr("broken.plist", b"not a plist")
+        yield path
+
+
+def test_plan_batches_skips_junk_and_splits_per_worker(bundle):
+    batches = plan_batches(bundle)
+    assert len(batches) == 1
+    names = batches[0]
+    assert "C/$MFT" not in names and not any(n.startswith("__MACOSX/") for n in names)
+    assert len(names) == 6
+    split = plan_batches(bundle, parts=3)
+    assert len(split) >= 3 and [n for b in split for n in b] == names
+
+
+def test_read_bundle_routes_each_member(bundle):
+    df, cat = read_bundle(bundle)
+    assert cat == MIXED_CATEGORY
+    assert df.height == 7
+    by_path = df.group_by("Bundle_Path").len().sort("Bundle_Path").rows()
+    assert by_path == [("C/logins.csv", 1), ("Library/LaunchAgents/com.evil.plist", 1),
+                       ("hostA/diag/app.trc", 1), ("hostB/diag/app.trc", 2), ("hostB/diag/plain.trc", 2)]
+    # Same member name in two folders: separate traces
+    b = df.filter(pl.col("Bundle_Path") == "hostB/diag/app.trc").sort("Time")
+    assert b["Message"].to_list() == ["continuation first", "retry scheduled"]
+    a = df.filter(pl.col("Bundle_Path") == "hostA/diag/app.trc").row(0, named=True)
+    assert (a["Source_File"], a["Message"], a["Level"]) == ("app.trc", "ERROR something failed   at frame 1", "Error")
+    plain = df.filter(pl.col("Bundle_Path") == "hostB/diag/plain.trc")
+    assert set(plain["EventID"]) == {"Trace_Line"} and plain["Line"].to_list() == ["1", "2"]
+    plist = df.filter(pl.col("Source_File") == "com.evil.plist").row(0, named=True)
+    assert (plist["EventID"], plist["Destination_Entity"], plist["run_at_load"]) == ("com.evil", "/tmp/x -d", "True")
+    assert df.filter(pl.col("Source_File") == "logins.csv")["User"].to_list() == ["alice"]
+
+
+def test_write_batch_parts_merge_to_the_same_rows(bundle):
+    expected, _ = read_bundle(bundle)
+    with tempfile.TemporaryDirectory() as out:
+        paths, rows, cats = [], 0, set()
+        for names in plan_batches(bundle, parts=3):
+            p, n, c = write_batch(bundle, names, out)
+            paths += p
+            rows += n
+            cats.update(c)
+        merged = merge_parts(paths).collect()
+    assert rows == merged.height == expected.height
+    assert cats == {"Trace/Bulk_TRC", "macOS/Bulk_Plist", "generic"}
+    key = ["Bundle_Path", "Message", "EventID"]
+    assert merged.select(key).sort(key).equals(expected.select(key).sort(key))
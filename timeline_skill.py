@@ -7,6 +7,7 @@ from datetime import datetime
 # Importamos nuestros motores
 from mft_engine import process_mft_file
 from evtx_engine import process_evtx_file
+from engine.session_store import write_store
 
 def generate_unified_timeline(source_path: str, artifact_type: str, output_dir: str) -> str:
     """
@@ -33,8 +34,9 @@ def generate_unified_timeline(source_path: str, artifact_type: str, output_dir:
     csv_path = os.path.join(output_dir, f"{filename}.csv")
     xlsx_path = os.path.join(output_dir, f"{filename}.xlsx")
 
-    # 3. Exportar CSV (Velocidad nativa Polars)
-    df.write_csv(csv_path)
+    # 3. Persistir el store columnar (Parquet zstd). csv_path es el handle lógico
+    #    de la sesión; el CSV real solo se genera al exportar.
+    write_store(df, csv_path)
 
     # 4. Exportar Excel (xlsxwriter directo — Polars write_excel deprecated params)
     with xlsxwriter.Workbook(str(xlsx_path)) as wb: